@@ -0,0 +1 @@
+"""Load and latency benchmarks for the app's routes (run with `python -m benchmarks`)."""
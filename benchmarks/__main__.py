@@ -0,0 +1,139 @@
+"""
+Seed a local database and benchmark every route of the views and auth blueprints.
+
+    python -m benchmarks --output results.json
+    python -m benchmarks --database-url postgresql://localhost/notes_bench --reset --users 20
+    python -m benchmarks --base-url http://127.0.0.1:5000 --database-url sqlite:////tmp/bench.db
+
+With --base-url the requests go over HTTP to a server you started yourself;
+it must use the same database as --database-url so the seeded ids match.
+Compare two result files with `python -m benchmarks.compare`.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+import sqlalchemy
+from sqlalchemy import select
+from website import create_app, db
+from website.models import User
+from .drivers import HttpDriver, TestClientDriver
+from .runner import run_benchmarks, select_scenarios, uncovered_routes
+from .scenarios import SCENARIOS, BenchmarkContext
+from .seed import Dataset, bench_email, seed_database
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--database-url', help='Local database to seed (default: a fresh SQLite file in the temp dir)')
+    parser.add_argument('--reset', action='store_true', help='Drop and recreate all tables before seeding')
+    parser.add_argument('--base-url', help='Benchmark a running server over HTTP instead of the test client')
+    parser.add_argument('--users', type=int, default=5)
+    parser.add_argument('--todos', type=int, default=50, help='Todos per user')
+    parser.add_argument('--tasks', type=int, default=8, help='Tasks per todo')
+    parser.add_argument('--notes', type=int, default=200, help='Notes per user')
+    parser.add_argument('--payments', type=int, default=50, help='Payment reminders per user')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for the generated data')
+    parser.add_argument('--iterations', type=int, default=50, help='Measured requests per scenario')
+    parser.add_argument('--warmup', type=int, default=5, help='Unmeasured requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=1, help='Concurrent sessions per scenario')
+    parser.add_argument('--only', action='append', metavar='PATTERN',
+                        help='Only run scenarios matching this glob, e.g. "GET views.*" (repeatable)')
+    parser.add_argument('--output', help='Write the JSON report here (default: stdout)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    database_url = args.database_url
+    if not database_url:
+        path = os.path.join(tempfile.gettempdir(), 'notes_benchmark.db')
+        if os.path.exists(path):
+            os.remove(path)
+        database_url = f'sqlite:///{path}'
+
+    # The benchmark creates its own tables, so skip the Alembic revision check
+    config = {'SQLALCHEMY_DATABASE_URI': database_url, 'SCHEMA_CHECK': 'off'}
+    if not os.getenv('SECRET_KEY'):
+        config['SECRET_KEY'] = 'benchmark'
+    app = create_app(config)
+    # Server errors are counted in the report; don't print a traceback per request
+    app.logger.setLevel(logging.CRITICAL)
+
+    dataset = Dataset(args.users, args.todos, args.tasks, args.notes, args.payments, args.seed)
+    with app.app_context():
+        if args.reset:
+            db.drop_all()
+        db.create_all()
+        if db.session.scalar(select(User.id).where(User.email == bench_email(0))):
+            _log('Reusing the benchmark data already in the database (use --reset to reseed)')
+            rows = None
+        else:
+            _log(f'Seeding {database_url} ...')
+            rows = seed_database(dataset)
+        dialect = db.engine.dialect.name
+
+    driver = HttpDriver(args.base_url) if args.base_url else TestClientDriver(app)
+    ctx = BenchmarkContext(app)
+    scenarios = select_scenarios(SCENARIOS, args.only)
+
+    missing = uncovered_routes(app, SCENARIOS)
+    for route in missing:
+        _log(f'warning: no benchmark scenario for {route}')
+
+    results = run_benchmarks(driver, ctx, scenarios, args.iterations, args.warmup, args.concurrency,
+                             progress=_print_summary)
+
+    report = {
+        'meta': {
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'git_commit': _git_commit(),
+            'python': platform.python_version(),
+            'sqlalchemy': sqlalchemy.__version__,
+            'database': dialect,
+            'driver': driver.name,
+            'iterations': args.iterations,
+            'warmup': args.warmup,
+            'concurrency': args.concurrency,
+        },
+        'dataset': dict(dataset.to_dict(), rows=rows),
+        'endpoints': results,
+        'uncovered': missing,
+    }
+
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+        _log(f'Wrote {args.output}')
+    else:
+        print(output)
+
+
+def _print_summary(name, summary):
+    latency = summary['latency_ms']
+    _log(f"{name:<40} p50 {latency['p50']:>8.2f} ms  p95 {latency['p95']:>8.2f} ms  "
+         f"p99 {latency['p99']:>8.2f} ms  {summary['throughput_rps']:>8.1f} req/s  "
+         f"sql {summary['sql_statements']['max']}  errors {summary['errors']}")
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _log(message):
+    print(message, file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Compare two benchmark reports and exit non-zero on regressions.
+
+    python -m benchmarks.compare baseline.json results.json --threshold 0.2
+
+A scenario regresses when its p95 latency grows by more than the threshold
+(and by more than --min-delta-ms, to ignore noise on very fast routes), when
+it issues more SQL statements than before, or when it starts returning errors.
+"""
+import argparse
+import json
+import sys
+
+
+def compare(baseline, current, threshold=0.2, min_delta_ms=2.0):
+    """
+    Compare the endpoint summaries of two reports.
+
+    Args:
+        baseline (dict): Earlier report
+        current (dict): New report
+        threshold (float): Allowed relative p95 growth (0.2 = 20%)
+        min_delta_ms (float): Ignore p95 growth smaller than this
+
+    Returns:
+        tuple: (list of row dicts, list of regression messages)
+    """
+    rows = []
+    regressions = []
+    for name in sorted(set(baseline['endpoints']) | set(current['endpoints'])):
+        old = baseline['endpoints'].get(name)
+        new = current['endpoints'].get(name)
+        if not old or not new:
+            rows.append({'name': name, 'note': 'only in baseline' if old else 'new'})
+            continue
+
+        old_p95, new_p95 = old['latency_ms']['p95'], new['latency_ms']['p95']
+        old_sql, new_sql = old['sql_statements']['max'], new['sql_statements']['max']
+        change = (new_p95 - old_p95) / old_p95 if old_p95 else 0.0
+        rows.append({'name': name, 'old_p95': old_p95, 'new_p95': new_p95, 'change': change,
+                     'old_sql': old_sql, 'new_sql': new_sql})
+
+        if change > threshold and new_p95 - old_p95 > min_delta_ms:
+            regressions.append(f'{name}: p95 {old_p95:.2f} ms -> {new_p95:.2f} ms ({change:+.0%})')
+        if old_sql is not None and new_sql is not None and new_sql > old_sql:
+            regressions.append(f'{name}: SQL statements {old_sql} -> {new_sql}')
+        if new['errors'] > old['errors']:
+            regressions.append(f"{name}: errors {old['errors']} -> {new['errors']}")
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.compare', description=__doc__.strip().splitlines()[0])
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Allowed relative p95 growth (default 0.2)')
+    parser.add_argument('--min-delta-ms', type=float, default=2.0, help='Ignore p95 growth below this (default 2)')
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    rows, regressions = compare(baseline, current, args.threshold, args.min_delta_ms)
+    for row in rows:
+        if 'note' in row:
+            print(f"{row['name']:<40} {row['note']}")
+        else:
+            print(f"{row['name']:<40} p95 {row['old_p95']:>8.2f} -> {row['new_p95']:>8.2f} ms "
+                  f"({row['change']:+6.0%})  sql {row['old_sql']} -> {row['new_sql']}")
+
+    if regressions:
+        print('\nRegressions:')
+        for regression in regressions:
+            print(f'  {regression}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+import json
+import re
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.cookiejar import CookieJar
+
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+SERVER_TIMING_DB = re.compile(r'db;dur=([\d.]+)')
+
+
+class Response:
+    """What a benchmark keeps from one request."""
+
+    def __init__(self, status, elapsed, server_timing, etag=None):
+        self.status = status
+        self.elapsed = elapsed
+        self.etag = etag
+        queries = SERVER_TIMING_QUERIES.search(server_timing or '')
+        db_time = SERVER_TIMING_DB.search(server_timing or '')
+        self.sql_statements = int(queries.group(1)) if queries else None
+        self.db_ms = float(db_time.group(1)) if db_time else None
+
+
+class TestClientDriver:
+    """Drive the app in-process through the Flask test client (no network)."""
+
+    name = 'test_client'
+
+    def __init__(self, app):
+        self.app = app
+
+    def client(self):
+        return _TestClient(self.app.test_client())
+
+
+class HttpDriver:
+    """Drive an already running server over HTTP (e.g. `flask run` on localhost)."""
+
+    name = 'http'
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def client(self):
+        return _HttpClient(self.base_url)
+
+
+class _TestClient:
+    def __init__(self, client):
+        self._client = client
+
+    def request(self, method, path, data=None, json=None, body=None, content_type=None, headers=None):
+        started = time.perf_counter()
+        if body is not None:
+            response = self._client.open(path, method=method, data=body, content_type=content_type, headers=headers)
+        else:
+            response = self._client.open(path, method=method, data=data, json=json, headers=headers)
+        # Read the body so streamed responses are timed to their last chunk
+        response.get_data()
+        elapsed = time.perf_counter() - started
+        response.close()
+        return Response(response.status_code, elapsed, response.headers.get('Server-Timing'),
+                        response.headers.get('ETag'))
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    # Time the route itself, like the test client does, not the page it redirects to
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class _HttpClient:
+    def __init__(self, base_url):
+        self._base_url = base_url
+        self._opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()), _NoRedirect)
+
+    def request(self, method, path, data=None, json=None, body=None, content_type=None, headers=None):
+        headers = dict(headers or {})
+        if body is not None:
+            body = body.encode() if isinstance(body, str) else body
+            headers['Content-Type'] = content_type
+        elif json is not None:
+            body = _json_dumps(json)
+            headers['Content-Type'] = 'application/json'
+        elif data is not None:
+            body = urllib.parse.urlencode(data, doseq=True).encode()
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+
+        request = urllib.request.Request(self._base_url + path, data=body, headers=headers, method=method)
+        started = time.perf_counter()
+        try:
+            with self._opener.open(request) as response:
+                response.read()
+                status, response_headers = response.status, response.headers
+        except urllib.error.HTTPError as e:
+            e.read()
+            status, response_headers = e.code, e.headers
+        elapsed = time.perf_counter() - started
+        return Response(status, elapsed, response_headers.get('Server-Timing'), response_headers.get('ETag'))
+
+
+def _json_dumps(value):
+    return json.dumps(value).encode()
@@ -0,0 +1,139 @@
+import fnmatch
+import math
+import threading
+from collections import Counter
+from .scenarios import FLASH_DRAIN_PATH
+
+IGNORED_METHODS = {'HEAD', 'OPTIONS'}
+
+
+def run_benchmarks(driver, ctx, scenarios, iterations=50, warmup=5, concurrency=1, progress=None):
+    """
+    Run every scenario and summarize latency, throughput and SQL statements.
+
+    Args:
+        driver: TestClientDriver or HttpDriver
+        ctx (BenchmarkContext): Seeded ids and helpers for the benchmark user
+        scenarios (list): Scenarios to run, in order
+        iterations (int): Measured requests per scenario
+        warmup (int): Unmeasured requests per scenario, run first
+        concurrency (int): Worker threads (each with its own session) per scenario
+        progress (callable): Optional callback receiving each scenario summary
+
+    Returns:
+        dict: Summary per scenario name
+    """
+    results = {}
+    for scenario in scenarios:
+        if warmup:
+            _run_worker(driver, ctx, scenario, warmup, [], threading.Lock())
+
+        responses = []
+        lock = threading.Lock()
+        counts = [iterations // concurrency + (1 if i < iterations % concurrency else 0) for i in range(concurrency)]
+        workers = [threading.Thread(target=_run_worker, args=(driver, ctx, scenario, count, responses, lock))
+                   for count in counts if count]
+
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        summary = summarize(scenario, responses, len(workers))
+        results[scenario.name] = summary
+        if progress:
+            progress(scenario.name, summary)
+    return results
+
+
+def _run_worker(driver, ctx, scenario, count, responses, lock):
+    client = driver.client()
+    if not scenario.anonymous:
+        ctx.login(client)
+        client.request('GET', FLASH_DRAIN_PATH)
+
+    for _ in range(count):
+        prepared = scenario.prepare(ctx, client) if scenario.prepare else None
+        request = scenario.build(ctx, prepared)
+        response = client.request(scenario.method, request['path'], data=request.get('data'),
+                                  json=request.get('json'), body=request.get('body'),
+                                  content_type=request.get('content_type'), headers=request.get('headers'))
+        if scenario.flashes:
+            client.request('GET', FLASH_DRAIN_PATH)
+        with lock:
+            responses.append(response)
+
+
+def summarize(scenario, responses, workers=1):
+    """
+    Latency percentiles (ms), throughput and SQL statement counts for one scenario.
+
+    Throughput is measured over the time workers spent in measured requests,
+    so untimed setup (prepare, flash draining) doesn't count against it.
+    """
+    busy = sum(response.elapsed for response in responses) / workers if workers else 0
+    latencies = sorted(response.elapsed * 1000 for response in responses)
+    statements = [response.sql_statements for response in responses if response.sql_statements is not None]
+    db_times = sorted(response.db_ms for response in responses if response.db_ms is not None)
+    statuses = Counter(response.status for response in responses)
+
+    return {
+        'method': scenario.method,
+        'endpoint': scenario.endpoint,
+        'requests': len(responses),
+        'errors': sum(count for status, count in statuses.items() if status >= 500),
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        'latency_ms': {
+            'min': _round(latencies[0] if latencies else None),
+            'mean': _round(sum(latencies) / len(latencies) if latencies else None),
+            'p50': _round(percentile(latencies, 0.50)),
+            'p95': _round(percentile(latencies, 0.95)),
+            'p99': _round(percentile(latencies, 0.99)),
+            'max': _round(latencies[-1] if latencies else None),
+        },
+        'throughput_rps': _round(len(responses) / busy if busy else None),
+        'sql_statements': {
+            'mean': _round(sum(statements) / len(statements) if statements else None),
+            'max': max(statements) if statements else None,
+        },
+        'db_ms': {
+            'p50': _round(percentile(db_times, 0.50)),
+            'p95': _round(percentile(db_times, 0.95)),
+        },
+    }
+
+
+def percentile(sorted_values, fraction):
+    """Linearly interpolated percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = (len(sorted_values) - 1) * fraction
+    lower, upper = math.floor(rank), math.ceil(rank)
+    if lower == upper:
+        return sorted_values[lower]
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (rank - lower)
+
+
+def select_scenarios(scenarios, patterns):
+    """Keep the scenarios whose name matches any of the glob patterns (all when none are given)."""
+    if not patterns:
+        return list(scenarios)
+    return [scenario for scenario in scenarios
+            if any(fnmatch.fnmatch(scenario.name, pattern) for pattern in patterns)]
+
+
+def uncovered_routes(app, scenarios, blueprints=('views', 'auth', 'api_v1')):
+    """List the "METHOD endpoint" pairs of the given blueprints that no scenario exercises."""
+    covered = {(scenario.method, scenario.endpoint) for scenario in scenarios}
+    missing = set()
+    for rule in app.url_map.iter_rules():
+        if rule.endpoint.split('.', 1)[0] not in blueprints:
+            continue
+        for method in rule.methods - IGNORED_METHODS:
+            if (method, rule.endpoint) not in covered:
+                missing.add(f'{method} {rule.endpoint}')
+    return sorted(missing)
+
+
+def _round(value, digits=3):
+    return round(value, digits) if value is not None else None
@@ -0,0 +1,218 @@
+import itertools
+import json
+import random
+import string
+import threading
+from datetime import date, timedelta
+from urllib.parse import quote
+from sqlalchemy import select
+from website import db
+from website.models import User, ToDo, ToDoTask, Note, PaymentReminder
+from .seed import BENCH_PASSWORD, bench_email
+
+SEARCH_QUERY = 'budget report'
+# A small export (one note, one payment, one todo with three tasks) for the import scenario
+IMPORT_BODY = ''.join(json.dumps(record) + '\n' for record in [
+    {'type': 'note', 'title': 'Imported note', 'text_content': 'imported by the benchmark'},
+    {'type': 'payment_reminder', 'name': 'Imported', 'pmt_date': '2026-01-01', 'pmt_amount': '9.99'},
+    {'type': 'todo', 'name': 'Imported todo', 'tasks': [
+        {'text_content': 'one', 'status': 1}, {'text_content': 'two'}, {'text_content': 'three'}]},
+])
+# Rendering any page drains pending flash messages, so redirecting POSTs don't grow the session cookie
+FLASH_DRAIN_PATH = '/about'
+
+
+class Scenario:
+    """One measured request shape for a route (method + endpoint, optionally a variant)."""
+
+    def __init__(self, method, endpoint, build, prepare=None, anonymous=False, variant=None, flashes=False):
+        self.method = method
+        self.endpoint = endpoint
+        self.build = build
+        self.prepare = prepare
+        self.anonymous = anonymous
+        self.variant = variant
+        self.flashes = flashes
+
+    @property
+    def name(self):
+        name = f'{self.method} {self.endpoint}'
+        return f'{name} [{self.variant}]' if self.variant else name
+
+
+class BenchmarkContext:
+    """Ids of the benchmark user's data, plus helpers scenarios use to set up requests."""
+
+    def __init__(self, app, user_index=0):
+        self.app = app
+        self.email = bench_email(user_index)
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+        with app.app_context():
+            self.user_id = db.session.scalar(select(User.id).where(User.email == self.email))
+            self.todo_ids = db.session.scalars(select(ToDo.id).where(
+                ToDo.user_id == self.user_id, ToDo.is_active == True).order_by(ToDo.position)).all()
+            self.task_ids = db.session.scalars(select(ToDoTask.id).join(ToDo).where(
+                ToDo.user_id == self.user_id).order_by(ToDoTask.id)).all()
+            self.note_ids = db.session.scalars(select(Note.id).where(
+                Note.user_id == self.user_id).order_by(Note.id)).all()
+            self.payment_ids = db.session.scalars(select(PaymentReminder.id).where(
+                PaymentReminder.user_id == self.user_id).order_by(PaymentReminder.id)).all()
+
+    def next(self):
+        with self._lock:
+            return next(self._counter)
+
+    def pick(self, ids):
+        return ids[self.next() % len(ids)]
+
+    def login(self, client):
+        return client.request('POST', '/login', data={
+            'form_type': 'login', 'login_email': self.email, 'login_password': BENCH_PASSWORD})
+
+    def create(self, model, **values):
+        """Insert a row through the ORM (so listeners run) and return its id."""
+        with self.app.app_context():
+            row = model(**values)
+            db.session.add(row)
+            db.session.commit()
+            return row.id
+
+
+def _today(days=0):
+    return (date.today() + timedelta(days=days)).isoformat()
+
+
+def _new_todo(ctx, client):
+    return ctx.create(ToDo, user_id=ctx.user_id, name='Benchmark todo', position=len(ctx.todo_ids) + ctx.next())
+
+
+def _new_task(ctx, client):
+    return ctx.create(ToDoTask, to_do_id=ctx.pick(ctx.todo_ids), text_content='Benchmark task', status=0)
+
+
+def _new_note(ctx, client):
+    return ctx.create(Note, user_id=ctx.user_id, title='Benchmark note', text_content='to be deleted')
+
+
+def _new_payment(ctx, client):
+    return ctx.create(PaymentReminder, user_id=ctx.user_id, name='Benchmark', pmt_date=date.today(), pmt_amount=1)
+
+
+def _logout(ctx, client):
+    client.request('GET', '/logout')
+
+
+def _login(ctx, client):
+    ctx.login(client)
+
+
+def _reorder(ctx, prepared):
+    # Alternate between two orders of the first todos so every request really moves rows
+    todo_ids = ctx.todo_ids[:20]
+    if ctx.next() % 2:
+        todo_ids = todo_ids[::-1]
+    return {'path': '/api/reorder', 'json': {'todos': [{'id': todo_id} for todo_id in todo_ids], 'tasks': {}}}
+
+
+def _signup(ctx, prepared):
+    rng = random.Random(ctx.next())
+    last_name = ''.join(rng.choice(string.ascii_lowercase) for _ in range(8)).capitalize()
+    return {'path': '/login', 'data': {
+        'form_type': 'signup', 'first_name': 'Bench', 'last_name': last_name,
+        'signin_email': f'signup.{last_name.lower()}.{ctx.next()}@example.com',
+        'signin_password': BENCH_PASSWORD, 'confirmed_password': BENCH_PASSWORD}}
+
+
+def _etag_of(path):
+    def prepare(ctx, client):
+        return client.request('GET', path).etag
+    return prepare
+
+
+def _revalidate(path):
+    # A refresh of a page the browser already has: answered 304 from the list's freshness token
+    return lambda ctx, etag: {'path': path, 'headers': {'If-None-Match': etag}}
+
+
+def _payment_form(ctx, payment_id=''):
+    return {'payment_id': payment_id, 'name': f'Bench payment {ctx.next()}', 'pmt_date': _today(10),
+            'pmt_amount': '19.99', 'notes': 'benchmark', 'is_active': 'on'}
+
+
+# Reads first, then writes, so the read numbers see the seeded data set unchanged
+SCENARIOS = [
+    Scenario('GET', 'views.home', lambda ctx, p: {'path': '/'}),
+    Scenario('GET', 'views.payments', lambda ctx, p: {'path': '/payments'}),
+    Scenario('GET', 'views.payments', lambda ctx, p: {'path': f'/payments?payment_id={ctx.pick(ctx.payment_ids)}'},
+             variant='edit'),
+    Scenario('GET', 'views.payments', _revalidate('/payments'), _etag_of('/payments'), variant='304'),
+    Scenario('GET', 'views.list_payments', lambda ctx, p: {'path': '/api/payments'}),
+    Scenario('GET', 'views.upcoming_payments', lambda ctx, p: {'path': '/api/payments/upcoming'}),
+    Scenario('GET', 'views.payment_monthly_totals', lambda ctx, p: {'path': '/api/payments/monthly-totals'}),
+    Scenario('GET', 'views.list_todos', lambda ctx, p: {'path': '/api/todos'}),
+    Scenario('GET', 'views.list_todos', lambda ctx, p: {'path': '/api/todos?sort=position'}, variant='position'),
+    Scenario('GET', 'views.manage_todos', lambda ctx, p: {'path': '/todos'}),
+    Scenario('GET', 'views.manage_todos', _revalidate('/todos'), _etag_of('/todos'), variant='304'),
+    Scenario('GET', 'views.add_todo', lambda ctx, p: {'path': '/add-todo'}),
+    Scenario('GET', 'views.edit_todo', lambda ctx, p: {'path': f'/todo/{ctx.pick(ctx.todo_ids)}/edit'}),
+    Scenario('GET', 'views.notes', lambda ctx, p: {'path': '/notes'}),
+    Scenario('GET', 'views.notes', _revalidate('/notes'), _etag_of('/notes'), variant='304'),
+    Scenario('GET', 'views.list_notes', lambda ctx, p: {'path': '/api/notes'}),
+    Scenario('GET', 'views.search_notes_api', lambda ctx, p: {'path': f'/api/notes/search?q={quote(SEARCH_QUERY)}'}),
+    Scenario('GET', 'views.cache_stats', lambda ctx, p: {'path': '/api/cache/stats'}),
+    Scenario('GET', 'views.export_data', lambda ctx, p: {'path': '/export'}),
+    Scenario('GET', 'views.export_data', lambda ctx, p: {'path': '/export?format=csv'}, variant='csv'),
+    Scenario('GET', 'api_v1.notes', lambda ctx, p: {'path': '/api/v1/notes'}),
+    Scenario('GET', 'api_v1.notes', lambda ctx, p: {'path': '/api/v1/notes?fields=id,title&limit=100'},
+             variant='fields'),
+    Scenario('GET', 'api_v1.note', lambda ctx, p: {'path': f'/api/v1/notes/{ctx.pick(ctx.note_ids)}'}),
+    Scenario('GET', 'api_v1.todos', lambda ctx, p: {'path': '/api/v1/todos?fields=*'}),
+    Scenario('GET', 'api_v1.todos', lambda ctx, p: {'path': '/api/v1/todos?sort=due_date&fields=id,name,due_date'},
+             variant='due_date'),
+    Scenario('GET', 'api_v1.todo', lambda ctx, p: {'path': f'/api/v1/todos/{ctx.pick(ctx.todo_ids)}'}),
+    Scenario('GET', 'api_v1.todo_tasks', lambda ctx, p: {'path': f'/api/v1/todos/{ctx.pick(ctx.todo_ids)}/tasks'}),
+    Scenario('GET', 'api_v1.tasks', lambda ctx, p: {'path': '/api/v1/tasks?limit=100'}),
+    Scenario('GET', 'api_v1.task', lambda ctx, p: {'path': f'/api/v1/tasks/{ctx.pick(ctx.task_ids)}'}),
+    Scenario('GET', 'api_v1.payments', lambda ctx, p: {'path': '/api/v1/payments'}),
+    Scenario('GET', 'api_v1.payments', _revalidate('/api/v1/payments'), _etag_of('/api/v1/payments'), variant='304'),
+    Scenario('GET', 'api_v1.payment', lambda ctx, p: {'path': f'/api/v1/payments/{ctx.pick(ctx.payment_ids)}'}),
+    Scenario('GET', 'views.profile', lambda ctx, p: {'path': '/profile'}),
+    Scenario('GET', 'views.about', lambda ctx, p: {'path': '/about'}),
+    Scenario('GET', 'auth.login', lambda ctx, p: {'path': '/login'}, anonymous=True),
+
+    Scenario('POST', 'views.toggle_task', lambda ctx, p: {'path': f'/api/task/{ctx.pick(ctx.task_ids)}/toggle'}),
+    Scenario('POST', 'views.reorder_items', _reorder),
+    Scenario('POST', 'views.edit_todo', lambda ctx, p: {
+        'path': f'/todo/{ctx.pick(ctx.todo_ids)}/edit',
+        'data': {'name': f'Renamed {ctx.next()}', 'due_date': _today(7), 'priority': 'High'}}, flashes=True),
+    Scenario('POST', 'views.add_task', lambda ctx, p: {
+        'path': f'/api/todo/{ctx.pick(ctx.todo_ids)}/add-task', 'json': {'text': 'Benchmark task'}}),
+    Scenario('POST', 'views.add_todo', lambda ctx, p: {'path': '/add-todo', 'data': {
+        'name': 'Benchmark todo', 'due_date': _today(14), 'tasks[]': ['one', 'two', 'three']}}, flashes=True),
+    Scenario('POST', 'views.edit_note', lambda ctx, p: {
+        'path': f'/notes/edit/{ctx.pick(ctx.note_ids)}',
+        'data': {'title': f'Edited {ctx.next()}', 'text_content': 'budget review for the quarter'}}, flashes=True),
+    Scenario('POST', 'views.notes', lambda ctx, p: {'path': '/notes', 'data': {
+        'title': 'Benchmark note', 'text_content': 'meeting notes about the travel budget'}}, flashes=True),
+    Scenario('POST', 'views.payments', lambda ctx, p: {'path': '/payments', 'data': _payment_form(ctx)},
+             variant='add', flashes=True),
+    Scenario('POST', 'views.payments', lambda ctx, p: {
+        'path': '/payments', 'data': _payment_form(ctx, ctx.pick(ctx.payment_ids))}, variant='edit', flashes=True),
+    Scenario('POST', 'views.import_data', lambda ctx, p: {
+        'path': '/api/import', 'body': IMPORT_BODY, 'content_type': 'application/x-ndjson'}),
+    Scenario('POST', 'views.delete_task', lambda ctx, task_id: {'path': f'/api/task/{task_id}/delete'},
+             prepare=_new_task),
+    Scenario('POST', 'views.delete_todo', lambda ctx, todo_id: {'path': f'/api/todo/{todo_id}/delete'},
+             prepare=_new_todo),
+    Scenario('POST', 'views.delete_note', lambda ctx, note_id: {'path': f'/notes/delete/{note_id}'},
+             prepare=_new_note, flashes=True),
+    Scenario('POST', 'views.delete_payment', lambda ctx, payment_id: {'path': f'/payments/delete/{payment_id}'},
+             prepare=_new_payment, flashes=True),
+    Scenario('POST', 'auth.login', lambda ctx, p: {'path': '/login', 'data': {
+        'form_type': 'login', 'login_email': ctx.email, 'login_password': BENCH_PASSWORD}},
+             prepare=_logout, anonymous=True, flashes=True),
+    Scenario('POST', 'auth.login', _signup, prepare=_logout, anonymous=True, variant='signup', flashes=True),
+    Scenario('GET', 'auth.logout', lambda ctx, p: {'path': '/logout'}, prepare=_login, anonymous=True, flashes=True),
+]
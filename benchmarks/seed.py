@@ -0,0 +1,143 @@
+import random
+from datetime import date, timedelta
+from flask import current_app
+from sqlalchemy import insert, select
+from werkzeug.security import generate_password_hash
+from website import db
+from website.models import User, ToDo, ToDoTask, Note, PaymentReminder
+from website.recurrence import materialize_occurrences
+
+BENCH_PASSWORD = 'bench123'
+INSERT_BATCH_SIZE = 1000
+
+WORDS = (
+    'budget grocery meeting project invoice travel doctor report review dentist gym '
+    'insurance renewal flight hotel garden birthday taxes subscription backup release '
+    'design roadmap laptop kitchen receipt groceries schedule deadline contract plan'
+).split()
+
+
+class Dataset:
+    """Sizes of a seeded benchmark database (all counts are per user / per todo)."""
+
+    def __init__(self, users=5, todos=50, tasks=8, notes=200, payments=50, seed=42):
+        self.users = users
+        self.todos = todos
+        self.tasks = tasks
+        self.notes = notes
+        self.payments = payments
+        self.seed = seed
+
+    def to_dict(self):
+        return dict(vars(self))
+
+
+def bench_email(index):
+    return f'bench{index}@example.com'
+
+
+def seed_database(dataset):
+    """
+    Fill an empty database with deterministic benchmark data.
+
+    Rows are written with batched Core inserts, so the ToDoTask listeners do
+    not run; the todo counters and status are computed here instead. Payment
+    occurrences are materialized once the reminders exist.
+    The first user is an admin so admin-only routes can be measured too.
+
+    Args:
+        dataset (Dataset): How much data to create
+
+    Returns:
+        dict: Row counts per table
+    """
+    rng = random.Random(dataset.seed)
+    today = date.today()
+    password_hash = generate_password_hash(BENCH_PASSWORD)
+
+    _insert(User, [{
+        'email': bench_email(i),
+        'username': f'bench{i}',
+        'password_hash': password_hash,
+        'f_name': 'Bench',
+        'l_name': f'User{i}',
+        'is_active': True,
+        'user_role': 'admin' if i == 0 else 'normal',
+    } for i in range(dataset.users)])
+    user_ids = db.session.scalars(
+        select(User.id).where(User.email.in_([bench_email(i) for i in range(dataset.users)])).order_by(User.id)
+    ).all()
+
+    todos = []
+    statuses = {}
+    for user_id in user_ids:
+        for position in range(dataset.todos):
+            completed = rng.randint(0, dataset.tasks)
+            statuses[(user_id, position)] = [1] * completed + [0] * (dataset.tasks - completed)
+            status = ToDo.status_for(dataset.tasks, completed)
+            todos.append({
+                'user_id': user_id,
+                'name': _sentence(rng, 3),
+                'priority': rng.choice(('Low', 'Medium', 'High')),
+                'due_date': today + timedelta(days=rng.randint(-30, 90)) if rng.random() < 0.8 else None,
+                'is_active': True,
+                'status': status,
+                'total_tasks': dataset.tasks,
+                'completed_tasks': completed,
+                'position': position,
+            })
+    _insert(ToDo, todos)
+
+    tasks = []
+    todo_rows = db.session.execute(
+        select(ToDo.id, ToDo.user_id, ToDo.position).where(ToDo.user_id.in_(user_ids))
+    )
+    for todo in todo_rows:
+        task_statuses = statuses[(todo.user_id, todo.position)]
+        rng.shuffle(task_statuses)
+        for position, status in enumerate(task_statuses):
+            tasks.append({
+                'to_do_id': todo.id,
+                'text_content': _sentence(rng, 5),
+                'status': status,
+                'position': position,
+            })
+    _insert(ToDoTask, tasks)
+
+    notes = []
+    payments = []
+    for user_id in user_ids:
+        for _ in range(dataset.notes):
+            notes.append({
+                'user_id': user_id,
+                'title': _sentence(rng, 4).capitalize(),
+                'text_content': _sentence(rng, rng.randint(20, 120)),
+                'is_active': True,
+            })
+        for _ in range(dataset.payments):
+            payments.append({
+                'user_id': user_id,
+                'name': rng.choice(WORDS).capitalize(),
+                'pmt_date': today + timedelta(days=rng.randint(-15, 120)),
+                'pmt_amount': round(rng.uniform(5, 500), 2),
+                'notes': _sentence(rng, 8),
+                'is_active': rng.random() < 0.9,
+                'recurrence_unit': rng.choice((None, None, 'week', 'month', 'month', 'year')),
+                'recurrence_interval': 1,
+            })
+    _insert(Note, notes)
+    _insert(PaymentReminder, payments)
+
+    db.session.commit()
+    occurrences = materialize_occurrences(current_app.config['PAYMENT_OCCURRENCE_HORIZON_DAYS'])
+    return {'users': len(user_ids), 'todos': len(todos), 'tasks': len(tasks),
+            'notes': len(notes), 'payments': len(payments), 'payment_occurrences': occurrences}
+
+
+def _insert(model, rows):
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):
+        db.session.execute(insert(model.__table__), rows[start:start + INSERT_BATCH_SIZE])
+
+
+def _sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
@@ -0,0 +1,109 @@
+"""Partition field_history by month
+
+Revision ID: 3b9e27c4d1a6
+Revises: 609be9508866
+Create Date: 2026-10-18 15:22:47.803114
+
+"""
+from datetime import date
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b9e27c4d1a6'
+down_revision = '609be9508866'
+branch_labels = None
+depends_on = None
+
+COLUMNS = 'id, entity_type, entity_id, field, old_value, new_value, changed_date, changed_by_user_id'
+
+
+def _month_start(value, offset=0):
+    month = value.year * 12 + value.month - 1 + offset
+    return date(month // 12, month % 12 + 1, 1)
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        # The primary key must include the partition key, so the table is rebuilt
+        op.execute("ALTER TABLE field_history RENAME TO field_history_old")
+        op.execute("ALTER TABLE field_history_old RENAME CONSTRAINT field_history_pkey TO field_history_old_pkey")
+        op.execute("ALTER SEQUENCE field_history_id_seq RENAME TO field_history_old_id_seq")
+        op.execute("ALTER INDEX idx_entity_lookup RENAME TO idx_entity_lookup_old")
+        op.execute("ALTER INDEX idx_changed_date RENAME TO idx_changed_date_old")
+
+        op.execute("""
+            CREATE TABLE field_history (
+                id SERIAL NOT NULL,
+                entity_type VARCHAR(50) NOT NULL,
+                entity_id INTEGER NOT NULL,
+                field VARCHAR(100) NOT NULL,
+                old_value TEXT,
+                new_value TEXT,
+                changed_date TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now(),
+                changed_by_user_id INTEGER REFERENCES "user" (id),
+                PRIMARY KEY (id, changed_date)
+            ) PARTITION BY RANGE (changed_date)
+        """)
+        op.execute("CREATE INDEX idx_entity_lookup ON field_history (entity_type, entity_id)")
+        op.execute("CREATE INDEX idx_changed_date ON field_history (changed_date)")
+        # The current and next month get their partitions now so new writes never land in the
+        # default partition; later months are created by `flask history partitions`
+        for offset in (0, 1):
+            start = _month_start(date.today(), offset)
+            op.execute(
+                f"CREATE TABLE field_history_y{start.year}m{start.month:02d} PARTITION OF field_history "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{_month_start(start, 1).isoformat()}')"
+            )
+        op.execute("CREATE TABLE field_history_default PARTITION OF field_history DEFAULT")
+
+        op.execute(f"""
+            INSERT INTO field_history ({COLUMNS})
+            SELECT id, entity_type, entity_id, field, old_value, new_value,
+                   coalesce(changed_date, now()), changed_by_user_id
+            FROM field_history_old
+        """)
+        op.execute("SELECT setval('field_history_id_seq', coalesce((SELECT max(id) FROM field_history), 0) + 1, false)")
+        op.execute("DROP TABLE field_history_old")
+
+    else:
+        op.execute("UPDATE field_history SET changed_date = CURRENT_TIMESTAMP WHERE changed_date IS NULL")
+        with op.batch_alter_table('field_history', schema=None) as batch_op:
+            batch_op.alter_column('changed_date', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        op.execute("ALTER TABLE field_history RENAME TO field_history_partitioned")
+        op.execute("ALTER SEQUENCE field_history_id_seq RENAME TO field_history_partitioned_id_seq")
+        op.execute("ALTER INDEX idx_entity_lookup RENAME TO idx_entity_lookup_partitioned")
+        op.execute("ALTER INDEX idx_changed_date RENAME TO idx_changed_date_partitioned")
+
+        op.execute("""
+            CREATE TABLE field_history (
+                id SERIAL NOT NULL PRIMARY KEY,
+                entity_type VARCHAR(50) NOT NULL,
+                entity_id INTEGER NOT NULL,
+                field VARCHAR(100) NOT NULL,
+                old_value TEXT,
+                new_value TEXT,
+                changed_date TIMESTAMP WITHOUT TIME ZONE,
+                changed_by_user_id INTEGER REFERENCES "user" (id)
+            )
+        """)
+        op.execute("CREATE INDEX idx_entity_lookup ON field_history (entity_type, entity_id)")
+        op.execute("CREATE INDEX idx_changed_date ON field_history (changed_date)")
+
+        op.execute(f"INSERT INTO field_history ({COLUMNS}) SELECT {COLUMNS} FROM field_history_partitioned")
+        op.execute("SELECT setval('field_history_id_seq', coalesce((SELECT max(id) FROM field_history), 0) + 1, false)")
+        # Dropping the parent drops every partition with it
+        op.execute("DROP TABLE field_history_partitioned")
+
+    else:
+        with op.batch_alter_table('field_history', schema=None) as batch_op:
+            batch_op.alter_column('changed_date', existing_type=sa.DateTime(), nullable=True)
@@ -0,0 +1,71 @@
+"""Add full-text search to notes
+
+Revision ID: 609be9508866
+Revises: ced513aaf907
+Create Date: 2026-10-18 13:41:09.377105
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '609be9508866'
+down_revision = 'ced513aaf907'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        # Generated column: PostgreSQL keeps it current on every insert/update
+        op.execute("CREATE EXTENSION IF NOT EXISTS btree_gin")
+        op.execute("""
+            ALTER TABLE note ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+                setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+                setweight(to_tsvector('english', coalesce(text_content, '')), 'B')
+            ) STORED
+        """)
+        op.execute("CREATE INDEX idx_note_search ON note USING GIN (user_id, search_vector)")
+
+    elif dialect == 'sqlite':
+        op.execute("""
+            CREATE VIRTUAL TABLE note_fts USING fts5(
+                title, text_content, content='note', content_rowid='id', tokenize='porter unicode61'
+            )
+        """)
+        op.execute("""
+            CREATE TRIGGER note_fts_insert AFTER INSERT ON note BEGIN
+                INSERT INTO note_fts(rowid, title, text_content) VALUES (new.id, new.title, new.text_content);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER note_fts_delete AFTER DELETE ON note BEGIN
+                INSERT INTO note_fts(note_fts, rowid, title, text_content)
+                VALUES ('delete', old.id, old.title, old.text_content);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER note_fts_update AFTER UPDATE OF title, text_content ON note BEGIN
+                INSERT INTO note_fts(note_fts, rowid, title, text_content)
+                VALUES ('delete', old.id, old.title, old.text_content);
+                INSERT INTO note_fts(rowid, title, text_content) VALUES (new.id, new.title, new.text_content);
+            END
+        """)
+        # Index the notes that already exist
+        op.execute("INSERT INTO note_fts(note_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS idx_note_search")
+        op.execute("ALTER TABLE note DROP COLUMN IF EXISTS search_vector")
+
+    elif dialect == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS note_fts_update")
+        op.execute("DROP TRIGGER IF EXISTS note_fts_delete")
+        op.execute("DROP TRIGGER IF EXISTS note_fts_insert")
+        op.execute("DROP TABLE IF EXISTS note_fts")
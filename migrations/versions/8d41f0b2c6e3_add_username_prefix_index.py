@@ -0,0 +1,26 @@
+"""Add username prefix index
+
+Revision ID: 8d41f0b2c6e3
+Revises: 3b9e27c4d1a6
+Create Date: 2026-10-18 16:05:12.418530
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '8d41f0b2c6e3'
+down_revision = '3b9e27c4d1a6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # LIKE 'prefix%' lookups need a pattern_ops index on PostgreSQL
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('CREATE INDEX idx_user_username_prefix ON "user" (username varchar_pattern_ops)')
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS idx_user_username_prefix')
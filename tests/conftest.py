@@ -0,0 +1,48 @@
+import pytest
+from werkzeug.security import generate_password_hash
+from website import create_app, db
+from website.models import User
+
+PASSWORD = 'secret1'
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+        'SECRET_KEY': 'test',
+        'TESTING': True,
+        'SCHEMA_CHECK': 'create',
+        'TEMPLATE_CACHE_DIR': '',
+        'TEMPLATE_WARMUP': False,
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+        'PAYMENT_OCCURRENCE_JOB': False,
+        'NOTIFY_ENABLED': False,
+    })
+    with app.app_context():
+        yield app
+        # Write-behind buffers flush on stop, so stop them while the tables still exist
+        for name in ('last_login_flusher', 'history_flusher'):
+            app.extensions[name].stop()
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def user(app):
+    user = User(email='test@example.com', username='tester', f_name='Test', l_name='User',
+                password_hash=generate_password_hash(PASSWORD, method='pbkdf2:sha256:1000'))
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def client(app, user):
+    client = app.test_client()
+    # Followed like a browser would, so the login flash message is shown and not left pending
+    response = client.post('/login', data={
+        'form_type': 'login', 'login_email': user.email, 'login_password': PASSWORD}, follow_redirects=True)
+    assert response.status_code == 200
+    assert response.request.path == '/'
+    return client
@@ -0,0 +1,56 @@
+import json
+import pytest
+from website import db
+from website.models import Note, ToDo
+
+
+def ndjson(*records):
+    return '\n'.join(json.dumps(record) for record in records) + '\n'
+
+
+def post_import(client, body):
+    return client.post('/api/import?format=ndjson', data=body, content_type='application/x-ndjson')
+
+
+def test_import_creates_rows_with_task_counters(client, user):
+    body = ndjson(
+        {'type': 'note', 'title': 'Groceries', 'text_content': 'Milk'},
+        {'type': 'todo', 'id': 7, 'name': 'Move', 'tasks': [
+            {'text_content': 'Pack', 'status': 1}, {'text_content': 'Clean', 'status': 0}]},
+    )
+    response = post_import(client, body)
+    assert response.status_code == 200
+    assert response.get_json()['imported'] == {'notes': 1, 'payment_reminders': 0, 'todos': 1, 'tasks': 2}
+
+    todo = ToDo.query.filter_by(user_id=user.id).one()
+    assert (todo.total_tasks, todo.completed_tasks, todo.status) == (2, 1, 1)
+
+
+def test_export_round_trips_through_import(client, user):
+    db.session.add(Note(user_id=user.id, title='Groceries', text_content='Milk'))
+    db.session.commit()
+    exported = client.get('/export?format=ndjson').get_data(as_text=True)
+
+    assert post_import(client, exported).status_code == 200
+    assert [note.title for note in Note.query.filter_by(user_id=user.id)] == ['Groceries', 'Groceries']
+
+
+@pytest.mark.parametrize('tasks', ['abc', 5, {'text_content': 'Pack'}, ['Pack']])
+def test_malformed_tasks_are_rejected(client, tasks):
+    response = post_import(client, ndjson({'type': 'todo', 'name': 'Move', 'tasks': tasks}))
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Record 1: tasks must be a list of objects'
+    assert ToDo.query.count() == 0
+
+
+@pytest.mark.parametrize('body, error', [
+    ('{not json}\n', 'Line 1: invalid JSON'),
+    ('[1, 2]\n', 'Line 1: expected an object'),
+    (ndjson({'type': 'note', 'title': 'No text'}), 'Record 1: missing text_content'),
+    (ndjson({'type': 'spreadsheet'}), "Record 1: unknown type 'spreadsheet'"),
+    (ndjson({'type': 'payment_reminder', 'name': 'Rent', 'pmt_date': 'soon', 'pmt_amount': '1'}), 'Record 1:'),
+])
+def test_invalid_records_are_rejected(client, body, error):
+    response = post_import(client, body)
+    assert response.status_code == 400
+    assert response.get_json()['error'].startswith(error)
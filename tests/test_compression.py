@@ -0,0 +1,82 @@
+import gzip
+import zlib
+from website.compression import CompressionMiddleware
+
+
+def wsgi_app(chunks, headers, status='200 OK', produced=None):
+    def app(environ, start_response):
+        start_response(status, headers)
+        for chunk in chunks:
+            if produced is not None:
+                produced.append(chunk)
+            yield chunk
+    return app
+
+
+def call(middleware, accept_encoding='gzip', method='GET'):
+    captured = {}
+
+    def start_response(status, headers, exc_info=None):
+        captured['status'] = status
+        captured['headers'] = dict(headers)
+
+    body = middleware({'REQUEST_METHOD': method, 'HTTP_ACCEPT_ENCODING': accept_encoding}, start_response)
+    return captured, body
+
+
+def test_streamed_body_is_compressed_chunk_by_chunk():
+    produced = []
+    chunks = [f'<tr><td>row {i}</td></tr>'.encode() * 20 for i in range(10)]
+    app = wsgi_app(chunks, [('Content-Type', 'text/html; charset=utf-8')], produced=produced)
+    captured, body = call(CompressionMiddleware(app, flush_size=1))
+
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    output = iter(body)
+    first = next(output)
+    # The first part is decodable before the app produced the rest
+    assert len(produced) == 1
+    assert decompressor.decompress(first) == chunks[0]
+
+    rest = b''.join(output)
+    assert decompressor.decompress(rest) + decompressor.flush() == b''.join(chunks[1:])
+    assert captured['headers']['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in captured['headers']
+
+
+def test_etag_is_weakened_and_vary_extended():
+    body = b'x' * 1000
+    app = wsgi_app([body], [('Content-Type', 'application/json'), ('Content-Length', str(len(body))),
+                            ('ETag', '"abc"'), ('Vary', 'Cookie')])
+    captured, output = call(CompressionMiddleware(app))
+    assert gzip.decompress(b''.join(output)) == body
+    assert captured['headers']['ETag'] == 'W/"abc"'
+    assert captured['headers']['Vary'] == 'Cookie, Accept-Encoding'
+
+
+def test_small_and_excluded_responses_pass_through():
+    small = wsgi_app([b'{}'], [('Content-Type', 'application/json'), ('Content-Length', '2')])
+    captured, output = call(CompressionMiddleware(small, min_size=500))
+    assert b''.join(output) == b'{}'
+    assert 'Content-Encoding' not in captured['headers']
+
+    image = wsgi_app([b'\x89PNG' * 500], [('Content-Type', 'image/png')])
+    captured, output = call(CompressionMiddleware(image))
+    assert b''.join(output) == b'\x89PNG' * 500
+    assert 'Content-Encoding' not in captured['headers']
+
+    not_modified = wsgi_app([], [('Content-Type', 'text/html'), ('ETag', '"abc"')], status='304 Not Modified')
+    captured, output = call(CompressionMiddleware(not_modified))
+    assert b''.join(output) == b''
+    assert captured['headers']['ETag'] == '"abc"'
+
+
+def test_clients_without_gzip_get_the_original_body():
+    body = b'x' * 1000
+    app = wsgi_app([body], [('Content-Type', 'text/html')])
+    captured, output = call(CompressionMiddleware(app), accept_encoding='identity')
+    assert b''.join(output) == body
+    assert 'Content-Encoding' not in captured['headers']
+
+    captured, output = call(CompressionMiddleware(app), method='HEAD')
+    assert b''.join(output) == body
+    assert 'Content-Encoding' not in captured['headers']
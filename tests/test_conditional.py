@@ -0,0 +1,58 @@
+from website import db
+from website.models import Note
+
+
+def add_note(user, title='Groceries'):
+    db.session.add(Note(user_id=user.id, title=title, text_content='Milk'))
+    db.session.commit()
+
+
+def test_unchanged_list_is_answered_with_304(client, user):
+    add_note(user)
+    first = client.get('/api/notes')
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert first.headers['Last-Modified']
+
+    again = client.get('/api/notes', headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.get_data() == b''
+
+
+def test_a_write_changes_the_etag(client, user):
+    add_note(user)
+    etag = client.get('/api/notes').headers['ETag']
+
+    add_note(user, 'Second')
+    response = client.get('/api/notes', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert len(response.get_json()['notes']) == 2
+
+
+def test_an_edit_in_the_same_second_changes_the_etag(client, user):
+    add_note(user)
+    etag = client.get('/api/notes').headers['ETag']
+
+    note = Note.query.filter_by(user_id=user.id).one()
+    note.title = 'Edited'
+    db.session.commit()
+    assert client.get('/api/notes', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_weak_etag_from_a_compressed_response_still_revalidates(client, user):
+    for i in range(30):
+        add_note(user, f'Note {i} ' + 'x' * 40)
+    first = client.get('/api/notes', headers={'Accept-Encoding': 'gzip'})
+    assert first.headers['Content-Encoding'] == 'gzip'
+    etag = first.headers['ETag']
+    assert etag.startswith('W/')
+
+    again = client.get('/api/notes', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert again.status_code == 304
+
+
+def test_etags_are_per_page(client, user):
+    add_note(user)
+    etag = client.get('/api/notes').headers['ETag']
+    assert client.get('/api/notes?limit=1', headers={'If-None-Match': etag}).status_code == 200
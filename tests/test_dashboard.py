@@ -0,0 +1,26 @@
+from website import db
+from website.dashboard import _cache_key, get_dashboard, invalidate_dashboard
+from website.models import Note
+
+
+def test_adding_a_note_invalidates_the_cached_dashboard(app, client, user):
+    cache = app.extensions['dashboard_cache']
+    assert client.get('/').status_code == 200
+    assert cache.get(_cache_key(user.id))['note_count'] == 0
+
+    response = client.post('/notes', data={'title': 'Groceries', 'text_content': 'Milk'})
+    assert response.status_code == 302
+    assert cache.get(_cache_key(user.id)) is None
+    assert get_dashboard(user.id)['note_count'] == 1
+
+
+def test_deleting_a_note_invalidates_the_cached_dashboard(app, client, user):
+    note = Note(user_id=user.id, title='Old', text_content='text')
+    db.session.add(note)
+    db.session.commit()
+    # Added outside a view, so its invalidation is done here
+    invalidate_dashboard(user.id)
+    assert get_dashboard(user.id)['note_count'] == 1
+
+    assert client.post(f'/notes/delete/{note.id}').status_code == 302
+    assert app.extensions['dashboard_cache'].get(_cache_key(user.id)) is None
@@ -0,0 +1,37 @@
+from website import db
+from website.models import FieldHistory, Note
+
+
+def written_history(app):
+    app.extensions['history_writer'].flush()
+    return [(row.field, row.old_value, row.new_value)
+            for row in FieldHistory.query.order_by(FieldHistory.id)]
+
+
+def test_note_creation_edit_and_deletion_are_recorded(app, user):
+    note = Note(user_id=user.id, title='Groceries', text_content='Milk')
+    db.session.add(note)
+    db.session.commit()
+    # Loaded as a view would, so the old value is known
+    note = db.session.get(Note, note.id)
+    note.title = 'Shopping'
+    db.session.commit()
+    db.session.delete(note)
+    db.session.commit()
+
+    assert written_history(app) == [
+        ('title', None, 'Groceries'),
+        ('text_content', None, 'Milk'),
+        ('is_active', None, 'True'),
+        ('title', 'Groceries', 'Shopping'),
+        ('title', 'Shopping', None),
+        ('text_content', 'Milk', None),
+        ('is_active', 'True', None),
+    ]
+
+
+def test_rolled_back_changes_are_not_recorded(app, user):
+    db.session.add(Note(user_id=user.id, title='Draft', text_content='text'))
+    db.session.flush()
+    db.session.rollback()
+    assert written_history(app) == []
@@ -0,0 +1,51 @@
+from datetime import date, datetime, timedelta
+from website import db
+from website.models import Notification
+from website.notifications import MemoryBackend, NotificationScheduler
+
+
+class FailingBackend(MemoryBackend):
+    def send(self, notifications):
+        raise RuntimeError('mail server down')
+
+
+def add_notification(user, **values):
+    notification = Notification(user_id=user.id, kind='todo_due', entity_id=1, due_date=date(2026, 1, 2),
+                                title='Pay rent', **values)
+    db.session.add(notification)
+    db.session.commit()
+    return notification
+
+
+def test_delivery_is_recorded_after_the_backend_sends(app, user):
+    notification = add_notification(user)
+    backend = MemoryBackend()
+    assert NotificationScheduler(backend).deliver() == 1
+    assert [sent['id'] for sent in backend.sent] == [notification.id]
+    db.session.refresh(notification)
+    assert notification.delivered_at is not None
+
+
+def test_failed_sends_release_the_claim(app, user):
+    notification = add_notification(user)
+    assert NotificationScheduler(FailingBackend()).deliver() == 0
+    db.session.refresh(notification)
+    assert notification.delivered_at is None
+    assert notification.claimed_at is None
+    assert notification.attempts == 1
+
+
+def test_claims_of_a_crashed_process_are_offered_again(app, user):
+    # Claimed by a process that died before sending
+    stale = add_notification(user, claimed_at=datetime.utcnow() - timedelta(minutes=10))
+    backend = MemoryBackend()
+    scheduler = NotificationScheduler(backend, claim_timeout=300)
+    assert scheduler.deliver() == 1
+    assert [sent['id'] for sent in backend.sent] == [stale.id]
+
+
+def test_fresh_claims_are_left_to_their_process(app, user):
+    add_notification(user, claimed_at=datetime.utcnow())
+    backend = MemoryBackend()
+    assert NotificationScheduler(backend, claim_timeout=300).deliver() == 0
+    assert backend.sent == []
@@ -0,0 +1,88 @@
+from datetime import date, datetime
+from decimal import Decimal
+import pytest
+from website import db
+from website.models import Note, PaymentReminder, ToDo
+from website.pagination import InvalidCursor, SortKey, decode_cursor, encode_cursor
+
+
+def walk(client, url, key):
+    """Follow next_cursor from the first page to the last, returning the ids of each page."""
+    pages = []
+    cursor = None
+    while True:
+        separator = '&' if '?' in url else '?'
+        response = client.get(url + (f'{separator}cursor={cursor}' if cursor else ''))
+        assert response.status_code == 200
+        body = response.get_json()
+        pages.append([row['id'] for row in body[key]])
+        cursor = body['next_cursor']
+        if not cursor:
+            return pages
+
+
+def assert_disjoint_and_complete(pages, ids):
+    seen = [row_id for page in pages for row_id in page]
+    assert len(seen) == len(set(seen))
+    assert set(seen) == set(ids)
+
+
+def add_notes(user, count):
+    ids = []
+    for i in range(count):
+        note = Note(user_id=user.id, title=f'Note {i}', text_content='text')
+        db.session.add(note)
+        db.session.commit()
+        ids.append(note.id)
+    return ids
+
+
+def test_cursor_round_trip():
+    keys = [SortKey(Note.last_modified_date, descending=True), SortKey(Note.id, descending=True)]
+    values = [datetime(2026, 1, 2, 3, 4, 5, 6000), 42]
+    assert decode_cursor(encode_cursor(values), keys) == values
+
+    keys = [SortKey(PaymentReminder.pmt_date), SortKey(PaymentReminder.pmt_amount), SortKey(PaymentReminder.id)]
+    values = [date(2026, 2, 28), Decimal('9.99'), 7]
+    assert decode_cursor(encode_cursor(values), keys) == values
+
+
+@pytest.mark.parametrize('cursor', ['not-base64!', encode_cursor([1]), encode_cursor(['x', 'y'])])
+def test_invalid_cursor(cursor):
+    keys = [SortKey(Note.last_modified_date, descending=True), SortKey(Note.id, descending=True)]
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, keys)
+
+
+@pytest.mark.parametrize('url', ['/api/notes?limit=2', '/api/v1/notes?limit=2&fields=id'])
+def test_notes_pages_are_disjoint_and_complete(client, user, url):
+    ids = add_notes(user, 5)
+    key = 'notes'
+    assert_disjoint_and_complete(walk(client, url, key), ids)
+
+
+def test_notes_pages_with_equal_timestamps(client, user):
+    ids = add_notes(user, 5)
+    # Whole-second values tie on the sort column, so the id decides the boundary
+    db.session.execute(Note.__table__.update().values(last_modified_date=datetime(2026, 1, 1, 12)))
+    db.session.commit()
+    assert_disjoint_and_complete(walk(client, '/api/notes?limit=2', 'notes'), ids)
+
+
+def test_payments_pages_are_disjoint_and_complete(client, user):
+    payments = [PaymentReminder(user_id=user.id, name=f'Bill {i}', pmt_date=date(2026, 1, 1 + i % 2),
+                                pmt_amount=Decimal('10.00')) for i in range(5)]
+    db.session.add_all(payments)
+    db.session.commit()
+    pages = walk(client, '/api/payments?limit=2', 'payments')
+    assert_disjoint_and_complete(pages, [payment.id for payment in payments])
+
+
+@pytest.mark.parametrize('sort', ['due_date', 'position'])
+def test_todo_pages_are_disjoint_and_complete(client, user, sort):
+    todos = [ToDo(user_id=user.id, name=f'Todo {i}', position=i,
+                  due_date=date(2026, 3, 1) if i % 2 else None) for i in range(5)]
+    db.session.add_all(todos)
+    db.session.commit()
+    pages = walk(client, f'/api/todos?limit=2&sort={sort}', 'todos')
+    assert_disjoint_and_complete(pages, [todo.id for todo in todos])
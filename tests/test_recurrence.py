@@ -0,0 +1,43 @@
+from datetime import date
+import pytest
+from website.recurrence import nth_occurrence, occurrence_dates
+
+
+@pytest.mark.parametrize('n, expected', [
+    (0, date(2026, 1, 31)),
+    (1, date(2026, 2, 28)),
+    (2, date(2026, 3, 31)),
+    (3, date(2026, 4, 30)),
+    (13, date(2027, 2, 28)),
+])
+def test_monthly_dates_clamp_to_the_end_of_shorter_months(n, expected):
+    assert nth_occurrence(date(2026, 1, 31), 'month', 1, n) == expected
+
+
+def test_yearly_dates_from_a_leap_day():
+    anchor = date(2028, 2, 29)
+    assert [nth_occurrence(anchor, 'year', 1, n) for n in range(5)] == [
+        date(2028, 2, 29), date(2029, 2, 28), date(2030, 2, 28), date(2031, 2, 28), date(2032, 2, 29)]
+
+
+def test_daily_and_weekly_dates():
+    anchor = date(2026, 1, 1)
+    assert nth_occurrence(anchor, 'day', 3, 2) == date(2026, 1, 7)
+    assert nth_occurrence(anchor, 'week', 2, 3) == date(2026, 2, 12)
+
+
+def test_occurrences_in_a_range_skip_ahead_from_the_anchor():
+    dates = list(occurrence_dates(date(2020, 1, 31), 'month', 1, date(2026, 1, 15), date(2026, 4, 30)))
+    assert dates == [date(2026, 1, 31), date(2026, 2, 28), date(2026, 3, 31), date(2026, 4, 30)]
+
+
+def test_occurrences_with_an_interval_and_an_end_date():
+    dates = list(occurrence_dates(date(2026, 1, 31), 'month', 2, date(2026, 1, 1), date(2026, 12, 31),
+                                  until=date(2026, 8, 1)))
+    assert dates == [date(2026, 1, 31), date(2026, 3, 31), date(2026, 5, 31), date(2026, 7, 31)]
+
+
+def test_one_off_reminders_fall_in_the_range_or_not_at_all():
+    anchor = date(2026, 5, 10)
+    assert list(occurrence_dates(anchor, None, None, date(2026, 5, 1), date(2026, 5, 31))) == [anchor]
+    assert list(occurrence_dates(anchor, None, None, date(2026, 6, 1), date(2026, 6, 30))) == []
@@ -0,0 +1,42 @@
+import pytest
+from website import db
+from website.models import ToDo, ToDoTask
+
+
+@pytest.fixture
+def board(user):
+    todos = [ToDo(user_id=user.id, name=f'Todo {i}', position=i) for i in range(3)]
+    db.session.add_all(todos)
+    db.session.commit()
+    tasks = [ToDoTask(to_do_id=todos[0].id, text_content=f'Task {i}', position=i) for i in range(2)]
+    db.session.add_all(tasks)
+    db.session.commit()
+    return todos, tasks
+
+
+def test_reorder_saves_positions(client, board):
+    todos, tasks = board
+    response = client.post('/api/reorder', json={
+        'todos': [{'id': str(todo.id)} for todo in reversed(todos)],
+        'tasks': {str(todos[0].id): [{'id': str(tasks[1].id), 'position': 0},
+                                     {'id': str(tasks[0].id), 'position': 1}]},
+    })
+    assert response.status_code == 200
+    db.session.expire_all()
+    assert [db.session.get(ToDo, todo.id).position for todo in todos] == [2, 1, 0]
+    assert [db.session.get(ToDoTask, task.id).position for task in tasks] == [1, 0]
+
+
+@pytest.mark.parametrize('payload', [
+    {'todos': [{'id': 'abc'}]},
+    {'todos': [{'id': 1.5}]},
+    {'todos': 'abc'},
+    {'todos': [], 'tasks': {'abc': [{'id': 1, 'position': 0}]}},
+    {'todos': [], 'tasks': {'1': [{'id': 1, 'position': 'first'}]}},
+    {'todos': [], 'tasks': {'1': 'abc'}},
+    ['todos'],
+])
+def test_reorder_rejects_malformed_payloads(client, board, payload):
+    response = client.post('/api/reorder', json=payload)
+    assert response.status_code == 400
+    assert response.get_json() == {'success': False, 'error': 'Invalid data'}
@@ -0,0 +1,71 @@
+import pytest
+from website import db
+from website.models import ToDo, ToDoTask
+
+
+@pytest.fixture
+def todo(user):
+    todo = ToDo(user_id=user.id, name='Move house')
+    db.session.add(todo)
+    db.session.commit()
+    return todo
+
+
+def counters(todo_id):
+    db.session.expire_all()
+    todo = db.session.get(ToDo, todo_id)
+    return todo.total_tasks, todo.completed_tasks, todo.status, todo.completed_date is not None
+
+
+def add_tasks(todo, *statuses):
+    tasks = [ToDoTask(to_do_id=todo.id, text_content=f'Task {i}', status=status)
+             for i, status in enumerate(statuses)]
+    db.session.add_all(tasks)
+    db.session.commit()
+    return tasks
+
+
+def test_counters_follow_inserts(todo):
+    assert counters(todo.id) == (0, 0, 0, False)
+    add_tasks(todo, 0, 1)
+    assert counters(todo.id) == (2, 1, 1, False)
+
+
+def test_completing_every_task_completes_the_todo(todo):
+    tasks = add_tasks(todo, 0, 1)
+    tasks[0].status = 1
+    db.session.commit()
+    assert counters(todo.id) == (2, 2, 2, True)
+
+    tasks[1].status = 0
+    db.session.commit()
+    assert counters(todo.id) == (2, 1, 1, False)
+
+
+def test_counters_follow_deletes(todo):
+    tasks = add_tasks(todo, 0, 1)
+    db.session.delete(tasks[0])
+    db.session.commit()
+    assert counters(todo.id) == (1, 1, 2, True)
+
+    db.session.delete(tasks[1])
+    db.session.commit()
+    assert counters(todo.id) == (0, 0, 0, False)
+
+
+def test_moving_a_task_updates_both_todos(user, todo):
+    other = ToDo(user_id=user.id, name='Pack')
+    db.session.add(other)
+    db.session.commit()
+    task, = add_tasks(todo, 1)
+
+    task.to_do_id = other.id
+    db.session.commit()
+    assert counters(todo.id) == (0, 0, 0, False)
+    assert counters(other.id) == (1, 1, 2, True)
+
+
+def test_loaded_todo_is_synced_without_a_reload(todo):
+    add_tasks(todo, 1)
+    # The listener's UPDATE bypasses the ORM; the loaded todo gets the new values directly
+    assert (todo.total_tasks, todo.completed_tasks, todo.status) == (1, 1, 2)
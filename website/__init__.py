@@ -1,3 +1,6 @@
+import time
+_import_started = time.perf_counter()
+
 from flask import Flask
 from dotenv import load_dotenv
 import os
@@ -5,48 +8,206 @@ from urllib.parse import quote_plus
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_login import LoginManager, current_user
+from .cache import make_cache
+from .metrics import init_metrics, register_collector
+from .utils import pluralize_filter
+from .compression import DEFAULT_MIMETYPES, init_compression
+from .templating import AUTO_CACHE_DIR, init_templates
+from .serialization import make_json_provider
+from .routing import RoutingSession, init_routing, pool_options, replica_binds
+from .startup import StartupTimer, check_schema, init_db, startup_report
+
+IMPORT_SECONDS = time.perf_counter() - _import_started
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 
-def create_app():
+def create_app(config=None):
+    timer = StartupTimer()
+    timer.record('imports', IMPORT_SECONDS)
+    config_started = time.perf_counter()
+
     load_dotenv()
 
     app = Flask(__name__)
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY')
 
-    # Load DB credentials from .env
-    db_username = os.getenv('DB_USERNAME')
-    db_password = quote_plus(os.getenv('DB_PASSWORD'))
-    db_host = os.getenv('DB_HOST')
-    db_port = os.getenv('DB_PORT')
-    db_name = os.getenv('DB_NAME')
-    database_uri = f"postgresql://{db_username}:{db_password}@{db_host}:{db_port}/{db_name}"
+    # An explicit URI or DATABASE_URL overrides the DB_* credentials (e.g. a local SQLite file for benchmarks)
+    database_uri = (config or {}).get('SQLALCHEMY_DATABASE_URI') or os.getenv('DATABASE_URL')
+    if not database_uri:
+        # Load DB credentials from .env
+        db_username = os.getenv('DB_USERNAME')
+        db_password = quote_plus(os.getenv('DB_PASSWORD'))
+        db_host = os.getenv('DB_HOST')
+        db_port = os.getenv('DB_PORT')
+        db_name = os.getenv('DB_NAME')
+        database_uri = f"postgresql://{db_username}:{db_password}@{db_host}:{db_port}/{db_name}"
 
     app.config['SQLALCHEMY_DATABASE_URI'] = database_uri
-    db.init_app(app)
-    migrate.init_app(app, db)
+    # Pool size/overflow/recycle/timeout/pre-ping per bind: DB_* for the primary, REPLICA_* for replicas
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = pool_options('DB')
+
+    # Optional read replicas (comma-separated URIs) used by @read_replica views
+    replica_uris = [uri.strip() for uri in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if uri.strip()]
+    app.config['SQLALCHEMY_BINDS'] = replica_binds(replica_uris, pool_options('REPLICA'))
+    app.config['REPLICA_READ_YOUR_WRITES_SECONDS'] = float(os.getenv('REPLICA_READ_YOUR_WRITES_SECONDS', 5))
+
+    # Per-user dashboard cache ("memory", "null" or an import path to a BaseCache subclass). Writes
+    # only invalidate the memory cache of the worker that handled them, so with several workers the
+    # TTL bounds how stale another worker's dashboard can be; use a shared backend to avoid that
+    app.config['DASHBOARD_CACHE_BACKEND'] = os.getenv('DASHBOARD_CACHE_BACKEND', 'memory')
+    app.config['DASHBOARD_CACHE_SIZE'] = int(os.getenv('DASHBOARD_CACHE_SIZE', 1024))
+    app.config['DASHBOARD_CACHE_TTL'] = int(os.getenv('DASHBOARD_CACHE_TTL', 5))
+
+    # Per-process cache of logged-in user snapshots; the TTL bounds how long a change
+    # made by another worker (e.g. deactivation) takes to apply here
+    app.config['IDENTITY_CACHE_BACKEND'] = os.getenv('IDENTITY_CACHE_BACKEND', 'memory')
+    app.config['IDENTITY_CACHE_SIZE'] = int(os.getenv('IDENTITY_CACHE_SIZE', 4096))
+    app.config['IDENTITY_CACHE_TTL'] = int(os.getenv('IDENTITY_CACHE_TTL', 30))
+
+    # Per-request SQL counting, Server-Timing header and Prometheus /metrics (off by default;
+    # only served when METRICS_TOKEN is set)
+    app.config['METRICS_ENABLED'] = os.getenv('METRICS_ENABLED', 'false').lower() == 'true'
+    app.config['METRICS_TOKEN'] = os.getenv('METRICS_TOKEN')
+    app.config['SQL_QUERY_BUDGET'] = int(os.getenv('SQL_QUERY_BUDGET', 0))
+    app.config['SQL_QUERY_BUDGET_MODE'] = os.getenv('SQL_QUERY_BUDGET_MODE', 'log')
+
+    # last_login updates are buffered and written in one UPDATE every this many seconds
+    app.config['LAST_LOGIN_FLUSH_INTERVAL'] = float(os.getenv('LAST_LOGIN_FLUSH_INTERVAL', 10))
+
+    # Field history: captured edits are queued and bulk-inserted every HISTORY_FLUSH_INTERVAL seconds
+    app.config['HISTORY_ENABLED'] = os.getenv('HISTORY_ENABLED', 'true').lower() == 'true'
+    app.config['HISTORY_FLUSH_INTERVAL'] = float(os.getenv('HISTORY_FLUSH_INTERVAL', 2))
+    app.config['HISTORY_QUEUE_SIZE'] = int(os.getenv('HISTORY_QUEUE_SIZE', 10000))
+    app.config['HISTORY_BATCH_SIZE'] = int(os.getenv('HISTORY_BATCH_SIZE', 500))
+
+    # Recurring payments: occurrences are materialized HORIZON_DAYS ahead by a job that runs every
+    # INTERVAL seconds and kept for RETENTION_DAYS. Run by `flask payments run` (or `flask payments
+    # materialize` from cron); PAYMENT_OCCURRENCE_JOB also runs it in each web worker
+    app.config['PAYMENT_OCCURRENCE_JOB'] = os.getenv('PAYMENT_OCCURRENCE_JOB', 'false').lower() == 'true'
+    app.config['PAYMENT_OCCURRENCE_INTERVAL'] = float(os.getenv('PAYMENT_OCCURRENCE_INTERVAL', 3600))
+    app.config['PAYMENT_OCCURRENCE_HORIZON_DAYS'] = int(os.getenv('PAYMENT_OCCURRENCE_HORIZON_DAYS', 120))
+    app.config['PAYMENT_OCCURRENCE_RETENTION_DAYS'] = int(os.getenv('PAYMENT_OCCURRENCE_RETENTION_DAYS', 400))
+    app.config['UPCOMING_PAYMENTS_DAYS'] = int(os.getenv('UPCOMING_PAYMENTS_DAYS', 30))
+
+    # Due-date notifications: a sweep every SWEEP_INTERVAL seconds fires todos and payments LEAD_DAYS
+    # before they are due (at NOTIFY_HOUR UTC) into the outbox, which the NOTIFY_BACKEND delivers.
+    # Run by `flask notifications run`; NOTIFY_ENABLED also runs it in each web worker
+    app.config['NOTIFY_ENABLED'] = os.getenv('NOTIFY_ENABLED', 'false').lower() == 'true'
+    app.config['NOTIFY_SWEEP_INTERVAL'] = float(os.getenv('NOTIFY_SWEEP_INTERVAL', 60))
+    app.config['NOTIFY_LEAD_DAYS'] = int(os.getenv('NOTIFY_LEAD_DAYS', 1))
+    app.config['NOTIFY_HOUR'] = int(os.getenv('NOTIFY_HOUR', 9))
+    app.config['NOTIFY_BACKEND'] = os.getenv('NOTIFY_BACKEND', 'log')
+    app.config['NOTIFY_HEAP_SIZE'] = int(os.getenv('NOTIFY_HEAP_SIZE', 10000))
+    app.config['NOTIFY_BATCH_SIZE'] = int(os.getenv('NOTIFY_BATCH_SIZE', 1000))
+    app.config['NOTIFY_RESCAN_INTERVAL'] = float(os.getenv('NOTIFY_RESCAN_INTERVAL', 600))
+    app.config['NOTIFY_MAX_ATTEMPTS'] = int(os.getenv('NOTIFY_MAX_ATTEMPTS', 5))
+    # Seconds after which a row claimed for sending by a process that died is offered again
+    app.config['NOTIFY_CLAIM_TIMEOUT'] = int(os.getenv('NOTIFY_CLAIM_TIMEOUT', 300))
+    app.config['NOTIFY_RETENTION_DAYS'] = int(os.getenv('NOTIFY_RETENTION_DAYS', 30))
+
+    # Password hashing: Werkzeug method string, worker threads (the CPU cap), how many more may
+    # wait for a worker, and how long a login waits for a slot before it is turned away
+    app.config['PASSWORD_HASH_METHOD'] = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    app.config['PASSWORD_HASH_WORKERS'] = int(os.getenv('PASSWORD_HASH_WORKERS', 2))
+    app.config['PASSWORD_HASH_QUEUE_SIZE'] = int(os.getenv('PASSWORD_HASH_QUEUE_SIZE', 32))
+    app.config['PASSWORD_HASH_TIMEOUT'] = float(os.getenv('PASSWORD_HASH_TIMEOUT', 5))
+
+    # Conditional GET: list pages and APIs answer If-None-Match/If-Modified-Since with 304
+    app.config['CONDITIONAL_GET'] = os.getenv('CONDITIONAL_GET', 'true').lower() == 'true'
+
+    # Static assets: `flask assets build` writes hashed, precompressed bundles to static/dist, which
+    # are served with this max-age (and immutable); ASSETS_MINIFY is the build's default
+    app.config['ASSETS_MINIFY'] = os.getenv('ASSETS_MINIFY', 'true').lower() == 'true'
+    app.config['ASSETS_MAX_AGE'] = int(os.getenv('ASSETS_MAX_AGE', 365 * 24 * 3600))
+
+    # Response compression: brotli (if installed) or gzip as Accept-Encoding allows, for these
+    # content types, when the body is streamed or at least COMPRESSION_MIN_SIZE bytes
+    app.config['COMPRESSION_ENABLED'] = os.getenv('COMPRESSION_ENABLED', 'true').lower() == 'true'
+    app.config['COMPRESSION_LEVEL'] = int(os.getenv('COMPRESSION_LEVEL', 6))
+    app.config['COMPRESSION_BROTLI_QUALITY'] = int(os.getenv('COMPRESSION_BROTLI_QUALITY', 4))
+    app.config['COMPRESSION_MIN_SIZE'] = int(os.getenv('COMPRESSION_MIN_SIZE', 500))
+    app.config['COMPRESSION_MIMETYPES'] = [mimetype.strip() for mimetype in os.getenv(
+        'COMPRESSION_MIMETYPES', ','.join(DEFAULT_MIMETYPES)).split(',') if mimetype.strip()]
+
+    # Jinja: compiled templates are cached on disk ("auto": Jinja's per-user temp directory, shared by
+    # the workers of a host; invalidated when a template changes; empty disables it) and all
+    # templates are loaded at startup
+    app.config['TEMPLATE_CACHE_DIR'] = os.getenv('TEMPLATE_CACHE_DIR', AUTO_CACHE_DIR)
+    app.config['TEMPLATE_WARMUP'] = os.getenv('TEMPLATE_WARMUP', 'true').lower() == 'true'
+
+    # JSON encoder for jsonify and the /api/v1 endpoints: "auto" (orjson if installed), "json", "orjson"
+    # or the import path of a flask.json.provider.JSONProvider subclass
+    app.config['JSON_PROVIDER'] = os.getenv('JSON_PROVIDER', 'auto')
+
+    # Startup schema handling: "warn"/"strict" compare the DB with the Alembic head (no DDL),
+    # "create" runs create_all() for throwaway databases, "off" skips it
+    app.config['SCHEMA_CHECK'] = os.getenv('SCHEMA_CHECK', 'warn')
+
+    # Explicit overrides (tests, benchmarks) win over the environment
+    if config:
+        app.config.update(config)
+    timer.record('config', time.perf_counter() - config_started)
+
+    with timer.phase('extensions'):
+        db.init_app(app)
+        migrate.init_app(app, db)
+        app.extensions['dashboard_cache'] = make_cache(app.config, 'DASHBOARD_CACHE')
+        app.extensions['identity_cache'] = make_cache(app.config, 'IDENTITY_CACHE')
+        init_metrics(app)
+        init_routing(app)
+        from .conditional import init_conditional
+        init_conditional(app)
+        from .assets import init_assets
+        init_assets(app)
+        init_compression(app)
+        app.json = make_json_provider(app)
+        app.jinja_env.filters['pluralize'] = pluralize_filter
+
+    with timer.phase('blueprints'):
+        # Imported here so importing the package stays cheap (views pull in the models and queries)
+        from .views import views
+        from .auth import auth
+        from .api import api_v1
+
+        app.register_blueprint(views, url_prefix='/')
+        app.register_blueprint(auth, url_prefix='/')
+        app.register_blueprint(api_v1, url_prefix='/api/v1')
+
+    with timer.phase('templates'):
+        init_templates(app)
 
-    from .views import views
-    from .auth import auth
+    with timer.phase('login'):
+        login_manager = LoginManager()
+        login_manager.login_view = 'auth.login'
+        login_manager.login_message = 'Please log in to access this page.'
+        login_manager.init_app(app)
 
-    app.register_blueprint(views, url_prefix='/')
-    app.register_blueprint(auth, url_prefix='/')
+        from .passwords import init_passwords
+        init_passwords(app)
 
-    from . import models as db_models
-    create_db(app)
+        # Cached, read-only user snapshots instead of a User query per request
+        from .identity import load_user
+        login_manager.user_loader(load_user)
 
-    login_manager = LoginManager()
-    login_manager.login_view = 'auth.login'
-    login_manager.login_message = 'Please log in to access this page.'
-    login_manager.init_app(app)
+    with timer.phase('background'):
+        # Write-behind buffers and periodic jobs run by background threads
+        from .last_login import init_last_login
+        from .history import init_history
+        from .recurrence import init_recurrence
+        from .notifications import init_notifications
+        init_last_login(app)
+        init_history(app)
+        init_recurrence(app)
+        init_notifications(app)
 
-    @login_manager.user_loader
-    def load_user(user_id):
-        return db_models.User.query.get(int(user_id))
+    with timer.phase('schema'):
+        check_schema(app, db, app.config['SCHEMA_CHECK'])
 
-    return app
+    app.extensions['startup_timer'] = timer
+    app.cli.add_command(init_db)
+    app.cli.add_command(startup_report)
+    register_collector(app, timer.metric_lines)
+    app.logger.info(timer.report())
 
-def create_db(app):
-    with app.app_context():
-        db.create_all()
\ No newline at end of file
+    return app
\ No newline at end of file
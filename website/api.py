@@ -0,0 +1,259 @@
+from flask import Blueprint, jsonify, request
+from flask_login import current_user
+from sqlalchemy import select
+from . import db
+from .conditional import conditional_list
+from .models import Note, PaymentReminder, ToDo, ToDoTask
+from .pagination import InvalidCursor, SortKey, page_args, paginate
+from .routing import read_replica
+from .todos import TODO_SORTS
+from .views import NOTE_SORT, PAYMENT_SORT
+
+api_v1 = Blueprint('api_v1', __name__)
+
+
+class InvalidFields(ValueError):
+    """Raised when ?fields= names a field the resource does not have."""
+
+
+class Resource:
+    """
+    One collection of the API: its fields (name -> column), owner filter and orderings.
+
+    Only the columns of the requested fields (plus the sort columns the
+    cursor needs) are selected, so a client asking for a few fields does
+    not pay for loading the others, e.g. a note's full text.
+
+    Args:
+        name (str): Plural name, used as the JSON key of lists
+        singular (str): JSON key of a single item
+        fields (dict): Field name -> column, in output order
+        default_fields (tuple): Fields returned without ?fields=
+        sorts (dict): ?sort= value -> SortKey list; the first one is the default
+        owned (callable): user_id -> WHERE clause limiting rows to the user's
+        joins (tuple): Tables the owner filter needs
+    """
+
+    def __init__(self, name, singular, fields, default_fields, sorts, owned, joins=()):
+        self.name = name
+        self.singular = singular
+        self.fields = fields
+        self.default_fields = default_fields
+        self.sorts = sorts
+        self.owned = owned
+        self.joins = joins
+        self.primary_key = fields['id']
+
+    def requested_fields(self):
+        """Parse ?fields=a,b,c; raises InvalidFields for unknown names."""
+        value = request.args.get('fields')
+        if not value:
+            return list(self.default_fields)
+        if value == '*':
+            return list(self.fields)
+        names = list(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+        unknown = [name for name in names if name not in self.fields]
+        if unknown or not names:
+            raise InvalidFields(f"Unknown field(s): {', '.join(unknown) or '(none)'}. "
+                                f"Available: {', '.join(self.fields)}")
+        return names
+
+    def select(self, names, extra=()):
+        columns = list(dict.fromkeys([self.fields[name] for name in names] + list(extra)))
+        stmt = select(*columns)
+        for target in self.joins:
+            stmt = stmt.join(target)
+        return stmt.where(self.owned(current_user.id))
+
+    def serialize(self, row, names):
+        mapping = row._mapping
+        return {name: mapping[self.fields[name]] for name in names}
+
+
+NOTES = Resource(
+    'notes', 'note',
+    fields={
+        'id': Note.id,
+        'title': Note.title,
+        'text_content': Note.text_content,
+        'is_active': Note.is_active,
+        'created_date': Note.created_date,
+        'last_modified_date': Note.last_modified_date,
+        'completed_date': Note.completed_date,
+    },
+    default_fields=('id', 'title', 'text_content', 'last_modified_date'),
+    sorts={'last_modified_date': NOTE_SORT},
+    owned=lambda user_id: (Note.user_id == user_id) & (Note.is_active == True),
+)
+
+TODOS = Resource(
+    'todos', 'todo',
+    fields={
+        'id': ToDo.id,
+        'name': ToDo.name,
+        'status': ToDo.status,
+        'priority': ToDo.priority,
+        'due_date': ToDo.due_date,
+        'position': ToDo.position,
+        'total_tasks': ToDo.total_tasks,
+        'completed_tasks': ToDo.completed_tasks,
+        'completed_date': ToDo.completed_date,
+        'created_date': ToDo.created_date,
+        'updated_date': ToDo.updated_date,
+    },
+    default_fields=('id', 'name', 'status', 'priority', 'due_date', 'total_tasks', 'completed_tasks'),
+    sorts={'position': TODO_SORTS['position'], 'due_date': TODO_SORTS['due_date']},
+    owned=lambda user_id: (ToDo.user_id == user_id) & (ToDo.is_active == True),
+)
+
+TASKS = Resource(
+    'tasks', 'task',
+    fields={
+        'id': ToDoTask.id,
+        'todo_id': ToDoTask.to_do_id,
+        'text_content': ToDoTask.text_content,
+        'status': ToDoTask.status,
+        'position': ToDoTask.position,
+        'created_date': ToDoTask.created_date,
+        'updated_date': ToDoTask.updated_date,
+    },
+    default_fields=('id', 'todo_id', 'text_content', 'status', 'position'),
+    sorts={'position': [SortKey(ToDoTask.to_do_id), SortKey(ToDoTask.position, nullable=True), SortKey(ToDoTask.id)]},
+    owned=lambda user_id: ToDo.user_id == user_id,
+    joins=(ToDo,),
+)
+
+PAYMENTS = Resource(
+    'payments', 'payment',
+    fields={
+        'id': PaymentReminder.id,
+        'name': PaymentReminder.name,
+        'pmt_date': PaymentReminder.pmt_date,
+        'pmt_amount': PaymentReminder.pmt_amount,
+        'notes': PaymentReminder.notes,
+        'is_active': PaymentReminder.is_active,
+        'recurrence_unit': PaymentReminder.recurrence_unit,
+        'recurrence_interval': PaymentReminder.recurrence_interval,
+        'recurrence_end': PaymentReminder.recurrence_end,
+        'created_date': PaymentReminder.created_date,
+        'updated_date': PaymentReminder.updated_date,
+    },
+    default_fields=('id', 'name', 'pmt_date', 'pmt_amount', 'is_active', 'recurrence_unit', 'recurrence_interval'),
+    sorts={'pmt_date': PAYMENT_SORT},
+    owned=lambda user_id: PaymentReminder.user_id == user_id,
+)
+
+
+def _error(message, status):
+    return jsonify({'success': False, 'error': message}), status
+
+
+def list_resource(resource, *criteria):
+    """One keyset page of a resource with the requested fields (?fields=, ?sort=, ?cursor=, ?limit=)."""
+    try:
+        names = resource.requested_fields()
+    except InvalidFields as e:
+        return _error(str(e), 400)
+
+    sort = request.args.get('sort') or next(iter(resource.sorts))
+    if sort not in resource.sorts:
+        return _error(f"Invalid sort. Available: {', '.join(resource.sorts)}", 400)
+    keys = resource.sorts[sort]
+
+    cursor, limit = page_args()
+    stmt = resource.select(names, [key.column for key in keys]).where(*criteria)
+    try:
+        rows, next_cursor = paginate(db.session, stmt, keys, cursor, limit)
+    except InvalidCursor as e:
+        return _error(str(e), 400)
+
+    return jsonify({
+        'success': True,
+        resource.name: [resource.serialize(row, names) for row in rows],
+        'next_cursor': next_cursor,
+    })
+
+
+def get_resource(resource, item_id):
+    """One item of a resource with the requested fields, or 404 if the user has no such item."""
+    try:
+        names = resource.requested_fields()
+    except InvalidFields as e:
+        return _error(str(e), 400)
+
+    row = db.session.execute(resource.select(names).where(resource.primary_key == item_id)).first()
+    if row is None:
+        return _error(f'{resource.singular.capitalize()} not found', 404)
+    return jsonify({'success': True, resource.singular: resource.serialize(row, names)})
+
+
+@api_v1.before_request
+def require_login():
+    # Script clients get a JSON 401 instead of the login page redirect
+    if not current_user.is_authenticated:
+        return _error('Authentication required', 401)
+
+
+@api_v1.route('/notes')
+@read_replica
+@conditional_list('notes')
+def notes():
+    """The user's active notes, newest first."""
+    return list_resource(NOTES)
+
+
+@api_v1.route('/notes/<int:note_id>')
+@read_replica
+def note(note_id):
+    return get_resource(NOTES, note_id)
+
+
+@api_v1.route('/todos')
+@read_replica
+@conditional_list('todos')
+def todos():
+    """The user's active todos, in board order (?sort=position) or by due date (?sort=due_date)."""
+    return list_resource(TODOS)
+
+
+@api_v1.route('/todos/<int:todo_id>')
+@read_replica
+def todo(todo_id):
+    return get_resource(TODOS, todo_id)
+
+
+@api_v1.route('/todos/<int:todo_id>/tasks')
+@read_replica
+@conditional_list('todos')
+def todo_tasks(todo_id):
+    """The tasks of one todo, in their order."""
+    return list_resource(TASKS, ToDoTask.to_do_id == todo_id)
+
+
+@api_v1.route('/tasks')
+@read_replica
+@conditional_list('todos')
+def tasks():
+    """All the user's tasks, grouped by todo (?todo_id= limits them to one)."""
+    todo_id = request.args.get('todo_id', type=int)
+    return list_resource(TASKS, *([ToDoTask.to_do_id == todo_id] if todo_id else []))
+
+
+@api_v1.route('/tasks/<int:task_id>')
+@read_replica
+def task(task_id):
+    return get_resource(TASKS, task_id)
+
+
+@api_v1.route('/payments')
+@read_replica
+@conditional_list('payments')
+def payments():
+    """The user's payment reminders by due date."""
+    return list_resource(PAYMENTS)
+
+
+@api_v1.route('/payments/<int:payment_id>')
+@read_replica
+def payment(payment_id):
+    return get_resource(PAYMENTS, payment_id)
@@ -0,0 +1,258 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+import click
+from flask import current_app, request, send_from_directory, url_for
+from flask.cli import AppGroup
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip siblings are written
+    brotli = None
+
+# Build output below the static folder, and the manifest mapping logical names to hashed files
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+# Logical bundle names resolve through the manifest as "bundles/<name>"
+BUNDLE_PREFIX = 'bundles/'
+# Precompressed siblings are only written for text assets, and only when they are smaller
+COMPRESSIBLE = {'.css', '.js', '.svg', '.json', '.txt'}
+# Preferred first when the client accepts several
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _page(name, css=True, js=True):
+    """The shared stylesheet/script followed by the page's own file."""
+    return {
+        f'{name}.css': ['css/style.css'] + ([f'css/{name}.css'] if css else []),
+        f'{name}.js': ['js/main.js'] + ([f'js/{name}.js'] if js else []),
+    }
+
+
+# One CSS and one JS bundle per page; templates pick theirs with {% set asset_bundle = '...' %}
+BUNDLES = {
+    'base.css': ['css/style.css'],
+    'base.js': ['js/main.js'],
+    **_page('home'),
+    **_page('notes'),
+    **_page('payments'),
+    **_page('manage_todo'),
+    **_page('add_todo'),
+    **_page('edit_todo'),
+    **_page('login', js=False),
+    **_page('about', js=False),
+}
+
+
+# --- Minification (whitespace and comments only, so the output behaves exactly like the source) ---
+
+CSS_COMMENT = re.compile(r'/\*.*?\*/', re.S)
+CSS_SPACE = re.compile(r'\s+')
+CSS_PUNCTUATION = re.compile(r'\s*([{};,>])\s*')
+
+
+def minify_css(source):
+    source = CSS_COMMENT.sub('', source)
+    source = CSS_SPACE.sub(' ', source)
+    source = CSS_PUNCTUATION.sub(r'\1', source)
+    # Only after a colon: a space before one is significant in selectors ("a :hover")
+    source = re.sub(r':\s+', ':', source)
+    return source.replace(';}', '}').strip()
+
+
+def minify_js(source):
+    """
+    Strip indentation, blank lines and whole-line // comments from JavaScript.
+
+    Line breaks are kept, so automatic semicolon insertion is unaffected, and
+    lines inside template literals are copied unchanged.
+    """
+    lines = []
+    in_template = False
+    for line in source.splitlines():
+        if in_template:
+            lines.append(line)
+        else:
+            line = line.strip()
+            if not line or line.startswith('//'):
+                continue
+            lines.append(line)
+        in_template = _ends_in_template(line, in_template)
+    return '\n'.join(lines) + '\n'
+
+
+def _ends_in_template(line, in_template):
+    """Whether a template literal is still open at the end of line."""
+    quote = '`' if in_template else None
+    escaped = False
+    for i, char in enumerate(line):
+        if escaped:
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif quote:
+            if char == quote:
+                quote = None
+        elif char in '\'"`':
+            quote = char
+        elif char == '/' and line[i + 1:i + 2] == '/':
+            break
+    return quote == '`'
+
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+
+# --- Build ---
+
+def _fingerprint(name, content):
+    stem, ext = os.path.splitext(name)
+    return f'{stem}.{hashlib.sha256(content).hexdigest()[:12]}{ext}'
+
+
+def _write(dist, name, content):
+    """Write a hashed file and its precompressed siblings; returns its path below static/."""
+    path = os.path.join(dist, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(content)
+
+    if os.path.splitext(name)[1] in COMPRESSIBLE:
+        variants = {'.gz': gzip.compress(content, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variants['.br'] = brotli.compress(content, mode=brotli.MODE_TEXT)
+        for suffix, compressed in variants.items():
+            if len(compressed) < len(content):
+                with open(path + suffix, 'wb') as f:
+                    f.write(compressed)
+    return f'{DIST_DIR}/{name}'
+
+
+def build_assets(static_folder, minify=True, bundles=BUNDLES):
+    """
+    Fingerprint every static file and build the page bundles into static/dist.
+
+    Args:
+        static_folder (str): The app's static folder
+        minify (bool): Minify CSS and JS
+        bundles (dict): Bundle name -> source files below the static folder
+
+    Returns:
+        dict: The manifest (logical name -> hashed path below static/), also written to dist/
+    """
+    dist = os.path.join(static_folder, DIST_DIR)
+    if os.path.isdir(dist):
+        shutil.rmtree(dist)
+
+    manifest = {}
+    for dirpath, dirnames, filenames in os.walk(static_folder):
+        dirnames[:] = sorted(d for d in dirnames if os.path.join(dirpath, d) != dist)
+        for filename in sorted(filenames):
+            source = os.path.join(dirpath, filename)
+            name = os.path.relpath(source, static_folder).replace(os.sep, '/')
+            with open(source, 'rb') as f:
+                content = f.read()
+            manifest[name] = _write(dist, _fingerprint(name, content), content)
+
+    for bundle, sources in bundles.items():
+        ext = os.path.splitext(bundle)[1]
+        parts = []
+        for name in sources:
+            with open(os.path.join(static_folder, name), encoding='utf-8') as f:
+                text = f.read()
+            parts.append(MINIFIERS[ext](text) if minify and ext in MINIFIERS else text)
+        # A semicolon between scripts, in case one ends without one
+        content = (';\n' if ext == '.js' else '\n').join(parts).encode()
+        manifest[BUNDLE_PREFIX + bundle] = _write(dist, _fingerprint(bundle, content), content)
+
+    with open(os.path.join(dist, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def load_manifest(static_folder):
+    """Return the manifest of a previous build, or an empty one (assets are then served as is)."""
+    path = os.path.join(static_folder, DIST_DIR, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+# --- Serving ---
+
+def bundle_urls(name):
+    """
+    URLs of a bundle for templates: the built file, or its sources before a build.
+
+    Args:
+        name (str): Key of BUNDLES, e.g. "notes.css"
+
+    Returns:
+        list: URLs to include in order
+    """
+    manifest = current_app.extensions['asset_manifest']
+    if BUNDLE_PREFIX + name in manifest:
+        return [url_for('static', filename=BUNDLE_PREFIX + name)]
+    return [url_for('static', filename=source) for source in BUNDLES[name]]
+
+
+def _resolve_static(endpoint, values):
+    # url_for('static', filename=...) points at the hashed copy when there is one
+    if endpoint == 'static' and 'filename' in values:
+        hashed = current_app.extensions['asset_manifest'].get(values['filename'])
+        if hashed:
+            values['filename'] = hashed
+
+
+def send_static(filename):
+    """Static view: hashed files are immutable and served precompressed when the client accepts it."""
+    app = current_app
+    if not filename.startswith(f'{DIST_DIR}/'):
+        return app.send_static_file(filename)
+
+    max_age = app.config['ASSETS_MAX_AGE']
+    for encoding, suffix in ENCODINGS:
+        if encoding in request.accept_encodings and os.path.isfile(os.path.join(app.static_folder, filename + suffix)):
+            response = send_from_directory(app.static_folder, filename + suffix, max_age=max_age,
+                                           mimetype=mimetypes.guess_type(filename)[0])
+            response.content_encoding = encoding
+            break
+    else:
+        response = send_from_directory(app.static_folder, filename, max_age=max_age)
+
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+def init_assets(app):
+    """Serve built assets and resolve url_for('static', ...) through the manifest."""
+    app.extensions['asset_manifest'] = load_manifest(app.static_folder)
+    if not app.extensions['asset_manifest']:
+        app.logger.info('No asset manifest, serving unbundled static files (run `flask assets build`)')
+    app.url_defaults(_resolve_static)
+    app.view_functions['static'] = send_static
+    app.jinja_env.globals['bundle_urls'] = bundle_urls
+    app.cli.add_command(assets_cli)
+
+
+assets_cli = AppGroup('assets', help='Static asset pipeline.')
+
+
+@assets_cli.command('build')
+@click.option('--minify/--no-minify', default=None, help='Defaults to ASSETS_MINIFY.')
+def build_command(minify):
+    """Bundle, minify, fingerprint and precompress static files into static/dist."""
+    if minify is None:
+        minify = current_app.config['ASSETS_MINIFY']
+    manifest = build_assets(current_app.static_folder, minify)
+    current_app.extensions['asset_manifest'] = manifest
+    bundles = sum(1 for name in manifest if name.startswith(BUNDLE_PREFIX))
+    click.echo(f'Built {bundles} bundles and {len(manifest) - bundles} files'
+               f'{"" if brotli else " (install brotli for .br files)"}.')
@@ -3,7 +3,8 @@ from flask_login import login_user, login_required, logout_user, current_user
 from .utils import validate_email, validate_name, validate_password, generate_username_from_name
 from .models import User
 from . import db
-from werkzeug.security import generate_password_hash, check_password_hash
+from .passwords import PasswordHasherBusy, hash_password, verify_password
+from sqlalchemy import func
 
 auth = Blueprint('auth', __name__)
 
@@ -63,16 +64,17 @@ def login():
                 if not username:
                     username = f"{f_name.lower()}{l_name.lower()}"[:15]  # Fallback
 
-                # Hash password
-                pw_hash = generate_password_hash(password)
+                # Hash password (on the bounded hashing pool)
+                pw_hash = hash_password(password)
 
-                # Create new user with correct parameters
+                # Create new user with correct parameters (last_login goes into the same INSERT)
                 new_user = User(
                     email=email,
                     username=username,
                     password_hash=pw_hash,
                     f_name=f_name,
                     l_name=l_name,
+                    last_login=func.now(),
                 )
 
                 # Add to database
@@ -82,10 +84,14 @@ def login():
 
                 # Login user with remember=True
                 login_user(new_user, remember=True)
-                new_user.update_last_login()
 
                 return redirect(url_for('views.home'))
 
+            except PasswordHasherBusy:
+                db.session.rollback()
+                flash("The server is busy. Please try again in a moment.", 'error')
+                return render_template('login.html'), 503
+
             except Exception as e:
                 db.session.rollback()
                 print(f"Error creating user: {e}")
@@ -109,9 +115,13 @@ def login():
             # Check credentials - look for user by email OR username
             user = User.query.filter((User.email == email) | (User.username == email)).first()
 
-            if not user:
-                errors.append("Invalid email or password")
-            elif not check_password_hash(user.password_hash, password):
+            try:
+                password_ok = user is not None and verify_password(user, password)
+            except PasswordHasherBusy:
+                flash("The server is busy. Please try again in a moment.", 'error')
+                return render_template('login.html'), 503
+
+            if not password_ok:
                 errors.append("Invalid email or password")
             elif not user.is_active:
                 errors.append("Your account has been deactivated. Please contact support.")
@@ -122,6 +132,10 @@ def login():
                 flash(error, 'error')
         else:
             try:
+                # Save the upgraded hash if verify_password rehashed it
+                if db.session.is_modified(user):
+                    db.session.commit()
+
                 # All validation passed - proceed with login
                 login_user(user, remember=bool(remember))  # Use remember checkbox or default True
                 user.update_last_login()
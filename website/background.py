@@ -0,0 +1,101 @@
+import atexit
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from sqlalchemy import DateTime, cast, func, select
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicFlusher:
+    """
+    Call a flush function every `interval` seconds on a daemon thread.
+
+    The thread starts lazily (and restarts after a fork, e.g. in preforking
+    servers), and stop() - also registered with atexit - runs one last flush
+    so buffered work isn't lost on shutdown (unless flush_on_stop is False,
+    for periodic jobs with nothing buffered). Each flush runs in an app
+    context.
+    """
+
+    def __init__(self, app, flush, interval, name, flush_on_stop=True):
+        self.app = app
+        self.flush = flush
+        self.interval = interval
+        self.name = name
+        self.flush_on_stop = flush_on_stop
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._registered = False
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._stop.clear()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+            if not self._registered:
+                atexit.register(self.stop)
+                self._registered = True
+
+    def stop(self, timeout=5):
+        """Stop the thread and flush whatever is still buffered."""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive() and thread is not threading.current_thread():
+            thread.join(timeout)
+        if self.flush_on_stop:
+            self.flush_now()
+
+    def flush_now(self):
+        with self.app.app_context():
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('%s flush failed', self.name)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush_now()
+
+
+@contextmanager
+def advisory_lock(db, key):
+    """
+    Hold a PostgreSQL advisory lock for one run of a job, on a connection of its own.
+
+    Yields whether it was acquired, so a job every worker schedules runs in
+    one process at a time; other dialects always yield True (run a single
+    job process there, e.g. a `flask ... run` command or cron).
+    """
+    if db.engine.dialect.name != 'postgresql':
+        yield True
+        return
+    with db.engine.connect() as connection:
+        acquired = connection.scalar(select(func.pg_try_advisory_lock(key)))
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                # Session-level: a rollback when the connection returns to the pool would not release it
+                connection.scalar(select(func.pg_advisory_unlock(key)))
+                connection.commit()
+
+
+def database_now(db):
+    """
+    The database's now() as the naive datetime a DateTime column default would store.
+
+    Write-behind buffers note times on the app's clock and shift them by the
+    difference to this when they write, so they match the column defaults.
+    """
+    now = func.now()
+    if db.engine.dialect.name == 'postgresql':
+        # now() is timestamptz there; the columns hold the session time zone's local time
+        now = cast(now, DateTime)
+    return db.session.scalar(select(now))
@@ -0,0 +1,300 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from itertools import groupby
+from sqlalchemy import func, insert, select
+from . import db
+from .models import Note, ToDo, ToDoTask, PaymentReminder
+
+# Rows fetched per round trip while exporting, and rows per executemany while importing
+EXPORT_BATCH_SIZE = 1000
+IMPORT_BATCH_SIZE = 1000
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+# Exported columns per record type; ids are only kept to link tasks to their todo
+NOTE_FIELDS = ('id', 'title', 'text_content', 'is_active', 'created_date', 'last_modified_date')
+PAYMENT_FIELDS = ('id', 'name', 'pmt_date', 'pmt_amount', 'notes', 'is_active', 'recurrence_unit',
+                  'recurrence_interval', 'recurrence_end', 'created_date', 'updated_date')
+TODO_FIELDS = ('id', 'name', 'priority', 'status', 'due_date', 'position', 'is_active',
+               'created_date', 'updated_date', 'completed_date')
+TASK_FIELDS = ('id', 'text_content', 'status', 'position', 'created_date', 'updated_date')
+
+# CSV puts every record type in one file: a "type" column plus the union of the fields
+CSV_COLUMNS = ('type', 'todo_id') + tuple(dict.fromkeys(NOTE_FIELDS + PAYMENT_FIELDS + TODO_FIELDS + TASK_FIELDS))
+
+DATE_FIELDS = {'pmt_date', 'due_date', 'recurrence_end'}
+DATETIME_FIELDS = {'created_date', 'updated_date', 'last_modified_date', 'completed_date'}
+INT_FIELDS = {'status', 'position', 'recurrence_interval'}
+BOOL_FIELDS = {'is_active'}
+REQUIRED_FIELDS = {'title', 'name', 'text_content', 'pmt_date', 'pmt_amount'}
+# Used for missing values; every row in a batch must have the same keys for executemany
+DEFAULTS = {'is_active': True, 'status': 0, 'position': 0, 'priority': 'Medium', 'recurrence_interval': 1}
+NOW_FIELDS = {'created_date', 'updated_date', 'last_modified_date'}
+
+
+class InvalidImport(ValueError):
+    pass
+
+
+# --- Export ---
+
+def _stream(stmt):
+    """Execute a select with a server-side cursor, fetching EXPORT_BATCH_SIZE rows at a time."""
+    return db.session.execute(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+
+
+def _columns(model, fields):
+    return [getattr(model, field) for field in fields]
+
+
+def _to_json_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _record(record_type, row, fields):
+    record = {'type': record_type}
+    for field in fields:
+        record[field] = _to_json_value(getattr(row, field))
+    return record
+
+
+def export_records(user_id):
+    """
+    Yield the user's data as plain dicts: notes, payment reminders, then todos with their tasks.
+
+    Every query streams through a server-side cursor, and a todo's tasks come
+    from one join ordered by todo, so memory use does not grow with the account.
+
+    Args:
+        user_id (int): Whose data to export
+
+    Yields:
+        dict: One record with a "type" key ("note", "payment_reminder" or "todo")
+    """
+    notes = select(*_columns(Note, NOTE_FIELDS)).where(Note.user_id == user_id).order_by(Note.id)
+    for row in _stream(notes):
+        yield _record('note', row, NOTE_FIELDS)
+
+    payments = select(*_columns(PaymentReminder, PAYMENT_FIELDS)).where(
+        PaymentReminder.user_id == user_id).order_by(PaymentReminder.id)
+    for row in _stream(payments):
+        yield _record('payment_reminder', row, PAYMENT_FIELDS)
+
+    task_columns = [column.label(f'task_{column.key}') for column in _columns(ToDoTask, TASK_FIELDS)]
+    todos = (select(*_columns(ToDo, TODO_FIELDS), *task_columns)
+             .outerjoin(ToDoTask, ToDoTask.to_do_id == ToDo.id)
+             .where(ToDo.user_id == user_id)
+             .order_by(ToDo.id, ToDoTask.position, ToDoTask.id))
+    for _, rows in groupby(_stream(todos), key=lambda row: row.id):
+        rows = list(rows)
+        todo = _record('todo', rows[0], TODO_FIELDS)
+        todo['tasks'] = [{field: _to_json_value(getattr(row, f'task_{field}')) for field in TASK_FIELDS}
+                         for row in rows if row.task_id is not None]
+        yield todo
+
+
+def export_ndjson(user_id):
+    """Yield the export as NDJSON lines, one record per line."""
+    for record in export_records(user_id):
+        yield json.dumps(record) + '\n'
+
+
+def export_csv(user_id):
+    """Yield the export as CSV; each task follows its todo as a row of type "task"."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, CSV_COLUMNS, extrasaction='ignore')
+
+    def drain():
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return value
+
+    writer.writeheader()
+    yield drain()
+    for record in export_records(user_id):
+        writer.writerow(record)
+        for task in record.pop('tasks', ()):
+            writer.writerow(dict(task, type='task', todo_id=record['id']))
+        yield drain()
+
+
+def export_stream(user_id, fmt):
+    return export_csv(user_id) if fmt == 'csv' else export_ndjson(user_id)
+
+
+# --- Import ---
+
+def _parse_value(field, value):
+    if value is None or value == '':
+        return None
+    if field in DATE_FIELDS:
+        return date.fromisoformat(value) if isinstance(value, str) else value
+    if field in DATETIME_FIELDS:
+        return datetime.fromisoformat(value) if isinstance(value, str) else value
+    if field in INT_FIELDS:
+        return int(value)
+    if field in BOOL_FIELDS:
+        return value if isinstance(value, bool) else str(value).lower() in ('true', '1', 'yes')
+    if field == 'pmt_amount':
+        return Decimal(str(value))
+    return value
+
+
+def _values(record, fields, now):
+    """Return the importable fields of a record (everything but the exported id), defaults filled in."""
+    values = {}
+    for field in fields:
+        if field == 'id':
+            continue
+        value = _parse_value(field, record.get(field))
+        if value is None:
+            if field in REQUIRED_FIELDS:
+                raise InvalidImport(f'missing {field}')
+            value = now if field in NOW_FIELDS else DEFAULTS.get(field)
+        values[field] = value
+    return values
+
+
+def read_ndjson(lines):
+    """Yield records from NDJSON lines, skipping blank ones."""
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            raise InvalidImport(f'Line {number}: invalid JSON ({e})') from e
+        if not isinstance(record, dict):
+            raise InvalidImport(f'Line {number}: expected an object')
+        yield record
+
+
+def read_csv(lines):
+    """Yield records from an export CSV, folding each todo's task rows back into the todo."""
+    todo = None
+    for row in csv.DictReader(lines):
+        if row.get('type') == 'task':
+            if todo is None or row.get('todo_id') != todo.get('id'):
+                raise InvalidImport(f"Task {row.get('id')!r} does not follow its todo")
+            todo['tasks'].append(row)
+            continue
+        if todo is not None:
+            yield todo
+            todo = None
+        if row.get('type') == 'todo':
+            todo = dict(row, tasks=[])
+        else:
+            yield row
+    if todo is not None:
+        yield todo
+
+
+def import_records(user_id, records):
+    """
+    Insert exported records for a user in batches of IMPORT_BATCH_SIZE.
+
+    Rows are written with Core executemany inserts, so the ToDoTask listeners
+    do not run; each todo's counters and status are computed from its tasks
+    and go into the todo's own INSERT. New ids are assigned; exported ids are
+    only used to link tasks to their todo. Imported todos are placed after the
+    user's existing ones on the board, in their exported order. The caller commits.
+
+    Args:
+        user_id (int): Owner of the imported rows
+        records (iterable): Records as produced by export_records / read_ndjson / read_csv
+
+    Returns:
+        dict: Number of rows inserted per type
+    """
+    counts = {'notes': 0, 'payment_reminders': 0, 'todos': 0, 'tasks': 0}
+    notes, payments, todos = [], [], []
+
+    def flush_notes():
+        if notes:
+            db.session.execute(insert(Note.__table__), notes)
+            counts['notes'] += len(notes)
+            notes.clear()
+
+    def flush_payments():
+        if payments:
+            db.session.execute(insert(PaymentReminder.__table__), payments)
+            counts['payment_reminders'] += len(payments)
+            payments.clear()
+
+    def flush_todos():
+        if todos:
+            counts['todos'] += len(todos)
+            counts['tasks'] += _insert_todos(todos)
+            todos.clear()
+
+    # Exported positions are shifted past the board's current end, keeping their relative order
+    first_position = db.session.scalar(
+        select(func.coalesce(func.max(ToDo.position) + 1, 0)).where(ToDo.user_id == user_id))
+
+    now = datetime.utcnow()
+    for number, record in enumerate(records, start=1):
+        record_type = record.get('type')
+        try:
+            if record_type == 'note':
+                notes.append(dict(_values(record, NOTE_FIELDS, now), user_id=user_id))
+            elif record_type == 'payment_reminder':
+                payments.append(dict(_values(record, PAYMENT_FIELDS, now), user_id=user_id))
+            elif record_type == 'todo':
+                todo = dict(_values(record, TODO_FIELDS, now), user_id=user_id)
+                todo['position'] += first_position
+                tasks = record.get('tasks') or []
+                if not isinstance(tasks, list) or not all(isinstance(task, dict) for task in tasks):
+                    raise InvalidImport('tasks must be a list of objects')
+                todos.append((todo, [_values(task, TASK_FIELDS, now) for task in tasks]))
+            else:
+                raise InvalidImport(f'unknown type {record_type!r}')
+        except (TypeError, ValueError, ArithmeticError) as e:
+            raise InvalidImport(f'Record {number}: {e}') from e
+
+        if len(notes) >= IMPORT_BATCH_SIZE:
+            flush_notes()
+        if len(payments) >= IMPORT_BATCH_SIZE:
+            flush_payments()
+        if len(todos) >= IMPORT_BATCH_SIZE:
+            flush_todos()
+
+    flush_notes()
+    flush_payments()
+    flush_todos()
+    return counts
+
+
+def _insert_todos(todos):
+    """Insert a batch of (todo, tasks) pairs with precomputed counters; returns the task count."""
+    for todo, tasks in todos:
+        total = len(tasks)
+        completed = sum(1 for task in tasks if task.get('status') == 1)
+        todo['total_tasks'] = total
+        todo['completed_tasks'] = completed
+        # Archived todos keep their status; otherwise it follows from the tasks
+        if todo.get('status') != 3:
+            todo['status'] = ToDo.status_for(total, completed)
+            todo['completed_date'] = todo.get('completed_date') if todo['status'] == 2 else None
+
+    todo_table = ToDo.__table__
+    ids = db.session.scalars(
+        insert(todo_table).returning(todo_table.c.id, sort_by_parameter_order=True),
+        [todo for todo, _ in todos],
+    ).all()
+
+    task_rows = [dict(task, to_do_id=todo_id) for todo_id, (_, tasks) in zip(ids, todos) for task in tasks]
+    for start in range(0, len(task_rows), IMPORT_BATCH_SIZE):
+        db.session.execute(insert(ToDoTask.__table__), task_rows[start:start + IMPORT_BATCH_SIZE])
+    return len(task_rows)
@@ -0,0 +1,151 @@
+import threading
+import time
+from collections import OrderedDict
+from werkzeug.utils import import_string
+
+
+class BaseCache:
+    """
+    Interface for cache backends.
+
+    Subclasses implement _get/_set/delete/clear; hit and miss counting is
+    done here so every backend reports the same stats. A shared backend
+    (Redis, memcached, ...) can be plugged in by setting <PREFIX>_BACKEND
+    (e.g. DASHBOARD_CACHE_BACKEND) to its import path, e.g. "mypkg.cache:RedisCache".
+    Values must be treated as immutable by callers.
+    """
+
+    def __init__(self):
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_config(cls, config, prefix):
+        """Build the backend from app config keys starting with prefix."""
+        return cls()
+
+    def get(self, key):
+        """Return the cached value or None, counting the hit or miss."""
+        value = self._get(key)
+        with self._stats_lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self._set(key, value)
+
+    def _get(self, key):
+        raise NotImplementedError
+
+    def _set(self, key, value):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def stats(self):
+        """Return hit/miss counters for monitoring."""
+        with self._stats_lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            'backend': type(self).__name__,
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': hits / total if total else 0.0,
+        }
+
+
+class NullCache(BaseCache):
+    """Backend that never stores anything (disables caching)."""
+
+    def _get(self, key):
+        return None
+
+    def _set(self, key, value):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+
+class LRUCache(BaseCache):
+    """Thread-safe in-process LRU cache with a per-entry TTL."""
+
+    def __init__(self, maxsize=1024, ttl=60):
+        super().__init__()
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config, prefix):
+        return cls(maxsize=config.get(f'{prefix}_SIZE', 1024), ttl=config.get(f'{prefix}_TTL', 60))
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def _set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        stats = super().stats()
+        with self._lock:
+            stats['size'] = len(self._data)
+        stats['maxsize'] = self.maxsize
+        stats['ttl'] = self.ttl
+        return stats
+
+
+BACKENDS = {
+    'memory': LRUCache,
+    'null': NullCache,
+}
+
+
+def make_cache(config, prefix):
+    """
+    Create the cache backend configured under prefix.
+
+    Args:
+        config (dict): App config
+        prefix (str): Config key prefix, e.g. "DASHBOARD_CACHE"
+
+    Returns:
+        BaseCache: The configured backend
+    """
+    backend = config.get(f'{prefix}_BACKEND', 'memory')
+    backend_cls = BACKENDS.get(backend) or import_string(backend)
+    return backend_cls.from_config(config, prefix)
@@ -0,0 +1,228 @@
+import threading
+import time
+import zlib
+from werkzeug.http import parse_accept_header, parse_options_header
+from werkzeug.wsgi import ClosingIterator
+from .metrics import register_collector
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip is offered
+    brotli = None
+
+DEFAULT_MIMETYPES = ('text/html', 'text/plain', 'text/css', 'text/csv', 'text/javascript',
+                     'application/javascript', 'application/json', 'application/x-ndjson', 'image/svg+xml')
+# Statuses whose body is empty or must not be re-encoded (206 byte ranges refer to the original)
+NO_BODY_STATUSES = {204, 206, 304}
+
+
+class CompressionStats:
+    """Counters for /metrics: what compression saved and the CPU time it cost, per encoding."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}
+        self.skipped = 0
+
+    def observe(self, encoding, bytes_in, bytes_out, cpu_seconds):
+        with self._lock:
+            series = self._series.setdefault(encoding, [0, 0, 0, 0.0])
+            series[0] += 1
+            series[1] += bytes_in
+            series[2] += bytes_out
+            series[3] += cpu_seconds
+
+    def skip(self):
+        with self._lock:
+            self.skipped += 1
+
+    def metric_lines(self):
+        lines = []
+        with self._lock:
+            series = sorted(self._series.items())
+            skipped = self.skipped
+        for index, (name, kind, description) in enumerate((
+            ('compression_responses_total', 'counter', 'Responses compressed.'),
+            ('compression_bytes_in_total', 'counter', 'Response bytes before compression.'),
+            ('compression_bytes_out_total', 'counter', 'Response bytes after compression.'),
+            ('compression_cpu_seconds_total', 'counter', 'CPU time spent compressing responses.'),
+        )):
+            lines += [f'# HELP {name} {description}', f'# TYPE {name} {kind}']
+            lines += [f'{name}{{encoding="{encoding}"}} {values[index]}' for encoding, values in series]
+        lines += [
+            '# HELP compression_bytes_saved_total Response bytes saved by compression.',
+            '# TYPE compression_bytes_saved_total counter',
+        ] + [f'compression_bytes_saved_total{{encoding="{encoding}"}} {values[1] - values[2]}'
+             for encoding, values in series] + [
+            '# HELP compression_skipped_total Compressible responses sent uncompressed (below the size threshold).',
+            '# TYPE compression_skipped_total counter',
+            f'compression_skipped_total {skipped}',
+        ]
+        return lines
+
+
+class _Gzip:
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _Brotli:
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class CompressionMiddleware:
+    """
+    WSGI middleware compressing responses with brotli or gzip, as Accept-Encoding allows.
+
+    Only responses of an allowed content type, without a Content-Encoding or
+    Cache-Control: no-transform, are compressed, and only when their length
+    is unknown (streamed) or at least `min_size` bytes. The body is
+    compressed chunk by chunk as the app yields it, never buffered whole;
+    streamed responses are flushed whenever `flush_size` bytes went in since
+    the last flush, so an export reaches the client in parts without a
+    flush per row spoiling the ratio.
+
+    Args:
+        app: The WSGI app to wrap
+        level (int): gzip level (1-9)
+        brotli_quality (int): brotli quality (0-11), if the brotli package is installed
+        min_size (int): Smallest Content-Length worth compressing
+        flush_size (int): Input bytes between flushes of a streamed response
+        mimetypes (iterable): Content types to compress
+        stats (CompressionStats): Where to count bytes and CPU time
+    """
+
+    def __init__(self, app, level=6, brotli_quality=4, min_size=500, flush_size=16384, mimetypes=DEFAULT_MIMETYPES,
+                 stats=None):
+        self.app = app
+        self.level = level
+        self.brotli_quality = brotli_quality
+        self.min_size = min_size
+        self.flush_size = flush_size
+        self.mimetypes = frozenset(mimetypes)
+        self.stats = stats or CompressionStats()
+
+    def choose_encoding(self, environ):
+        if environ.get('REQUEST_METHOD') == 'HEAD':
+            return None
+        accepted = parse_accept_header(environ.get('HTTP_ACCEPT_ENCODING'))
+        if brotli is not None and accepted['br']:
+            return 'br'
+        if accepted['gzip']:
+            return 'gzip'
+        return None
+
+    def _compressor(self, encoding):
+        return _Brotli(self.brotli_quality) if encoding == 'br' else _Gzip(self.level)
+
+    def _should_compress(self, status, headers):
+        if int(status.split(None, 1)[0]) in NO_BODY_STATUSES:
+            return False
+        values = {name.lower(): value for name, value in headers}
+        if 'content-encoding' in values or 'no-transform' in values.get('cache-control', ''):
+            return False
+        if parse_options_header(values.get('content-type', ''))[0] not in self.mimetypes:
+            return False
+        length = values.get('content-length')
+        if length is not None and int(length) < self.min_size:
+            self.stats.skip()
+            return False
+        return True
+
+    def __call__(self, environ, start_response):
+        encoding = self.choose_encoding(environ)
+        if encoding is None:
+            return self.app(environ, start_response)
+
+        state = {}
+
+        def compressing_start_response(status, headers, exc_info=None):
+            if not self._should_compress(status, headers):
+                return start_response(status, headers, exc_info)
+
+            state['streamed'] = not any(name.lower() == 'content-length' for name, _ in headers)
+            headers = [(name, value) for name, value in headers if name.lower() != 'content-length']
+            vary = [value for name, value in headers if name.lower() == 'vary']
+            headers = [(name, _weaken(value) if name.lower() == 'etag' else value)
+                       for name, value in headers if name.lower() != 'vary']
+            headers.append(('Vary', ', '.join(vary + ['Accept-Encoding'])))
+            headers.append(('Content-Encoding', encoding))
+            state['compressor'] = self._compressor(encoding)
+            return start_response(status, headers, exc_info)
+
+        body = self.app(environ, compressing_start_response)
+        # The server closes the returned iterable; that must close the app's body too
+        return ClosingIterator(self._chunks(body, state, encoding), getattr(body, 'close', None))
+
+    def _chunks(self, body, state, encoding):
+        # start_response may only be called when the first chunk is produced, so the
+        # decision is made per chunk; chunks before it (none for Flask) pass through
+        compressor = None
+        bytes_in = bytes_out = unflushed = 0
+        cpu = 0.0
+        for chunk in body:
+            compressor = compressor or state.get('compressor')
+            if compressor is None:
+                yield chunk
+                continue
+            started = time.thread_time()
+            data = compressor.compress(chunk)
+            unflushed += len(chunk)
+            if state['streamed'] and unflushed >= self.flush_size:
+                data += compressor.flush()
+                unflushed = 0
+            cpu += time.thread_time() - started
+            bytes_in += len(chunk)
+            bytes_out += len(data)
+            if data:
+                yield data
+
+        compressor = compressor or state.get('compressor')
+        if compressor is not None:
+            started = time.thread_time()
+            data = compressor.finish()
+            cpu += time.thread_time() - started
+            bytes_out += len(data)
+            self.stats.observe(encoding, bytes_in, bytes_out, cpu)
+            yield data
+
+
+def _weaken(etag):
+    # The compressed body is a different representation of the same resource
+    return etag if etag.startswith('W/') else f'W/{etag}'
+
+
+def init_compression(app):
+    """Wrap the app's WSGI callable in CompressionMiddleware, configured from COMPRESSION_*."""
+    if not app.config['COMPRESSION_ENABLED']:
+        return None
+    middleware = CompressionMiddleware(
+        app.wsgi_app,
+        level=app.config['COMPRESSION_LEVEL'],
+        brotli_quality=app.config['COMPRESSION_BROTLI_QUALITY'],
+        min_size=app.config['COMPRESSION_MIN_SIZE'],
+        mimetypes=app.config['COMPRESSION_MIMETYPES'],
+    )
+    app.wsgi_app = middleware
+    app.extensions['compression'] = middleware
+    register_collector(app, middleware.stats.metric_lines)
+    return middleware
@@ -0,0 +1,123 @@
+import hashlib
+import os
+from datetime import date, timezone
+from functools import wraps
+from flask import current_app, make_response, request, session
+from flask_login import current_user
+from sqlalchemy import func, select, union_all
+from . import db
+from .models import Note, PaymentReminder, ToDo, ToDoTask
+
+SAFE_METHODS = {'GET', 'HEAD'}
+
+
+def _user_rows(column, user_column, user_id, *joins):
+    stmt = select(func.count(), func.max(column)).where(user_column == user_id)
+    for target in joins:
+        stmt = stmt.join(target)
+    return stmt
+
+
+# Row count and newest modification time of everything a list shows, per user. Every write path
+# bumps the timestamp (including the Core UPDATEs for reordering and task toggles) and deletes
+# change the count, so the pair changes whenever the rendered list would. Timestamps need sub-second
+# resolution for that (PostgreSQL's now() has microseconds; models.py gives SQLite milliseconds).
+LIST_VERSIONS = {
+    'notes': lambda user_id: [_user_rows(Note.last_modified_date, Note.user_id, user_id)],
+    'payments': lambda user_id: [_user_rows(PaymentReminder.updated_date, PaymentReminder.user_id, user_id)],
+    'todos': lambda user_id: [
+        _user_rows(ToDo.updated_date, ToDo.user_id, user_id),
+        select(func.count(), func.max(ToDoTask.updated_date)).join(ToDo).where(ToDo.user_id == user_id),
+    ],
+}
+
+
+def list_version(name, user_id):
+    """
+    Return a user's freshness token for one list, in a single round trip.
+
+    Args:
+        name (str): Key of LIST_VERSIONS
+        user_id (int): Owner of the list
+
+    Returns:
+        tuple: (list of (count, newest timestamp) rows, newest timestamp or None)
+    """
+    statements = LIST_VERSIONS[name](user_id)
+    stmt = statements[0] if len(statements) == 1 else union_all(*statements)
+    rows = [tuple(row) for row in db.session.execute(stmt)]
+    stamps = [row[1] for row in rows if row[1] is not None]
+    return rows, max(stamps) if stamps else None
+
+
+def make_etag(name, user_id, rows):
+    parts = [current_app.extensions['conditional_release'], name, user_id, rows,
+             # Pages compare due dates with today, and the query string selects the page
+             date.today(), request.full_path]
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def conditional_list(name):
+    """
+    Answer GET requests for a user's list with 304 Not Modified when nothing changed.
+
+    The view's response gets an ETag and Last-Modified derived from
+    list_version(); a request whose If-None-Match (or If-Modified-Since)
+    still matches is answered before the view runs its list query or renders
+    anything. Requests with pending flash messages are always rendered, as
+    the page would show them.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if (request.method not in SAFE_METHODS or not current_app.config['CONDITIONAL_GET']
+                    or '_flashes' in session):
+                return view(*args, **kwargs)
+
+            rows, last_modified = list_version(name, current_user.id)
+            etag = make_etag(name, current_user.id, rows)
+            if last_modified is not None:
+                # Stored timestamps are naive UTC; HTTP dates have whole seconds
+                last_modified = last_modified.replace(tzinfo=timezone.utc, microsecond=0)
+
+            probe = current_app.response_class()
+            _set_validators(probe, etag, last_modified)
+            probe.make_conditional(request)
+            if probe.status_code == 304:
+                return probe
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                _set_validators(response, etag, last_modified)
+            return response
+        return wrapper
+    return decorator
+
+
+def _set_validators(response, etag, last_modified):
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    # Browsers may keep the page but must revalidate it on every use
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+
+
+def release_token(app):
+    """Fingerprint of the templates and static files, so a deploy invalidates every ETag."""
+    digest = hashlib.sha1()
+    for folder in (app.template_folder, app.static_folder):
+        root = os.path.join(app.root_path, folder) if folder else None
+        if not root or not os.path.isdir(root):
+            continue
+        for dirpath, dirnames, filenames in sorted(os.walk(root)):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                stat = os.stat(os.path.join(dirpath, filename))
+                digest.update(f'{dirpath}/{filename}:{stat.st_size}:{stat.st_mtime_ns}'.encode())
+    return digest.hexdigest()[:12]
+
+
+def init_conditional(app):
+    """Compute the release token that is mixed into every list ETag."""
+    app.extensions['conditional_release'] = release_token(app)
@@ -0,0 +1,149 @@
+from datetime import date, timedelta
+from flask import current_app
+from sqlalchemy import case, func, select
+from . import db
+from .models import PaymentReminder, PaymentOccurrence, ToDo, Note
+from .recurrence import nth_occurrence, window_start
+
+# Number of rows shown in each dashboard section
+PAYMENTS_LIMIT = 5
+TODOS_LIMIT = 5
+NOTES_LIMIT = 6
+
+# Characters kept for previews; one extra so templates know when to add "..."
+PAYMENT_NOTES_PREVIEW = 50
+NOTE_PREVIEW = 100
+
+
+def get_dashboard(user_id):
+    """Return the user's dashboard payload, served from the dashboard cache when possible."""
+    cache = current_app.extensions['dashboard_cache']
+    key = _cache_key(user_id)
+    dashboard = cache.get(key)
+    if dashboard is None:
+        dashboard = load_dashboard(user_id)
+        cache.set(key, dashboard)
+    return dashboard
+
+
+def invalidate_dashboard(user_id):
+    """Drop the cached dashboard after the user changed any of their data."""
+    current_app.extensions['dashboard_cache'].delete(_cache_key(user_id))
+
+
+def _cache_key(user_id):
+    return f'dashboard:{user_id}'
+
+
+def load_dashboard(user_id):
+    """
+    Load everything the home page needs for a user.
+
+    Each section is a single LIMITed query that also returns the section's
+    total via a window aggregate, so the dashboard costs three round trips
+    and a bounded amount of memory no matter how much data the user has.
+
+    Args:
+        user_id (int): Id of the user to load the dashboard for
+
+    Returns:
+        dict: Plain rows (dicts) and counts for the home template
+    """
+    payments, payment_count, due_total, month_total = _load_payments(user_id)
+    todos, todo_count, completed_todos = _load_todos(user_id)
+    notes, note_count = _load_notes(user_id)
+
+    return {
+        'payment_reminders': payments,
+        'payment_count': payment_count,
+        'payment_due_total': due_total,
+        'payment_month_total': month_total,
+        'upcoming_days': current_app.config['UPCOMING_PAYMENTS_DAYS'],
+        'todos': todos,
+        'todo_count': todo_count,
+        'completed_todos': completed_todos,
+        'notes': notes,
+        'note_count': note_count,
+    }
+
+
+def _load_payments(user_id):
+    # Range scans over idx_occurrence_user_date: the next UPCOMING_PAYMENTS_DAYS days, plus
+    # this month's total as a scalar subquery so it comes back in the same round trip
+    today = date.today()
+    month_start = window_start(today)
+    month_total = (
+        select(func.coalesce(func.sum(PaymentOccurrence.amount), 0))
+        .where(PaymentOccurrence.user_id == user_id,
+               PaymentOccurrence.occurrence_date >= month_start,
+               PaymentOccurrence.occurrence_date < nth_occurrence(month_start, 'month', 1, 1))
+    )
+    stmt = (
+        select(
+            PaymentOccurrence.payment_id.label('id'),
+            PaymentReminder.name,
+            PaymentOccurrence.occurrence_date.label('pmt_date'),
+            PaymentOccurrence.amount.label('pmt_amount'),
+            func.substr(PaymentReminder.notes, 1, PAYMENT_NOTES_PREVIEW + 1).label('notes_preview'),
+            func.count().over().label('total'),
+            func.sum(PaymentOccurrence.amount).over().label('due_total'),
+            month_total.scalar_subquery().label('month_total'),
+        )
+        .join(PaymentReminder, PaymentReminder.id == PaymentOccurrence.payment_id)
+        .where(PaymentOccurrence.user_id == user_id,
+               PaymentOccurrence.occurrence_date.between(
+                   today, today + timedelta(days=current_app.config['UPCOMING_PAYMENTS_DAYS'])))
+        .order_by(PaymentOccurrence.occurrence_date, PaymentOccurrence.id)
+        .limit(PAYMENTS_LIMIT)
+    )
+    rows = [row._asdict() for row in db.session.execute(stmt)]
+    if not rows:
+        return rows, 0, 0, db.session.scalar(month_total)
+    return rows, rows[0]['total'], rows[0]['due_total'], rows[0]['month_total']
+
+
+def _load_todos(user_id):
+    stmt = (
+        select(
+            ToDo.id,
+            ToDo.name,
+            ToDo.status,
+            ToDo.due_date,
+            ToDo.total_tasks,
+            ToDo.completed_tasks,
+            func.count().over().label('total'),
+            func.sum(case((ToDo.status == 2, 1), else_=0)).over().label('completed'),
+        )
+        .where(ToDo.user_id == user_id, ToDo.is_active == True)
+        .order_by(ToDo.due_date)
+        .limit(TODOS_LIMIT)
+    )
+    rows = []
+    for row in db.session.execute(stmt):
+        todo = row._asdict()
+        todo['completion_percentage'] = (
+            todo['completed_tasks'] / todo['total_tasks'] * 100 if todo['total_tasks'] else 0
+        )
+        rows.append(todo)
+
+    if not rows:
+        return rows, 0, 0
+    return rows, rows[0]['total'], rows[0]['completed']
+
+
+def _load_notes(user_id):
+    stmt = (
+        select(
+            Note.id,
+            Note.title,
+            Note.last_modified_date,
+            func.substr(Note.text_content, 1, NOTE_PREVIEW + 1).label('preview'),
+            func.count().over().label('total'),
+        )
+        .where(Note.user_id == user_id, Note.is_active == True)
+        .order_by(Note.last_modified_date.desc())
+        .limit(NOTES_LIMIT)
+    )
+    rows = [row._asdict() for row in db.session.execute(stmt)]
+    total = rows[0]['total'] if rows else 0
+    return rows, total
@@ -0,0 +1,344 @@
+import queue
+from datetime import date, datetime
+import click
+from flask import current_app, has_request_context
+from flask.cli import AppGroup
+from flask_login import current_user
+from sqlalchemy import Date, delete, event, insert, inspect, text
+from . import db
+from .background import PeriodicFlusher, database_now
+from .metrics import register_collector
+from .models import Note, ToDo, ToDoTask, PaymentReminder, FieldHistory
+
+# Fields whose history is recorded: edits, plus every non-empty value when a row is
+# created (old_value NULL) or deleted (new_value NULL) through the ORM. Derived or
+# bookkeeping columns (counters, positions, timestamps) are left out on purpose.
+TRACKED_FIELDS = {
+    Note: ('title', 'text_content', 'is_active'),
+    ToDo: ('name', 'priority', 'due_date', 'is_active'),
+    ToDoTask: ('text_content', 'status', 'to_do_id'),
+    PaymentReminder: ('name', 'pmt_date', 'pmt_amount', 'notes', 'is_active'),
+}
+
+PENDING_KEY = 'field_history'
+PARTITION_PREFIX = 'field_history_y'
+
+
+class HistoryWriter:
+    """
+    Queue of captured changes, written as multi-row INSERTs off the request path.
+
+    The queue is bounded; when it is full new changes are dropped (and
+    counted) rather than slowing down requests. changed_date is captured on
+    the app's clock and moved to the database's when a batch is written, so
+    it agrees with the other timestamp columns (and partition bounds).
+    """
+
+    def __init__(self, maxsize, batch_size):
+        self._queue = queue.Queue(maxsize=maxsize)
+        self.batch_size = batch_size
+        self.written = 0
+        self.dropped = 0
+
+    def enqueue(self, rows):
+        for row in rows:
+            try:
+                self._queue.put_nowait(row)
+            except queue.Full:
+                self.dropped += 1
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def _take(self):
+        rows = []
+        while len(rows) < self.batch_size:
+            try:
+                rows.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return rows
+
+    def flush(self):
+        """Write everything queued, one INSERT per batch; needs an app context."""
+        written = 0
+        while True:
+            rows = self._take()
+            if not rows:
+                return written
+            try:
+                offset = database_now(db) - datetime.utcnow()
+                db.session.execute(insert(FieldHistory.__table__),
+                                   [dict(row, changed_date=row['changed_date'] + offset) for row in rows])
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                self.dropped += len(rows)
+                raise
+            written += len(rows)
+            self.written += len(rows)
+
+    def metric_lines(self):
+        return [
+            '# HELP field_history_pending Captured field changes waiting to be written.',
+            '# TYPE field_history_pending gauge',
+            f'field_history_pending {self.pending()}',
+            '# HELP field_history_written_total Field changes written to field_history.',
+            '# TYPE field_history_written_total counter',
+            f'field_history_written_total {self.written}',
+            '# HELP field_history_dropped_total Field changes lost to a full queue or a failed write.',
+            '# TYPE field_history_dropped_total counter',
+            f'field_history_dropped_total {self.dropped}',
+        ]
+
+
+def record_change(session, entity_type, entity_id, field, old_value, new_value):
+    """
+    Add a change made outside the ORM (e.g. a Core UPDATE) to the session's history.
+
+    Like captured edits, it is queued for writing only if the session commits.
+    """
+    _pending(session).append({
+        'entity_type': entity_type,
+        'entity_id': entity_id,
+        'field': field,
+        'old_value': _to_text(old_value),
+        'new_value': _to_text(new_value),
+        'changed_date': datetime.utcnow(),
+        'changed_by_user_id': _current_user_id(),
+    })
+
+
+def _current_user_id():
+    if has_request_context() and current_user.is_authenticated:
+        return current_user.id
+    return None
+
+
+def _to_text(value, column_type=None):
+    if value is None:
+        return None
+    if isinstance(value, datetime) and isinstance(column_type, Date):
+        value = value.date()
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def _history_row(obj, field, old_value, new_value, now, user_id):
+    return {
+        'entity_type': obj.__tablename__,
+        'entity_id': obj.id,
+        'field': field,
+        'old_value': old_value,
+        'new_value': new_value,
+        'changed_date': now,
+        'changed_by_user_id': user_id,
+    }
+
+
+def _snapshot(obj, fields, now, user_id, deleted):
+    """A row per non-empty tracked field of a created (or deleted) object."""
+    columns = inspect(obj).mapper.columns
+    rows = []
+    for field in fields:
+        value = _to_text(getattr(obj, field), columns[field].type)
+        if value is not None:
+            old_value, new_value = (value, None) if deleted else (None, value)
+            rows.append(_history_row(obj, field, old_value, new_value, now, user_id))
+    return rows
+
+
+def _pending(session):
+    return session.info.setdefault(PENDING_KEY, [])
+
+
+@event.listens_for(db.session, 'before_flush')
+def capture_changes(session, flush_context, instances):
+    """Collect edits from attribute history, and deleted rows' values; no queries are issued."""
+    if not current_app.config.get('HISTORY_ENABLED', True):
+        return
+
+    now = datetime.utcnow()
+    user_id = _current_user_id()
+    rows = []
+    for obj in session.dirty:
+        fields = TRACKED_FIELDS.get(type(obj))
+        if not fields:
+            continue
+        state = inspect(obj)
+        if state.key is None:
+            continue
+        for field in fields:
+            history = state.attrs[field].history
+            if not history.added:
+                continue
+            column_type = state.mapper.columns[field].type
+            old_value = _to_text(history.deleted[0] if history.deleted else None, column_type)
+            new_value = _to_text(history.added[0], column_type)
+            if old_value == new_value:
+                continue
+            rows.append(_history_row(obj, field, old_value, new_value, now, user_id))
+    for obj in session.deleted:
+        fields = TRACKED_FIELDS.get(type(obj))
+        if fields:
+            rows.extend(_snapshot(obj, fields, now, user_id, deleted=True))
+    if rows:
+        _pending(session).extend(rows)
+
+
+@event.listens_for(db.session, 'after_flush')
+def capture_created(session, flush_context):
+    """Collect the values of created rows, once the flush has given them ids."""
+    if not current_app.config.get('HISTORY_ENABLED', True):
+        return
+
+    now = datetime.utcnow()
+    user_id = _current_user_id()
+    rows = []
+    for obj in session.new:
+        fields = TRACKED_FIELDS.get(type(obj))
+        if fields:
+            rows.extend(_snapshot(obj, fields, now, user_id, deleted=False))
+    if rows:
+        _pending(session).extend(rows)
+
+
+@event.listens_for(db.session, 'after_commit')
+def queue_committed_changes(session):
+    rows = session.info.pop(PENDING_KEY, None)
+    if rows:
+        current_app.extensions['history_flusher'].start()
+        current_app.extensions['history_writer'].enqueue(rows)
+
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def discard_changes(session, previous_transaction):
+    session.info.pop(PENDING_KEY, None)
+
+
+def init_history(app):
+    """Set up the history queue, its background writer and the `flask history` commands."""
+    writer = HistoryWriter(app.config['HISTORY_QUEUE_SIZE'], app.config['HISTORY_BATCH_SIZE'])
+    app.extensions['history_writer'] = writer
+    app.extensions['history_flusher'] = PeriodicFlusher(
+        app, writer.flush, app.config['HISTORY_FLUSH_INTERVAL'], name='field-history-writer')
+    register_collector(app, writer.metric_lines)
+    app.cli.add_command(history_cli)
+
+
+# --- Partition maintenance (PostgreSQL: field_history is range-partitioned by month) ---
+
+def _month_start(value, offset=0):
+    month = value.year * 12 + value.month - 1 + offset
+    return date(month // 12, month % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'{PARTITION_PREFIX}{month.year}m{month.month:02d}'
+
+
+def ensure_partitions(months_ahead=3, today=None):
+    """
+    Create the monthly partitions from the current month to `months_ahead` ahead.
+
+    Rows outside every monthly range land in field_history_default. A new
+    partition is built as a plain table, the default partition's rows for its
+    month are moved into it and only then is it attached, since PostgreSQL
+    refuses to add a partition whose range the default partition still holds.
+
+    Returns:
+        list: Names of the partitions that were created
+    """
+    today = today or date.today()
+    existing = set(list_partitions())
+    created = []
+    for offset in range(months_ahead + 1):
+        start = _month_start(today, offset)
+        name = partition_name(start)
+        if name in existing:
+            continue
+        bounds = {'start': start, 'end': _month_start(start, 1)}
+        db.session.execute(text(f'CREATE TABLE {name} (LIKE field_history INCLUDING DEFAULTS)'))
+        db.session.execute(text(
+            f"WITH moved AS ("
+            f"DELETE FROM field_history_default "
+            f"WHERE changed_date >= :start AND changed_date < :end RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ), bounds)
+        db.session.execute(text(
+            f"ALTER TABLE field_history ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{bounds['end'].isoformat()}')"
+        ))
+        created.append(name)
+    db.session.commit()
+    return created
+
+
+def drop_partitions(keep_months=12, today=None):
+    """
+    Drop the monthly partitions that end before the retention window.
+
+    Old rows that landed in field_history_default (written before their
+    month's partition existed) are deleted as well.
+
+    Returns:
+        tuple: Names of the partitions that were dropped, rows deleted from the default partition
+    """
+    cutoff = _month_start(today or date.today(), -keep_months)
+    dropped = []
+    for name in list_partitions():
+        year, month = name[len(PARTITION_PREFIX):].split('m')
+        if _month_start(date(int(year), int(month), 1), 1) <= cutoff:
+            db.session.execute(text(f'ALTER TABLE field_history DETACH PARTITION {name}'))
+            db.session.execute(text(f'DROP TABLE {name}'))
+            dropped.append(name)
+    result = db.session.execute(
+        text('DELETE FROM field_history_default WHERE changed_date < :cutoff'), {'cutoff': cutoff})
+    db.session.commit()
+    return dropped, result.rowcount
+
+
+def list_partitions():
+    """Names of field_history's monthly partitions, oldest first."""
+    rows = db.session.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON pg_inherits.inhparent = parent.oid "
+        "JOIN pg_class child ON pg_inherits.inhrelid = child.oid "
+        "WHERE parent.relname = 'field_history'"
+    ))
+    return sorted(name for name in rows.scalars() if name.startswith(PARTITION_PREFIX))
+
+
+def prune_history(keep_months=12, today=None):
+    """Delete history older than the retention window (used where there are no partitions)."""
+    cutoff = _month_start(today or date.today(), -keep_months)
+    result = db.session.execute(delete(FieldHistory).where(FieldHistory.changed_date < cutoff))
+    db.session.commit()
+    return result.rowcount
+
+
+history_cli = AppGroup('history', help='Field history maintenance.')
+
+
+@history_cli.command('partitions')
+@click.option('--ahead', default=3, show_default=True, help='Months of partitions to create ahead.')
+def partitions_command(ahead):
+    """Create upcoming monthly partitions (PostgreSQL)."""
+    if db.engine.dialect.name != 'postgresql':
+        click.echo('field_history is only partitioned on PostgreSQL; nothing to do.')
+        return
+    created = ensure_partitions(ahead)
+    click.echo(f"Created: {', '.join(created)}" if created else 'All partitions exist.')
+
+
+@history_cli.command('prune')
+@click.option('--keep-months', default=12, show_default=True, help='Months of history to keep.')
+def prune_command(keep_months):
+    """Drop history older than the retention window."""
+    if db.engine.dialect.name == 'postgresql':
+        dropped, deleted = drop_partitions(keep_months)
+        click.echo(f"Dropped: {', '.join(dropped)}" if dropped else 'No partitions to drop.')
+        click.echo(f'Deleted {deleted} rows from field_history_default.')
+    else:
+        click.echo(f'Deleted {prune_history(keep_months)} rows.')
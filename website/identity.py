@@ -0,0 +1,83 @@
+from flask import current_app, has_app_context
+from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
+from . import db
+from .models import User
+
+IDENTITY_FIELDS = ('id', 'email', 'username', 'f_name', 'l_name', 'user_role', 'is_active')
+PENDING_KEY = 'identity_changed'
+
+
+class UserSnapshot(UserMixin):
+    """
+    Immutable copy of the user fields requests need, safe to share between requests.
+
+    Stands in for User as current_user; code that needs to write to the user
+    row must load the User itself.
+    """
+
+    __slots__ = IDENTITY_FIELDS
+
+    def __init__(self, **fields):
+        for name in IDENTITY_FIELDS:
+            object.__setattr__(self, name, fields[name])
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(**{name: getattr(user, name) for name in IDENTITY_FIELDS})
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'{type(self).__name__} is read-only')
+
+    # Same display logic as the model (the "is_active" slot shadows UserMixin's always-True property)
+    full_name = User.full_name
+
+    def __repr__(self):
+        return f"<UserSnapshot {self.username}>"
+
+
+def cache_key(user_id):
+    return f'user:{user_id}'
+
+
+def load_user(user_id):
+    """Flask-Login user_loader: a cached snapshot, or None for unknown and deactivated users."""
+    cache = current_app.extensions['identity_cache']
+    key = cache_key(user_id)
+
+    snapshot = cache.get(key)
+    if snapshot is None:
+        user = db.session.get(User, int(user_id))
+        if user is None:
+            return None
+        snapshot = UserSnapshot.from_user(user)
+        cache.set(key, snapshot)
+
+    return snapshot if snapshot.is_active else None
+
+
+def invalidate_identity(user_id):
+    """Drop a user's cached snapshot in this process."""
+    if has_app_context():
+        current_app.extensions['identity_cache'].delete(cache_key(user_id))
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def user_changed(mapper, connection, target):
+    """Remember changed users; their snapshots are dropped once the change is committed."""
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(PENDING_KEY, set()).add(target.id)
+
+
+@event.listens_for(db.session, 'after_commit')
+def drop_changed_identities(session):
+    for user_id in session.info.pop(PENDING_KEY, ()):
+        invalidate_identity(user_id)
+
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def forget_changed_identities(session, previous_transaction):
+    session.info.pop(PENDING_KEY, None)
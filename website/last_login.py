@@ -0,0 +1,120 @@
+import threading
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import DateTime, Integer, case, column, update, values
+from . import db
+from .background import PeriodicFlusher, database_now
+from .metrics import register_collector
+from .models import User
+
+
+class LastLoginBuffer:
+    """
+    Collects login times in memory and writes them in one UPDATE per flush.
+
+    Logins only touch the buffer, so the login request itself does no write.
+    If a flush fails the times are put back and retried on the next one.
+
+    Times are buffered from the app's clock but written on the database's,
+    like the other timestamp columns (func.now() defaults): each flush reads
+    now() once and shifts the buffered times by the difference.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self.flushes = 0
+        self.rows_written = 0
+
+    def record(self, user_id, when=None):
+        when = when or datetime.utcnow()
+        with self._lock:
+            if when > self._pending.get(user_id, datetime.min):
+                self._pending[user_id] = when
+
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
+
+    def _drain(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return pending
+
+    def flush(self):
+        """Write all buffered login times; needs an app context."""
+        pending = self._drain()
+        if not pending:
+            return 0
+
+        try:
+            offset = database_now(db) - datetime.utcnow()
+            logins = {user_id: when + offset for user_id, when in pending.items()}
+            db.session.execute(bulk_last_login_update(logins, db.engine.dialect.name))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            for user_id, when in pending.items():
+                self.record(user_id, when)
+            raise
+
+        self.flushes += 1
+        self.rows_written += len(pending)
+        return len(pending)
+
+    def metric_lines(self):
+        return [
+            '# HELP last_login_pending Buffered last_login updates not yet written.',
+            '# TYPE last_login_pending gauge',
+            f'last_login_pending {self.pending()}',
+            '# HELP last_login_flushes_total Batched last_login UPDATE statements executed.',
+            '# TYPE last_login_flushes_total counter',
+            f'last_login_flushes_total {self.flushes}',
+            '# HELP last_login_rows_written_total Users whose last_login was written.',
+            '# TYPE last_login_rows_written_total counter',
+            f'last_login_rows_written_total {self.rows_written}',
+        ]
+
+
+def bulk_last_login_update(pending, dialect):
+    """
+    Build one UPDATE setting last_login for every user in `pending`.
+
+    PostgreSQL joins a VALUES list (UPDATE ... FROM (VALUES ...) AS v(id, last_login));
+    other databases get an equivalent CASE on the primary key.
+
+    Args:
+        pending (dict): user id -> login datetime
+        dialect (str): Database dialect name
+
+    Returns:
+        Update: The statement to execute
+    """
+    if dialect == 'postgresql':
+        logins = values(column('id', Integer), column('last_login', DateTime), name='logins').data(
+            list(pending.items()))
+        return (update(User)
+                .where(User.id == logins.c.id)
+                .values(last_login=logins.c.last_login)
+                .execution_options(synchronize_session=False))
+
+    return (update(User)
+            .where(User.id.in_(pending))
+            .values(last_login=case(pending, value=User.id))
+            .execution_options(synchronize_session=False))
+
+
+def init_last_login(app):
+    """Set up the buffer and its background flusher for this app."""
+    buffer = LastLoginBuffer()
+    app.extensions['last_login_buffer'] = buffer
+    app.extensions['last_login_flusher'] = PeriodicFlusher(
+        app, buffer.flush, app.config['LAST_LOGIN_FLUSH_INTERVAL'], name='last-login-flusher')
+    register_collector(app, buffer.metric_lines)
+    return buffer
+
+
+def record_login(user_id):
+    """Queue a last_login update for the user; the request itself writes nothing."""
+    current_app.extensions['last_login_flusher'].start()
+    current_app.extensions['last_login_buffer'].record(user_id)
@@ -0,0 +1,178 @@
+import logging
+import threading
+import time
+from flask import Blueprint, Response, current_app, g, has_request_context, request, abort
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+metrics = Blueprint('metrics', __name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 200)
+# app.extensions['<name>_cache'] entries reported at /metrics
+CACHES = ('dashboard', 'identity')
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised when a request issues more SQL statements than SQL_QUERY_BUDGET allows."""
+
+
+class Histogram:
+    """Thread-safe Prometheus-style histogram with one label ("endpoint" unless given)."""
+
+    def __init__(self, name, description, buckets, label_name='endpoint'):
+        self.name = name
+        self.description = description
+        self.buckets = buckets
+        self.label_name = label_name
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label, value):
+        with self._lock:
+            series = self._series.get(label)
+            if series is None:
+                series = self._series[label] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['buckets'][i] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for label, series in sorted(self._series.items()):
+                label = f'{self.label_name}="{label}"'
+                for bound, count in zip(self.buckets, series['buckets']):
+                    lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {count}')
+                lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {series["count"]}')
+                lines.append(f'{self.name}_sum{{{label}}} {series["sum"]}')
+                lines.append(f'{self.name}_count{{{label}}} {series["count"]}')
+        return lines
+
+
+class RequestMetrics:
+    """Per-endpoint request histograms, aggregated in-process (one set per worker)."""
+
+    def __init__(self):
+        self.duration = Histogram('http_request_duration_seconds',
+                                  'Request handling time in seconds.', DURATION_BUCKETS)
+        self.db_time = Histogram('http_request_db_seconds',
+                                 'Time spent executing SQL per request in seconds.', DURATION_BUCKETS)
+        self.queries = Histogram('http_request_sql_statements',
+                                 'SQL statements executed per request.', QUERY_COUNT_BUCKETS)
+
+    def observe(self, endpoint, duration, db_time, queries):
+        self.duration.observe(endpoint, duration)
+        self.db_time.observe(endpoint, db_time)
+        self.queries.observe(endpoint, queries)
+
+    def render(self):
+        lines = self.duration.render() + self.db_time.render() + self.queries.render()
+        for collector in current_app.extensions.get('metrics_collectors', []):
+            lines.extend(collector())
+        return '\n'.join(lines) + '\n'
+
+
+def register_collector(app, collector):
+    """Add a callable returning extra Prometheus text lines to /metrics."""
+    app.extensions.setdefault('metrics_collectors', []).append(collector)
+
+
+def init_metrics(app):
+    """Wire SQL statement counting, Server-Timing and the /metrics endpoint into the app."""
+    app.extensions['request_metrics'] = RequestMetrics()
+
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    register_collector(app, _cache_lines)
+
+    # /metrics shows per-endpoint traffic and latency, so it is only served behind a token
+    if app.config.get('METRICS_ENABLED', False):
+        if app.config.get('METRICS_TOKEN'):
+            app.register_blueprint(metrics)
+        else:
+            logger.warning('METRICS_ENABLED is set but METRICS_TOKEN is not; /metrics is not served')
+
+
+def _start_request():
+    g.sql_statements = 0
+    g.sql_time = 0.0
+    g.request_started = time.perf_counter()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if not has_request_context() or 'request_started' not in g:
+        return
+
+    g.sql_statements += 1
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    budget = current_app.config.get('SQL_QUERY_BUDGET')
+    if budget and g.sql_statements > budget and current_app.config.get('SQL_QUERY_BUDGET_MODE') == 'raise':
+        conn.info['query_started'].pop()
+        raise QueryBudgetExceeded(
+            f'{request.endpoint} exceeded the budget of {budget} SQL statements')
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('query_started')
+    if not started or not has_request_context() or 'request_started' not in g:
+        return
+    g.sql_time += time.perf_counter() - started.pop()
+
+
+def _finish_request(response):
+    if 'request_started' not in g:
+        return response
+
+    duration = time.perf_counter() - g.request_started
+    endpoint = request.endpoint or 'unmatched'
+
+    response.headers.add(
+        'Server-Timing',
+        f'db;dur={g.sql_time * 1000:.2f};desc="{g.sql_statements} queries", app;dur={duration * 1000:.2f}'
+    )
+    current_app.extensions['request_metrics'].observe(endpoint, duration, g.sql_time, g.sql_statements)
+
+    budget = current_app.config.get('SQL_QUERY_BUDGET')
+    if budget and g.sql_statements > budget:
+        logger.warning('%s issued %d SQL statements (budget %d)', endpoint, g.sql_statements, budget)
+
+    return response
+
+
+def _cache_lines():
+    stats = {}
+    for name in CACHES:
+        cache = current_app.extensions.get(f'{name}_cache')
+        if cache is not None:
+            stats[name] = cache.stats()
+
+    lines = []
+    # Each family's samples directly follow its own HELP/TYPE lines, as the text format requires
+    for family, key, description in (
+        ('cache_hits_total', 'hits', 'Cache hits per in-process cache.'),
+        ('cache_misses_total', 'misses', 'Cache misses per in-process cache.'),
+    ):
+        lines += [f'# HELP {family} {description}', f'# TYPE {family} counter']
+        lines += [f'{family}{{cache="{name}"}} {values[key]}' for name, values in stats.items()]
+    return lines
+
+
+@metrics.route('/metrics')
+def prometheus_metrics():
+    """Expose request and cache metrics in the Prometheus text format."""
+    token = current_app.config['METRICS_TOKEN']
+    if request.headers.get('Authorization') != f'Bearer {token}':
+        abort(401)
+
+    body = current_app.extensions['request_metrics'].render()
+    return Response(body, mimetype='text/plain; version=0.0.4')
@@ -1,7 +1,12 @@
 from . import db
 from flask_login import UserMixin
 from sqlalchemy.sql import func
-from sqlalchemy import event
+from sqlalchemy import event, case, and_, inspect
+from sqlalchemy.orm import object_session
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import now as sql_now
 from datetime import datetime as dt
 
 class User(UserMixin, db.Model):
@@ -25,9 +30,9 @@ class User(UserMixin, db.Model):
     note = db.relationship("Note", backref="user", cascade="all, delete-orphan", lazy="dynamic")
 
     def update_last_login(self):
-        """Update last login timestamp."""
-        self.last_login = func.now()
-        db.session.commit()
+        """Queue a last login timestamp update (written in batches, see last_login.py)."""
+        from .last_login import record_login
+        record_login(self.id)
 
     @property
     def full_name(self):
@@ -44,6 +49,13 @@ class User(UserMixin, db.Model):
         return f"<User {self.username}>"
 
 
+# Username prefix lookups (utils.username_usage) use LIKE 'prefix%'; unless the database
+# uses the C collation, PostgreSQL needs a pattern_ops index to serve them.
+event.listen(User.__table__, "after_create", db.DDL(
+    'CREATE INDEX idx_user_username_prefix ON "user" (username varchar_pattern_ops)'
+).execute_if(dialect="postgresql"))
+
+
 class PaymentReminder(db.Model):
     __tablename__ = "payment_reminder"
 
@@ -56,16 +68,54 @@ class PaymentReminder(db.Model):
     pmt_amount = db.Column(db.Numeric(10, 2), nullable=False)
     notes = db.Column(db.Text)
     is_active = db.Column(db.Boolean, default=True, nullable=False)
+    # Recurrence: repeats every recurrence_interval days/weeks/months/years from pmt_date
+    # (no unit = one-off), optionally until recurrence_end
+    recurrence_unit = db.Column(db.String(10))  # None, "day", "week", "month", "year"
+    recurrence_interval = db.Column(db.Integer, default=1, nullable=False)
+    recurrence_end = db.Column(db.Date)
+    # Occurrences exist up to this date (see recurrence.py); None = not materialized yet
+    materialized_until = db.Column(db.Date)
+
+    # Relationships
+    occurrences = db.relationship("PaymentOccurrence", backref="payment", cascade="all, delete-orphan",
+                                  passive_deletes=True, lazy="dynamic")
 
     # Add index for common queries
     __table_args__ = (
         db.Index("idx_user_payment_date", "user_id", "pmt_date"),
+        db.Index("idx_payment_materialized", "is_active", "materialized_until"),
     )
 
+    @property
+    def is_recurring(self):
+        return self.recurrence_unit is not None
+
     def __repr__(self):
         return f"<PaymentReminder {self.name} - {self.pmt_amount}>"
 
 
+class PaymentOccurrence(db.Model):
+    """One due date of a payment reminder, materialized for a rolling window (see recurrence.py)."""
+    __tablename__ = "payment_occurrence"
+
+    id = db.Column(db.Integer, primary_key=True)
+    payment_id = db.Column(db.Integer, db.ForeignKey("payment_reminder.id", ondelete="CASCADE"), nullable=False)
+    # Copied from the reminder so date-range scans need no join
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
+    occurrence_date = db.Column(db.Date, nullable=False)
+    amount = db.Column(db.Numeric(10, 2), nullable=False)
+
+    __table_args__ = (
+        db.Index("idx_occurrence_user_date", "user_id", "occurrence_date"),
+        # Time-ordered sweeps across all users (see notifications.py)
+        db.Index("idx_occurrence_date", "occurrence_date", "payment_id"),
+        db.UniqueConstraint("payment_id", "occurrence_date", name="uq_occurrence_payment_date"),
+    )
+
+    def __repr__(self):
+        return f"<PaymentOccurrence {self.payment_id} on {self.occurrence_date}>"
+
+
 class ToDo(db.Model):
     __tablename__ = "todo"
 
@@ -79,6 +129,10 @@ class ToDo(db.Model):
     due_date = db.Column(db.Date)
     is_active = db.Column(db.Boolean, default=True, nullable=False)
     completed_date = db.Column(db.DateTime)
+    # Denormalized task counters, maintained by the ToDoTask event listeners below
+    total_tasks = db.Column(db.Integer, default=0, nullable=False)
+    completed_tasks = db.Column(db.Integer, default=0, nullable=False)
+    position = db.Column(db.Integer, default=0, nullable=False)  # drag-and-drop order within the user's board
 
     # Relationships
     tasks = db.relationship("ToDoTask", backref="todo", cascade="all, delete-orphan", lazy="dynamic")
@@ -87,48 +141,77 @@ class ToDo(db.Model):
     __table_args__ = (
         db.Index("idx_user_status", "user_id", "status"),
         db.Index("idx_user_due_date", "user_id", "due_date"),
+        db.Index("idx_user_position", "user_id", "position"),
+        # Time-ordered sweeps across all users (see notifications.py)
+        db.Index("idx_todo_due_date", "due_date", "id"),
     )
 
-    def update_status(self):
-        total_tasks = self.tasks.count()
-
-        if total_tasks == 0:
-            self.status = 0
-            self.completed_date = None
-            return
-
-        completed_tasks = self.tasks.filter_by(status=1).count()
-
+    @staticmethod
+    def status_for(total_tasks, completed_tasks):
+        """Return the status implied by the given task counters."""
+        if total_tasks == 0 or completed_tasks == 0:
+            return 0
         if completed_tasks == total_tasks:
-            self.status = 2
-            self.completed_date = dt.utcnow()
-        elif completed_tasks > 0:
-            self.status = 1
-            self.completed_date = None
-        else:
-            self.status = 0
-            self.completed_date = None
+            return 2
+        return 1
+
+    def update_status(self):
+        """Recompute status from the task counters (no queries)."""
+        self.status = ToDo.status_for(self.total_tasks or 0, self.completed_tasks or 0)
+        self.completed_date = dt.utcnow() if self.status == 2 else None
+
+    @staticmethod
+    def percentage_for(total_tasks, completed_tasks):
+        """Return the completion percentage implied by the given task counters."""
+        if not total_tasks:
+            return 0
+        return (completed_tasks / total_tasks) * 100
 
     @property
     def completion_percentage(self):
         """Calculate completion percentage based on tasks."""
-        total_tasks = self.tasks.count()
-        if total_tasks == 0:
-            return 0
-        completed_tasks = self.tasks.filter_by(status=1).count()
-        return (completed_tasks / total_tasks) * 100
+        return ToDo.percentage_for(self.total_tasks, self.completed_tasks)
 
     def __repr__(self):
         return f"<ToDo {self.name} - Status {self.status}>"
 
 
+class Notification(db.Model):
+    """Outbox of due-date notifications, written by the scheduler and drained by its backend."""
+    __tablename__ = "notification"
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), nullable=False, index=True)
+    kind = db.Column(db.String(20), nullable=False)  # "todo_due", "payment_due"
+    entity_id = db.Column(db.Integer, nullable=False)  # todo id or payment reminder id
+    due_date = db.Column(db.Date, nullable=False)
+    title = db.Column(db.String(255), nullable=False)
+    created_date = db.Column(db.DateTime, default=func.now())
+    delivered_at = db.Column(db.DateTime)
+    claimed_at = db.Column(db.DateTime)  # being sent by a process since then (dialects without SKIP LOCKED)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        # One notification per item and due date, however often it is fired
+        db.UniqueConstraint("kind", "entity_id", "due_date", name="uq_notification_entity_due"),
+        db.Index("idx_notification_pending", "delivered_at", "id"),
+    )
+
+    def __repr__(self):
+        return f"<Notification {self.kind}:{self.entity_id} due {self.due_date}>"
+
+
 class ToDoTask(db.Model):
     __tablename__ = "todo_task"
 
     id = db.Column(db.Integer, primary_key=True)
-    to_do_id = db.Column(db.Integer, db.ForeignKey("todo.id", ondelete="CASCADE"), nullable=False, index=True)
+    # active_history so the listener always sees the previous todo and status, even on an
+    # expired instance (e.g. one changed again after a commit)
+    to_do_id = db.column_property(db.Column(db.Integer, db.ForeignKey("todo.id", ondelete="CASCADE"),
+                                            nullable=False, index=True), active_history=True)
     text_content = db.Column(db.Text, nullable=False)
-    status = db.Column(db.SmallInteger, default=0, nullable=False)  # 0=pending, 1=completed
+    status = db.column_property(db.Column(db.SmallInteger, default=0, nullable=False),
+                                active_history=True)  # 0=pending, 1=completed
     position = db.Column(db.Integer, default=0)
     created_date = db.Column(db.DateTime, default=func.now())
     updated_date = db.Column(db.DateTime, default=func.now(), onupdate=func.now())
@@ -158,6 +241,38 @@ class Note(db.Model):
         return f"<Note {self.title or 'Untitled'}>"
 
 
+# --- Full-text search schema for notes (see search.py) ---
+# PostgreSQL: generated, weighted tsvector column with a GIN index on (user_id, search_vector).
+# SQLite: external-content FTS5 table kept in sync by triggers, for local development.
+NOTE_SEARCH_DDL = {
+    "postgresql": [
+        "CREATE EXTENSION IF NOT EXISTS btree_gin",
+        "ALTER TABLE note ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(text_content, '')), 'B')) STORED",
+        "CREATE INDEX idx_note_search ON note USING GIN (user_id, search_vector)",
+    ],
+    "sqlite": [
+        "CREATE VIRTUAL TABLE note_fts USING fts5("
+        "title, text_content, content='note', content_rowid='id', tokenize='porter unicode61')",
+        "CREATE TRIGGER note_fts_insert AFTER INSERT ON note BEGIN "
+        "INSERT INTO note_fts(rowid, title, text_content) VALUES (new.id, new.title, new.text_content); END",
+        "CREATE TRIGGER note_fts_delete AFTER DELETE ON note BEGIN "
+        "INSERT INTO note_fts(note_fts, rowid, title, text_content) "
+        "VALUES ('delete', old.id, old.title, old.text_content); END",
+        "CREATE TRIGGER note_fts_update AFTER UPDATE OF title, text_content ON note BEGIN "
+        "INSERT INTO note_fts(note_fts, rowid, title, text_content) "
+        "VALUES ('delete', old.id, old.title, old.text_content); "
+        "INSERT INTO note_fts(rowid, title, text_content) VALUES (new.id, new.title, new.text_content); END",
+    ],
+}
+
+for _dialect, _statements in NOTE_SEARCH_DDL.items():
+    for _statement in _statements:
+        event.listen(Note.__table__, "after_create", db.DDL(_statement).execute_if(dialect=_dialect))
+event.listen(Note.__table__, "before_drop", db.DDL("DROP TABLE IF EXISTS note_fts").execute_if(dialect="sqlite"))
+
+
 class FieldHistory(db.Model):
     __tablename__ = "field_history"
 
@@ -167,7 +282,7 @@ class FieldHistory(db.Model):
     field = db.Column(db.String(100), nullable=False)
     old_value = db.Column(db.Text)
     new_value = db.Column(db.Text)
-    changed_date = db.Column(db.DateTime, default=func.now())
+    changed_date = db.Column(db.DateTime, default=func.now(), nullable=False)  # partition key on PostgreSQL
     changed_by_user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=True)
 
     __table_args__ = (
@@ -179,18 +294,116 @@ class FieldHistory(db.Model):
         return f"<FieldHistory {self.entity_type}:{self.entity_id} {self.field}>"
 
 
+# --- Range partitioning of field_history by month (PostgreSQL; see history.py) ---
+# The primary key has to include the partition key, so the table created from
+# the model is replaced by a partitioned one while it is still empty. Monthly
+# partitions are added by `flask history partitions`; anything outside them
+# goes to the default partition until its month's partition is created.
+FIELD_HISTORY_PARTITION_DDL = [
+    "DROP TABLE field_history",
+    "CREATE TABLE field_history ("
+    "id SERIAL NOT NULL, "
+    "entity_type VARCHAR(50) NOT NULL, "
+    "entity_id INTEGER NOT NULL, "
+    "field VARCHAR(100) NOT NULL, "
+    "old_value TEXT, "
+    "new_value TEXT, "
+    "changed_date TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now(), "
+    "changed_by_user_id INTEGER REFERENCES \"user\" (id), "
+    "PRIMARY KEY (id, changed_date)"
+    ") PARTITION BY RANGE (changed_date)",
+    "CREATE INDEX idx_entity_lookup ON field_history (entity_type, entity_id)",
+    "CREATE INDEX idx_changed_date ON field_history (changed_date)",
+    "CREATE TABLE field_history_default PARTITION OF field_history DEFAULT",
+]
+
+for _statement in FIELD_HISTORY_PARTITION_DDL:
+    event.listen(FieldHistory.__table__, "after_create", db.DDL(_statement).execute_if(dialect="postgresql"))
+
+
+# --- Timestamp resolution on SQLite ---
+# now() compiles to CURRENT_TIMESTAMP there, which has whole seconds: an edit in the same second as
+# a list's previous GET would keep its (count, newest change) token and get a stale 304 (see
+# conditional.py). Millisecond timestamps keep the database as the single clock. They are padded
+# to the six fractional digits SQLAlchemy binds datetimes with, since SQLite compares the stored
+# strings: "...44.382" sorts before "...44.382000", so a keyset cursor (pagination.py) would
+# match its own boundary row again.
+@compiles(sql_now, "sqlite")
+def _sqlite_now(element, compiler, **kw):
+    return "STRFTIME('%Y-%m-%d %H:%M:%f000', 'now')"
+
+
 # --- Event Listeners to auto-update ToDo status ---
+def todo_counter_update(todo_id, total_delta, completed_delta, now):
+    """Build the UPDATE that shifts a ToDo's task counters and recomputes its status from them."""
+    todo_table = ToDo.__table__
+    total = todo_table.c.total_tasks + total_delta
+    completed = todo_table.c.completed_tasks + completed_delta
+
+    return (
+        todo_table.update()
+        .where(todo_table.c.id == todo_id)
+        .values(
+            total_tasks=total,
+            completed_tasks=completed,
+            status=case((total == 0, 0), (completed == 0, 0), (completed == total, 2), else_=1),
+            completed_date=case((and_(total > 0, completed == total), now), else_=None),
+        )
+    )
+
+
+def update_todo_status(connection, session, todo_id, total_delta, completed_delta):
+    """Apply task counter deltas to a ToDo and recompute its status.
+
+    The counters are adjusted relative to their stored values in a single
+    UPDATE, so concurrent task changes on the same todo stay exact. If the
+    todo is loaded in the session its attributes are synced without
+    marking it dirty.
+    """
+    if not total_delta and not completed_delta:
+        return
+
+    now = dt.utcnow()
+    connection.execute(todo_counter_update(todo_id, total_delta, completed_delta, now))
+
+    todo = session.identity_map.get(identity_key(ToDo, todo_id)) if session else None
+    if todo is None or "total_tasks" not in todo.__dict__ or "completed_tasks" not in todo.__dict__:
+        return
+
+    new_total = todo.total_tasks + total_delta
+    new_completed = todo.completed_tasks + completed_delta
+    new_status = ToDo.status_for(new_total, new_completed)
+    set_committed_value(todo, "total_tasks", new_total)
+    set_committed_value(todo, "completed_tasks", new_completed)
+    set_committed_value(todo, "status", new_status)
+    set_committed_value(todo, "completed_date", now if new_status == 2 else None)
+
+
 @event.listens_for(ToDoTask, "after_insert")
-@event.listens_for(ToDoTask, "after_update")
+def task_inserted(mapper, connection, target):
+    update_todo_status(connection, object_session(target), target.to_do_id, 1, int(target.status == 1))
+
+
 @event.listens_for(ToDoTask, "after_delete")
-def update_todo_status(mapper, connection, target):
-    """Automatically update ToDo status when tasks change."""
-    session = db.session.object_session(target)
-    if not session:
-        return
+def task_deleted(mapper, connection, target):
+    update_todo_status(connection, object_session(target), target.to_do_id, -1, -int(target.status == 1))
+
 
-    todo = session.get(ToDo, target.to_do_id)
-    if todo:
-        todo.update_status()
-        session.add(todo)
-        # Don't commit here as it might interfere with the main transaction
\ No newline at end of file
+@event.listens_for(ToDoTask, "after_update")
+def task_updated(mapper, connection, target):
+    state = inspect(target)
+    todo_history = state.attrs.to_do_id.history
+    status_history = state.attrs.status.history
+    if not todo_history.has_changes() and not status_history.has_changes():
+        return  # e.g. text or position edits don't affect the counters
+
+    session = object_session(target)
+    old_todo_id = todo_history.deleted[0] if todo_history.deleted else target.to_do_id
+    old_done = int((status_history.deleted[0] if status_history.deleted else target.status) == 1)
+    new_done = int(target.status == 1)
+
+    if old_todo_id != target.to_do_id:
+        update_todo_status(connection, session, old_todo_id, -1, -old_done)
+        update_todo_status(connection, session, target.to_do_id, 1, new_done)
+    else:
+        update_todo_status(connection, session, target.to_do_id, 0, new_done - old_done)
@@ -0,0 +1,404 @@
+import heapq
+import logging
+import threading
+import time
+from datetime import datetime, time as day_time, timedelta
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import delete, exists, literal, or_, select, tuple_, update
+from werkzeug.utils import import_string
+from . import db
+from .background import PeriodicFlusher, advisory_lock
+from .metrics import register_collector
+from .models import Notification, PaymentOccurrence, PaymentReminder, ToDo
+from .pagination import SortKey, keyset_condition
+from .recurrence import insert_ignoring_duplicates
+
+logger = logging.getLogger(__name__)
+
+TODO_DUE = 'todo_due'
+PAYMENT_DUE = 'payment_due'
+# pg_try_advisory_lock key held for a sweep, so only one process sweeps at a time
+SWEEP_LOCK_KEY = 0x6e6f7469
+# Dialects whose SELECT ... FOR UPDATE SKIP LOCKED lets concurrent deliverers take disjoint rows;
+# elsewhere rows are claimed with an UPDATE before they are sent
+SKIP_LOCKED_DIALECTS = {'postgresql'}
+
+
+# --- Delivery backends ---
+
+class NotificationBackend:
+    """
+    Interface for delivering outbox notifications.
+
+    send() gets a batch of notification dicts and returns the ids it
+    delivered; the rest are retried on a later sweep. A real transport
+    (email, push, ...) is plugged in by setting NOTIFY_BACKEND to its
+    import path, e.g. "mypkg.notify:EmailBackend".
+    """
+
+    @classmethod
+    def from_config(cls, config):
+        return cls()
+
+    def send(self, notifications):
+        raise NotImplementedError
+
+
+class LogBackend(NotificationBackend):
+    """Write each notification to the application log."""
+
+    def send(self, notifications):
+        for notification in notifications:
+            logger.info('Notify user %s: %s due %s', notification['user_id'], notification['title'],
+                        notification['due_date'].isoformat())
+        return [notification['id'] for notification in notifications]
+
+
+class MemoryBackend(NotificationBackend):
+    """Keep delivered notifications in a list (tests, local development)."""
+
+    def __init__(self):
+        self.sent = []
+        self._lock = threading.Lock()
+
+    def send(self, notifications):
+        with self._lock:
+            self.sent.extend(notifications)
+        return [notification['id'] for notification in notifications]
+
+
+BACKENDS = {
+    'log': LogBackend,
+    'memory': MemoryBackend,
+}
+
+
+def make_backend(config):
+    """Create the delivery backend named by NOTIFY_BACKEND ("log", "memory" or an import path)."""
+    backend = config.get('NOTIFY_BACKEND', 'log')
+    backend_cls = BACKENDS.get(backend) or import_string(backend)
+    return backend_cls.from_config(config)
+
+
+# --- Sources: what can be due, swept in (date, id) order ---
+
+class DueSource:
+    """
+    One kind of due item, read in keyset batches ordered by its date.
+
+    Subclasses provide the date/id sort keys and the still-valid filter; the
+    INSERT ... SELECT that writes fired items to the outbox re-checks that
+    filter, so items completed or moved after they were loaded are skipped.
+    """
+
+    kind = None
+    keys = ()
+
+    def base_query(self):
+        raise NotImplementedError
+
+    def batch(self, cursor, first_due, last_due, limit):
+        """Next items after cursor due between first_due and last_due, not yet in the outbox."""
+        due, entity_id = self.keys[0].column, self.keys[1].column
+        already_sent = exists().where(Notification.kind == self.kind, Notification.entity_id == entity_id,
+                                      Notification.due_date == due)
+        stmt = self.base_query().where(due >= first_due, due <= last_due, ~already_sent)
+        if cursor is not None:
+            stmt = stmt.where(keyset_condition(self.keys, cursor))
+        stmt = stmt.order_by(*[key.order_by for key in self.keys]).limit(limit)
+        return db.session.execute(stmt).all()
+
+    def outbox_insert(self, pairs, now):
+        """INSERT ... SELECT writing the still-valid (entity id, due date) pairs to the outbox."""
+        query = self.base_query().where(tuple_(self.keys[1].column, self.keys[0].column).in_(pairs))
+        rows = query.with_only_columns(
+            query.selected_columns.user_id,
+            literal(self.kind),
+            query.selected_columns.entity_id,
+            query.selected_columns.due_date,
+            query.selected_columns.title,
+            literal(now),
+        )
+        return insert_ignoring_duplicates(Notification.__table__, db.engine.dialect.name).from_select(
+            ['user_id', 'kind', 'entity_id', 'due_date', 'title', 'created_date'], rows)
+
+
+class TodoSource(DueSource):
+    kind = TODO_DUE
+    keys = (SortKey(ToDo.due_date), SortKey(ToDo.id))
+
+    def base_query(self):
+        return select(ToDo.user_id, ToDo.id.label('entity_id'), ToDo.due_date.label('due_date'),
+                      ToDo.name.label('title')).where(ToDo.is_active == True, ToDo.status != 2)
+
+
+class PaymentSource(DueSource):
+    kind = PAYMENT_DUE
+    keys = (SortKey(PaymentOccurrence.occurrence_date), SortKey(PaymentOccurrence.payment_id))
+
+    def base_query(self):
+        return (select(PaymentOccurrence.user_id, PaymentOccurrence.payment_id.label('entity_id'),
+                       PaymentOccurrence.occurrence_date.label('due_date'), PaymentReminder.name.label('title'))
+                .join(PaymentReminder, PaymentReminder.id == PaymentOccurrence.payment_id)
+                .where(PaymentReminder.is_active == True))
+
+
+SOURCES = (TodoSource(), PaymentSource())
+
+
+# --- Scheduler ---
+
+class NotificationScheduler:
+    """
+    Fire due-date notifications into the outbox and hand them to the backend.
+
+    Items are read from the date-ordered indexes in keyset batches, only as
+    far ahead as `lookahead`, into a min-heap of fire times capped at
+    `heap_size` entries (split between the sources); because each source is
+    swept in time order the heap always holds its earliest items and memory stays bounded however many users
+    there are. Each sweep pops what is due, writes it with one idempotent
+    INSERT ... SELECT per kind (the outbox is unique per item and due date),
+    and delivers pending outbox rows in batches. Every `rescan` seconds the
+    heap is rebuilt so items created or changed in the swept range are seen.
+    """
+
+    def __init__(self, backend, lead_days=1, hour=9, lookahead=timedelta(days=1), heap_size=10000,
+                 batch_size=1000, rescan=600, max_attempts=5, retention_days=30, claim_timeout=300,
+                 sources=SOURCES):
+        self.backend = backend
+        self.lead_days = lead_days
+        self.hour = hour
+        self.lookahead = lookahead
+        self.heap_size = heap_size
+        self.batch_size = batch_size
+        self.rescan = rescan
+        self.max_attempts = max_attempts
+        self.retention_days = retention_days
+        self.claim_timeout = timedelta(seconds=claim_timeout)
+        self.sources = sources
+        self._lock = threading.Lock()
+        self._heap = []
+        self._cursors = {}
+        self._held = {}
+        self._last_rescan = None
+        self.fired = 0
+        self.delivered = 0
+        self.failed = 0
+        self.last_sweep_seconds = 0.0
+
+    def fire_at(self, due):
+        """Notifications go out lead_days before the due date, at `hour` o'clock (UTC)."""
+        return datetime.combine(due - timedelta(days=self.lead_days), day_time(self.hour))
+
+    def sweep(self, now=None):
+        """Run one pass; needs an app context. Returns (fired, delivered), (0, 0) if another process is sweeping."""
+        with self._lock, advisory_lock(db, SWEEP_LOCK_KEY) as acquired:
+            if not acquired:
+                return 0, 0
+            started = time.perf_counter()
+            now = now or datetime.utcnow()
+            if self._last_rescan is None or (now - self._last_rescan).total_seconds() >= self.rescan:
+                self._reset(now)
+            self._refill(now)
+            fired = self._fire(now)
+            delivered = self.deliver()
+            self.last_sweep_seconds = time.perf_counter() - started
+            return fired, delivered
+
+    def _reset(self, now):
+        self._heap.clear()
+        self._cursors = {source.kind: None for source in self.sources}
+        self._held = {source.kind: 0 for source in self.sources}
+        self._last_rescan = now
+        # Past due dates are never reloaded, so their outbox rows are no longer needed for dedup
+        db.session.execute(delete(Notification).where(
+            Notification.due_date < now.date() - timedelta(days=self.retention_days),
+            Notification.delivered_at != None))
+        db.session.commit()
+
+    def _refill(self, now):
+        # Everything that fires within the lookahead, i.e. due up to this date
+        last_due = (now + self.lookahead).date() + timedelta(days=self.lead_days)
+        # Each source gets its own share of the heap: a source is only time-ordered within
+        # itself, so one source's later items must not crowd out another's earlier ones
+        share = max(self.heap_size // len(self.sources), 1)
+        for source in self.sources:
+            cursor = self._cursors[source.kind]
+            while self._held[source.kind] < share:
+                # Past-due items are not notified; items whose fire time passed go out now
+                rows = source.batch(cursor, now.date(), last_due,
+                                    min(self.batch_size, share - self._held[source.kind]))
+                if not rows:
+                    break
+                for row in rows:
+                    heapq.heappush(self._heap, (self.fire_at(row.due_date), source.kind, row.entity_id,
+                                                row.due_date))
+                self._held[source.kind] += len(rows)
+                cursor = [rows[-1].due_date, rows[-1].entity_id]
+            self._cursors[source.kind] = cursor
+
+    def _fire(self, now):
+        due = {}
+        while self._heap and self._heap[0][0] <= now:
+            _, kind, entity_id, due_date = heapq.heappop(self._heap)
+            self._held[kind] -= 1
+            due.setdefault(kind, []).append((entity_id, due_date))
+
+        fired = 0
+        for source in self.sources:
+            pairs = due.get(source.kind)
+            for start in range(0, len(pairs or ()), self.batch_size):
+                result = db.session.execute(source.outbox_insert(pairs[start:start + self.batch_size], now))
+                fired += max(result.rowcount, 0)
+        db.session.commit()
+        self.fired += fired
+        return fired
+
+    def deliver(self):
+        """Hand pending outbox rows to the backend in batches; returns how many were delivered."""
+        delivered = 0
+        skip_locked = db.engine.dialect.name in SKIP_LOCKED_DIALECTS
+        while True:
+            # Claims older than claim_timeout belong to a process that died before sending
+            unclaimed = _unclaimed(datetime.utcnow() - self.claim_timeout)
+            pending = (
+                select(Notification.id, Notification.user_id, Notification.kind, Notification.entity_id,
+                       Notification.due_date, Notification.title)
+                .where(Notification.delivered_at == None, Notification.attempts < self.max_attempts, unclaimed)
+                .order_by(Notification.id)
+                .limit(self.batch_size)
+            )
+            if skip_locked:
+                # Several workers may deliver at once; each takes rows the others have not locked
+                rows = db.session.execute(pending.with_for_update(skip_locked=True)).all()
+            else:
+                rows = db.session.execute(pending).all()
+            if not rows:
+                return delivered
+            if not skip_locked:
+                rows = _claim(rows, unclaimed)
+                if not rows:
+                    continue  # another worker claimed the whole batch
+
+            notifications = [row._asdict() for row in rows]
+            try:
+                sent = set(self.backend.send(notifications))
+            except Exception:
+                logger.exception('Notification backend failed')
+                sent = set()
+            failed = [row.id for row in rows if row.id not in sent]
+
+            if sent:
+                db.session.execute(update(Notification).where(Notification.id.in_(sent))
+                                   .values(delivered_at=datetime.utcnow())
+                                   .execution_options(synchronize_session=False))
+            if failed:
+                # Releases the claim, so a later sweep retries them
+                db.session.execute(update(Notification).where(Notification.id.in_(failed))
+                                   .values(attempts=Notification.attempts + 1, claimed_at=None)
+                                   .execution_options(synchronize_session=False))
+            db.session.commit()
+            delivered += len(sent)
+            self.delivered += len(sent)
+            self.failed += len(failed)
+            if failed:
+                return delivered  # retry on the next sweep instead of spinning on a failing backend
+
+    def metric_lines(self):
+        return [
+            '# HELP notification_heap_size Upcoming notifications held in the scheduler heap.',
+            '# TYPE notification_heap_size gauge',
+            f'notification_heap_size {len(self._heap)}',
+            '# HELP notifications_fired_total Notifications written to the outbox.',
+            '# TYPE notifications_fired_total counter',
+            f'notifications_fired_total {self.fired}',
+            '# HELP notifications_delivered_total Notifications the backend delivered.',
+            '# TYPE notifications_delivered_total counter',
+            f'notifications_delivered_total {self.delivered}',
+            '# HELP notifications_failed_total Notification deliveries that failed (retried later).',
+            '# TYPE notifications_failed_total counter',
+            f'notifications_failed_total {self.failed}',
+            '# HELP notification_sweep_seconds Duration of the last scheduler sweep.',
+            '# TYPE notification_sweep_seconds gauge',
+            f'notification_sweep_seconds {self.last_sweep_seconds}',
+        ]
+
+
+def _unclaimed(stale):
+    """Condition for rows no process is sending: never claimed, or claimed before `stale`."""
+    return or_(Notification.claimed_at == None, Notification.claimed_at < stale)
+
+
+def _claim(rows, unclaimed):
+    """
+    Mark pending rows as being sent before they are sent, returning those this process got.
+
+    Without SKIP LOCKED two workers can read the same batch; the UPDATE only
+    matches rows still unclaimed, so each row is sent by one of them. Only a
+    successful send marks a row delivered: rows the backend does not deliver
+    are released again by deliver(), and the claim of a process that dies in
+    between expires after the scheduler's claim_timeout, so the row is sent
+    again (the outbox is unique per item and due date, so it is still one
+    notification).
+    """
+    ids = [row.id for row in rows]
+    claim = (update(Notification)
+             .where(Notification.id.in_(ids), Notification.delivered_at == None, unclaimed)
+             .values(claimed_at=datetime.utcnow())
+             .execution_options(synchronize_session=False))
+    if db.engine.dialect.update_returning:
+        claimed = set(db.session.scalars(claim.returning(Notification.id)))
+    else:
+        claimed = {row_id for row_id in ids
+                   if db.session.execute(claim.where(Notification.id == row_id)).rowcount}
+    db.session.commit()
+    return [row for row in rows if row.id in claimed]
+
+
+def init_notifications(app):
+    """Set up the scheduler, its delivery backend and background thread, and `flask notifications`."""
+    config = app.config
+    scheduler = NotificationScheduler(
+        make_backend(config),
+        lead_days=config['NOTIFY_LEAD_DAYS'],
+        hour=config['NOTIFY_HOUR'],
+        heap_size=config['NOTIFY_HEAP_SIZE'],
+        batch_size=config['NOTIFY_BATCH_SIZE'],
+        rescan=config['NOTIFY_RESCAN_INTERVAL'],
+        max_attempts=config['NOTIFY_MAX_ATTEMPTS'],
+        retention_days=config['NOTIFY_RETENTION_DAYS'],
+        claim_timeout=config['NOTIFY_CLAIM_TIMEOUT'],
+    )
+    app.extensions['notification_scheduler'] = scheduler
+    flusher = PeriodicFlusher(app, scheduler.sweep, config['NOTIFY_SWEEP_INTERVAL'],
+                              name='notification-scheduler', flush_on_stop=False)
+    app.extensions['notification_job'] = flusher
+    if config['NOTIFY_ENABLED']:
+        app.before_request(flusher.start)
+    register_collector(app, scheduler.metric_lines)
+    app.cli.add_command(notifications_cli)
+    return scheduler
+
+
+notifications_cli = AppGroup('notifications', help='Due-date notifications.')
+
+
+@notifications_cli.command('sweep')
+def sweep_command():
+    """Run one scheduler pass (fire due notifications and deliver the outbox)."""
+    fired, delivered = current_app.extensions['notification_scheduler'].sweep()
+    click.echo(f'Fired {fired}, delivered {delivered}.')
+
+
+@notifications_cli.command('run')
+def run_command():
+    """Run the scheduler in the foreground, one sweep every NOTIFY_SWEEP_INTERVAL seconds."""
+    scheduler = current_app.extensions['notification_scheduler']
+    interval = current_app.config['NOTIFY_SWEEP_INTERVAL']
+    while True:
+        started = time.monotonic()
+        fired, delivered = scheduler.sweep()
+        click.echo(f'{datetime.utcnow():%Y-%m-%d %H:%M:%S} fired {fired}, delivered {delivered}')
+        time.sleep(max(interval - (time.monotonic() - started), 0))
@@ -0,0 +1,134 @@
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from flask import request
+from sqlalchemy import and_, false, literal, or_, tuple_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+class SortKey:
+    """
+    One column of a keyset ordering.
+
+    Args:
+        column: Column to order by
+        descending (bool): Sort direction
+        nullable (bool): Whether the column can be NULL (NULLs sort last)
+    """
+
+    def __init__(self, column, descending=False, nullable=False):
+        self.column = column
+        self.descending = descending
+        self.nullable = nullable
+
+    @property
+    def order_by(self):
+        clause = self.column.desc() if self.descending else self.column.asc()
+        return clause.nulls_last() if self.nullable else clause
+
+    def equals(self, value):
+        return self.column.is_(None) if value is None else self.column == value
+
+    def after(self, value):
+        """Condition for rows strictly after value on this column, or None if there are none."""
+        if value is None:
+            return None  # NULLs sort last, nothing comes after them
+        clause = self.column < value if self.descending else self.column > value
+        return or_(clause, self.column.is_(None)) if self.nullable else clause
+
+    def decode(self, value):
+        if value is None:
+            return None
+        python_type = self.column.type.python_type
+        if python_type is datetime:
+            return datetime.fromisoformat(value)
+        if python_type is date:
+            return date.fromisoformat(value)
+        if python_type is Decimal:
+            return Decimal(value)
+        return python_type(value)
+
+
+def encode_cursor(values):
+    """Encode the sort values of the last row of a page into an opaque cursor."""
+    payload = [v.isoformat() if isinstance(v, (date, datetime)) else str(v) if isinstance(v, Decimal) else v
+               for v in values]
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, keys):
+    """Decode a cursor produced by encode_cursor back into typed sort values."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError('wrong number of values')
+        return [key.decode(value) for key, value in zip(keys, values)]
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f'Invalid cursor: {e}') from e
+
+
+def keyset_condition(keys, values):
+    """Build the WHERE condition selecting rows after the given sort values."""
+    same_direction = len({key.descending for key in keys}) == 1
+    if same_direction and not any(key.nullable for key in keys):
+        # Row-value comparison lets the database seek straight into the index
+        columns = tuple_(*[key.column for key in keys])
+        # Typed binds, so values are stored-format strings on SQLite as in the column comparisons
+        values_tuple = tuple_(*[literal(value, key.column.type) for key, value in zip(keys, values)])
+        return columns < values_tuple if keys[0].descending else columns > values_tuple
+
+    clauses = []
+    for i, key in enumerate(keys):
+        after = key.after(values[i])
+        if after is not None:
+            clauses.append(and_(*[k.equals(v) for k, v in zip(keys[:i], values[:i])], after))
+    return or_(*clauses) if clauses else false()
+
+
+def paginate(session, stmt, keys, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Run stmt as one keyset (seek) page.
+
+    The sort columns must be selected by stmt under their own names and the
+    last key must be unique (e.g. the primary key). Unlike OFFSET, the cost
+    of a page does not grow with how deep into the list it is.
+
+    Args:
+        session: SQLAlchemy session to execute with
+        stmt: Select statement, already filtered but not ordered
+        keys (list): SortKey instances, most significant first
+        cursor (str): Cursor returned with the previous page, or None
+        limit (int): Page size
+
+    Returns:
+        tuple: (rows, next_cursor) where next_cursor is None on the last page
+    """
+    if cursor:
+        stmt = stmt.where(keyset_condition(keys, decode_cursor(cursor, keys)))
+    stmt = stmt.order_by(*[key.order_by for key in keys]).limit(limit + 1)
+
+    rows = session.execute(stmt).all()
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]._mapping
+    return rows, encode_cursor([last[key.column.key] for key in keys])
+
+
+def page_args(default_limit=DEFAULT_PAGE_SIZE):
+    """Read (cursor, limit) from the query string, clamping the limit."""
+    cursor = request.args.get('cursor') or None
+    try:
+        limit = int(request.args.get('limit', default_limit))
+    except ValueError:
+        limit = default_limit
+    return cursor, max(1, min(limit, MAX_PAGE_SIZE))
@@ -0,0 +1,193 @@
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+from .metrics import DURATION_BUCKETS, Histogram, register_collector
+
+BENCHMARK_PASSWORD = 'correct horse battery staple'
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when no hashing slot frees up within PASSWORD_HASH_TIMEOUT seconds."""
+
+
+def normalize_method(method):
+    """
+    Spell out a Werkzeug hash method with its defaults, as stored in the hash prefix.
+
+    Args:
+        method (str): e.g. "scrypt", "scrypt:65536:8:1" or "pbkdf2:sha256"
+
+    Returns:
+        str: e.g. "scrypt:32768:8:1" or "pbkdf2:sha256:1000000"
+    """
+    name, *args = method.split(':')
+    if name == 'scrypt':
+        n, r, p = args or (2 ** 15, 8, 1)
+        return f'scrypt:{int(n)}:{int(r)}:{int(p)}'
+    if name == 'pbkdf2':
+        hash_name = args[0] if args else 'sha256'
+        iterations = int(args[1]) if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f'pbkdf2:{hash_name}:{iterations}'
+    raise ValueError(f"Invalid hash method '{method}'.")
+
+
+class PasswordHasher:
+    """
+    Run password hashing on a small thread pool instead of the request thread.
+
+    hashlib's scrypt and pbkdf2 release the GIL, so at most `workers` hashes
+    use CPU at once however many logins arrive; up to `queue_size` more wait
+    for a worker and anything beyond that waits at most `timeout` seconds for
+    a slot before PasswordHasherBusy is raised. Queue wait and hash time are
+    exported at /metrics.
+    """
+
+    def __init__(self, method, workers=2, queue_size=32, timeout=5.0):
+        self.method = normalize_method(method)
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self.in_flight = 0
+        self.rejected = 0
+        self.queue_time = Histogram('password_hash_queue_seconds',
+                                    'Time a password hash waited for a worker in seconds.',
+                                    DURATION_BUCKETS, label_name='operation')
+        self.hash_time = Histogram('password_hash_duration_seconds',
+                                   'Time spent computing a password hash in seconds.',
+                                   DURATION_BUCKETS, label_name='operation')
+
+    def _pool(self):
+        # A forked worker inherits the executor but not its threads, so start a new one
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='password-hash')
+                self._pid = os.getpid()
+            return self._executor
+
+    def _run(self, operation, fn, *args):
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self.rejected += 1
+            raise PasswordHasherBusy('Too many password checks in progress')
+
+        submitted = time.perf_counter()
+
+        def timed():
+            started = time.perf_counter()
+            self.queue_time.observe(operation, started - submitted)
+            try:
+                return fn(*args)
+            finally:
+                self.hash_time.observe(operation, time.perf_counter() - started)
+
+        with self._lock:
+            self.in_flight += 1
+        try:
+            return self._pool().submit(timed).result()
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            self._slots.release()
+
+    def hash(self, password):
+        """Hash a password with the configured method."""
+        return self._run('hash', generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        """Check a password against a stored hash."""
+        return self._run('verify', check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True if the stored hash was made with other parameters than the configured ones."""
+        return password_hash.split('$', 1)[0] != self.method
+
+    def metric_lines(self):
+        with self._lock:
+            in_flight, rejected = self.in_flight, self.rejected
+        return [
+            '# HELP password_hash_in_flight Password hashes running or waiting for a worker.',
+            '# TYPE password_hash_in_flight gauge',
+            f'password_hash_in_flight {in_flight}',
+            '# HELP password_hash_rejected_total Password hashes refused because every slot was busy.',
+            '# TYPE password_hash_rejected_total counter',
+            f'password_hash_rejected_total {rejected}',
+        ] + self.queue_time.render() + self.hash_time.render()
+
+
+def init_passwords(app):
+    """Create the app's password hasher and add the `flask passwords` commands."""
+    hasher = PasswordHasher(
+        app.config['PASSWORD_HASH_METHOD'],
+        workers=app.config['PASSWORD_HASH_WORKERS'],
+        queue_size=app.config['PASSWORD_HASH_QUEUE_SIZE'],
+        timeout=app.config['PASSWORD_HASH_TIMEOUT'],
+    )
+    app.extensions['password_hasher'] = hasher
+    register_collector(app, hasher.metric_lines)
+    app.cli.add_command(passwords_cli)
+    return hasher
+
+
+def hash_password(password):
+    return current_app.extensions['password_hasher'].hash(password)
+
+
+def verify_password(user, password):
+    """
+    Check a user's password, upgrading the stored hash if its parameters are outdated.
+
+    The new hash is only set on the user; the caller commits it.
+
+    Args:
+        user (User): The user logging in
+        password (str): The submitted password
+
+    Returns:
+        bool: True if the password matches
+    """
+    hasher = current_app.extensions['password_hasher']
+    if not hasher.verify(user.password_hash, password):
+        return False
+    if hasher.needs_rehash(user.password_hash):
+        user.password_hash = hasher.hash(password)
+    return True
+
+
+def time_method(method, rounds):
+    """Hash a fixed password `rounds` times with method; returns the durations in seconds."""
+    durations = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        generate_password_hash(BENCHMARK_PASSWORD, method)
+        durations.append(time.perf_counter() - started)
+    return durations
+
+
+passwords_cli = AppGroup('passwords', help='Password hashing tools.')
+
+
+@passwords_cli.command('benchmark')
+@click.option('--method', 'methods', multiple=True,
+              help='Hash method to time (repeatable); defaults to PASSWORD_HASH_METHOD.')
+@click.option('--rounds', default=10, show_default=True, help='Hashes per method.')
+def benchmark_command(methods, rounds):
+    """Time password hashing on this host to size PASSWORD_HASH_* settings."""
+    hasher = current_app.extensions['password_hasher']
+    cpus = os.cpu_count() or 1
+    click.echo(f'{cpus} CPU(s); PASSWORD_HASH_WORKERS={hasher.workers}')
+    for method in methods or (hasher.method,):
+        method = normalize_method(method)
+        durations = time_method(method, rounds)
+        mean = statistics.mean(durations)
+        per_second = min(hasher.workers, cpus) / mean
+        click.echo(f'{method:<28} mean {mean * 1000:8.1f} ms  max {max(durations) * 1000:8.1f} ms  '
+                   f'~{per_second:.1f} logins/s with {min(hasher.workers, cpus)} worker(s)')
@@ -0,0 +1,290 @@
+import calendar
+import time
+from datetime import date, datetime, timedelta
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import delete, extract, func, insert, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from . import db
+from .background import PeriodicFlusher, advisory_lock
+from .models import PaymentReminder, PaymentOccurrence
+
+RECURRENCE_UNITS = ('day', 'week', 'month', 'year')
+# Reminders materialized per transaction by the job
+MATERIALIZE_BATCH_SIZE = 500
+# pg_try_advisory_lock key held for a run of the job, so only one process runs it at a time
+MATERIALIZE_LOCK_KEY = 0x706d7473
+
+
+def nth_occurrence(anchor, unit, interval, n):
+    """
+    Return the n-th due date (0 = anchor) of a reminder repeating every `interval` units.
+
+    Months and years are counted from the anchor, so a reminder on the 31st
+    falls on the last day of shorter months and returns to the 31st after.
+    """
+    if unit == 'day':
+        return anchor + timedelta(days=n * interval)
+    if unit == 'week':
+        return anchor + timedelta(weeks=n * interval)
+
+    months = anchor.year * 12 + anchor.month - 1 + n * interval * (12 if unit == 'year' else 1)
+    year, month = divmod(months, 12)
+    month += 1
+    return date(year, month, min(anchor.day, calendar.monthrange(year, month)[1]))
+
+
+def occurrence_dates(anchor, unit, interval, start, end, until=None):
+    """
+    Yield the due dates of a reminder between start and end (inclusive).
+
+    Args:
+        anchor (date): First due date (pmt_date)
+        unit (str): One of RECURRENCE_UNITS, or None for a one-off reminder
+        interval (int): Repeat every this many units
+        start (date): First date of the range
+        end (date): Last date of the range
+        until (date): Optional last date of the recurrence
+
+    Yields:
+        date: Due dates in order
+    """
+    end = min(end, until) if until else end
+    if unit is None:
+        if start <= anchor <= end:
+            yield anchor
+        return
+
+    interval = max(interval or 1, 1)
+    # Jump close to the start instead of walking from the anchor
+    if start <= anchor:
+        n = 0
+    elif unit in ('day', 'week'):
+        step = interval * (7 if unit == 'week' else 1)
+        n = (start - anchor).days // step
+    else:
+        months = (start.year - anchor.year) * 12 + start.month - anchor.month
+        n = max(months // (interval * (12 if unit == 'year' else 1)) - 1, 0)
+
+    while True:
+        due = nth_occurrence(anchor, unit, interval, n)
+        if due > end:
+            return
+        if due >= start:
+            yield due
+        n += 1
+
+
+def window_start(today):
+    """Occurrences are kept from the first day of the current month, so monthly totals are complete."""
+    return today.replace(day=1)
+
+
+def insert_ignoring_duplicates(table, dialect):
+    """INSERT that skips rows hitting a unique constraint (ON CONFLICT DO NOTHING) where supported."""
+    if dialect == 'postgresql':
+        return postgresql.insert(table).on_conflict_do_nothing()
+    if dialect == 'sqlite':
+        return sqlite.insert(table).on_conflict_do_nothing()
+    return insert(table)
+
+
+def materialize_occurrences(horizon_days, today=None, payment_ids=None, user_id=None):
+    """
+    Create missing occurrences of active reminders up to today + horizon_days.
+
+    Each reminder remembers how far it has been materialized, so a run only
+    adds the dates that entered the window since the last one. Reminders are
+    processed in batches of MATERIALIZE_BATCH_SIZE, one transaction each.
+
+    Args:
+        horizon_days (int): How many days ahead to materialize
+        today (date): Defaults to today
+        payment_ids (list): Limit the run to these reminders
+        user_id (int): Limit the run to this user's reminders
+
+    Returns:
+        int: Number of occurrences created
+    """
+    today = today or date.today()
+    first_day = window_start(today)
+    horizon = today + timedelta(days=horizon_days)
+    table = PaymentOccurrence.__table__
+    created = 0
+
+    while True:
+        stmt = (
+            select(PaymentReminder.id, PaymentReminder.user_id, PaymentReminder.pmt_date,
+                   PaymentReminder.pmt_amount, PaymentReminder.recurrence_unit,
+                   PaymentReminder.recurrence_interval, PaymentReminder.recurrence_end,
+                   PaymentReminder.materialized_until)
+            .where(PaymentReminder.is_active == True,
+                   or_(PaymentReminder.materialized_until == None, PaymentReminder.materialized_until < horizon))
+            .order_by(PaymentReminder.id)
+            .limit(MATERIALIZE_BATCH_SIZE)
+        )
+        if payment_ids is not None:
+            stmt = stmt.where(PaymentReminder.id.in_(payment_ids))
+        if user_id is not None:
+            stmt = stmt.where(PaymentReminder.user_id == user_id)
+        reminders = db.session.execute(stmt).all()
+        if not reminders:
+            return created
+
+        rows = []
+        for reminder in reminders:
+            start = first_day
+            if reminder.materialized_until:
+                start = max(start, reminder.materialized_until + timedelta(days=1))
+            rows.extend({
+                'payment_id': reminder.id,
+                'user_id': reminder.user_id,
+                'occurrence_date': due,
+                'amount': reminder.pmt_amount,
+            } for due in occurrence_dates(reminder.pmt_date, reminder.recurrence_unit,
+                                          reminder.recurrence_interval, start, horizon, reminder.recurrence_end))
+
+        if rows:
+            # Another worker may be materializing the same reminders; duplicates are skipped
+            db.session.execute(insert_ignoring_duplicates(table, db.engine.dialect.name), rows)
+        db.session.execute(
+            update(PaymentReminder)
+            .where(PaymentReminder.id.in_([reminder.id for reminder in reminders]))
+            .values(materialized_until=horizon)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        created += len(rows)
+
+
+def refresh_occurrences(payment, today=None):
+    """
+    Re-materialize one reminder after it was added or edited.
+
+    Its occurrences from the current month on are replaced, so changed dates,
+    amounts or rules (or deactivation) show up immediately. Commits.
+    """
+    today = today or date.today()
+    db.session.execute(delete(PaymentOccurrence).where(
+        PaymentOccurrence.payment_id == payment.id,
+        PaymentOccurrence.occurrence_date >= window_start(today)))
+    payment.materialized_until = None
+    materialize_occurrences(current_app.config['PAYMENT_OCCURRENCE_HORIZON_DAYS'], today, [payment.id])
+    # Commits the DELETE when nothing was materialized (e.g. the reminder was deactivated)
+    db.session.commit()
+
+
+def prune_occurrences(retention_days, today=None):
+    """Delete occurrences older than retention_days (never from the current month)."""
+    cutoff = min(window_start(today or date.today()), (today or date.today()) - timedelta(days=retention_days))
+    result = db.session.execute(delete(PaymentOccurrence).where(PaymentOccurrence.occurrence_date < cutoff))
+    db.session.commit()
+    return result.rowcount
+
+
+def run_materialize_job():
+    """
+    One pass of the background job: extend the window and drop expired occurrences.
+
+    Returns (0, 0) without doing anything if another process is running it.
+    """
+    config = current_app.config
+    with advisory_lock(db, MATERIALIZE_LOCK_KEY) as acquired:
+        if not acquired:
+            return 0, 0
+        created = materialize_occurrences(config['PAYMENT_OCCURRENCE_HORIZON_DAYS'])
+        pruned = prune_occurrences(config['PAYMENT_OCCURRENCE_RETENTION_DAYS'])
+    if created or pruned:
+        # Dashboards list upcoming occurrences; other workers' caches expire within their TTL
+        current_app.extensions['dashboard_cache'].clear()
+    return created, pruned
+
+
+# --- Range queries over (user_id, occurrence_date) ---
+
+def upcoming_occurrences(user_id, days, limit=None, today=None):
+    """
+    Return the user's occurrences due in the next `days` days, soonest first.
+
+    Args:
+        user_id (int): Owner
+        days (int): Size of the window starting today
+        limit (int): Optional maximum number of rows
+
+    Returns:
+        list: Rows with payment_id, name, occurrence_date and amount
+    """
+    today = today or date.today()
+    stmt = (
+        select(PaymentOccurrence.payment_id, PaymentReminder.name, PaymentOccurrence.occurrence_date,
+               PaymentOccurrence.amount)
+        .join(PaymentReminder, PaymentReminder.id == PaymentOccurrence.payment_id)
+        .where(PaymentOccurrence.user_id == user_id,
+               PaymentOccurrence.occurrence_date.between(today, today + timedelta(days=days)))
+        .order_by(PaymentOccurrence.occurrence_date, PaymentOccurrence.id)
+    )
+    if limit:
+        stmt = stmt.limit(limit)
+    return db.session.execute(stmt).all()
+
+
+def monthly_totals(user_id, months, today=None):
+    """
+    Return the amount due per month, from the current month for `months` months.
+
+    Args:
+        user_id (int): Owner
+        months (int): Number of months
+
+    Returns:
+        list: Rows with year, month, total and count (months without payments are omitted)
+    """
+    first_day = window_start(today or date.today())
+    end = nth_occurrence(first_day, 'month', 1, months)
+    year = extract('year', PaymentOccurrence.occurrence_date).label('year')
+    month = extract('month', PaymentOccurrence.occurrence_date).label('month')
+    stmt = (
+        select(year, month, func.sum(PaymentOccurrence.amount).label('total'), func.count().label('count'))
+        .where(PaymentOccurrence.user_id == user_id,
+               PaymentOccurrence.occurrence_date >= first_day,
+               PaymentOccurrence.occurrence_date < end)
+        .group_by(year, month)
+        .order_by(year, month)
+    )
+    return db.session.execute(stmt).all()
+
+
+def init_recurrence(app):
+    """Set up the background job that keeps the occurrence window filled, and `flask payments`."""
+    # Opt-in per web worker (PAYMENT_OCCURRENCE_JOB): each one would run it. On PostgreSQL the
+    # advisory lock keeps the runs apart, elsewhere nothing does, so run `flask payments run` or
+    # `flask payments materialize` from cron in a single process instead. The upgrade fills the
+    # current window (see the migration) and reminders are materialized when saved
+    flusher = PeriodicFlusher(app, run_materialize_job, app.config['PAYMENT_OCCURRENCE_INTERVAL'],
+                              name='payment-occurrences', flush_on_stop=False)
+    app.extensions['payment_occurrence_job'] = flusher
+    if app.config['PAYMENT_OCCURRENCE_JOB']:
+        app.before_request(flusher.start)
+    app.cli.add_command(payments_cli)
+
+
+payments_cli = AppGroup('payments', help='Payment reminder maintenance.')
+
+
+@payments_cli.command('materialize')
+def materialize_command():
+    """Materialize upcoming payment occurrences and prune expired ones (e.g. from cron)."""
+    created, pruned = run_materialize_job()
+    click.echo(f'Created {created} occurrences, pruned {pruned}.')
+
+
+@payments_cli.command('run')
+def run_command():
+    """Run the occurrence job in the foreground, once every PAYMENT_OCCURRENCE_INTERVAL seconds."""
+    interval = current_app.config['PAYMENT_OCCURRENCE_INTERVAL']
+    while True:
+        started = time.monotonic()
+        created, pruned = run_materialize_job()
+        click.echo(f'{datetime.utcnow():%Y-%m-%d %H:%M:%S} created {created}, pruned {pruned}')
+        time.sleep(max(interval - (time.monotonic() - started), 0))
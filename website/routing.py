@@ -0,0 +1,102 @@
+import os
+import random
+import time
+from flask import current_app, g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql.elements import TextClause
+
+REPLICA_BIND_PREFIX = 'replica_'
+READ_METHODS = {'GET', 'HEAD'}
+LAST_WRITE_KEY = 'db_last_write'
+
+
+class RoutingSession(Session):
+    """
+    Session that sends reads of @read_replica views to a replica.
+
+    Everything else - flushes, DML, text() statements, requests that already
+    wrote, and CLI/background work - goes to the binds Flask-SQLAlchemy would
+    normally pick (the primary for all models in this app).
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context():
+            if self._flushing or _is_write(clause):
+                g.db_wrote = True
+            elif g.get('db_read_replica') and not g.get('db_wrote'):
+                replicas = current_app.extensions.get('db_replicas')
+                if replicas:
+                    return self._db.engines[random.choice(replicas)]
+
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _is_write(clause):
+    return clause is not None and (getattr(clause, 'is_dml', False) or isinstance(clause, TextClause))
+
+
+def read_replica(view):
+    """Mark a view whose GET requests may read from a replica (wrappers copy the flag)."""
+    view.read_replica = True
+    return view
+
+
+def pool_options(prefix):
+    """
+    Engine pool options for one bind, read from <prefix>_POOL_SIZE,
+    <prefix>_MAX_OVERFLOW, <prefix>_POOL_RECYCLE, <prefix>_POOL_TIMEOUT and
+    <prefix>_POOL_PRE_PING env variables.
+
+    Only the variables that are set are returned, so SQLAlchemy's defaults
+    (and the pool class it picks per dialect) apply otherwise.
+
+    Args:
+        prefix (str): Env variable prefix, e.g. "DB" or "REPLICA"
+
+    Returns:
+        dict: Options for create_engine()
+    """
+    options = {}
+    for name in ('pool_size', 'max_overflow', 'pool_recycle', 'pool_timeout'):
+        value = os.getenv(f'{prefix}_{name.upper()}')
+        if value:
+            options[name] = int(value)
+    pre_ping = os.getenv(f'{prefix}_POOL_PRE_PING')
+    if pre_ping:
+        options['pool_pre_ping'] = pre_ping.lower() == 'true'
+    return options
+
+
+def replica_binds(uris, options):
+    """Build SQLALCHEMY_BINDS entries for the given replica URIs."""
+    return {f'{REPLICA_BIND_PREFIX}{i}': dict(options, url=uri) for i, uri in enumerate(uris)}
+
+
+def init_routing(app):
+    """Enable replica reads for @read_replica views when replica binds are configured."""
+    binds = app.config.get('SQLALCHEMY_BINDS') or {}
+    app.extensions['db_replicas'] = [key for key in binds if key.startswith(REPLICA_BIND_PREFIX)]
+    app.before_request(_choose_bind)
+    app.after_request(_remember_write)
+
+
+def _choose_bind():
+    if not current_app.extensions['db_replicas'] or request.method not in READ_METHODS:
+        return
+
+    view = current_app.view_functions.get(request.endpoint)
+    if not getattr(view, 'read_replica', False):
+        return
+
+    # Read-your-writes: stay on the primary for a while after this browser session wrote
+    last_write = session.get(LAST_WRITE_KEY)
+    if last_write and time.time() - last_write < current_app.config['REPLICA_READ_YOUR_WRITES_SECONDS']:
+        return
+
+    g.db_read_replica = True
+
+
+def _remember_write(response):
+    if g.get('db_wrote') and current_app.extensions['db_replicas']:
+        session[LAST_WRITE_KEY] = time.time()
+    return response
@@ -0,0 +1,141 @@
+import re
+from markupsafe import Markup, escape
+from sqlalchemy import Double, Float, cast, column, func, literal_column, select, table
+from . import db
+from .models import Note
+from .pagination import SortKey, paginate
+
+DEFAULT_SEARCH_PAGE_SIZE = 20
+
+# SQLite FTS5 index of notes, created by the DDL in models.py
+NOTE_FTS = table('note_fts', column('rowid'), column('title'), column('text_content'))
+
+# Private-use characters mark highlights in the database output; they are
+# swapped for <mark> tags only after the text has been HTML-escaped.
+HIGHLIGHT_START = '\ue000'
+HIGHLIGHT_STOP = '\ue001'
+
+PG_HEADLINE_OPTIONS = (f'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, '
+                       'MaxFragments=2, MaxWords=20, MinWords=5, FragmentDelimiter=" … "')
+
+
+class SearchNotSupported(Exception):
+    """Raised when the database has no full-text search backend."""
+
+
+def search_notes(user_id, query, cursor=None, limit=DEFAULT_SEARCH_PAGE_SIZE):
+    """
+    Search a user's active notes by title and content.
+
+    Uses the GIN-indexed tsvector column on PostgreSQL and the FTS5 table on
+    SQLite. Results are ranked (best first), paginated with a keyset cursor
+    over (rank, id), and highlighted only for the rows of the page.
+
+    Args:
+        user_id (int): Id of the user whose notes to search
+        query (str): Free-text search query
+        cursor (str): Cursor of the previous page, or None
+        limit (int): Page size
+
+    Returns:
+        tuple: (list of result dicts, next page cursor or None)
+    """
+    dialect = db.session.get_bind(mapper=Note.__mapper__).dialect.name
+    if dialect == 'postgresql':
+        return _search_postgresql(user_id, query, cursor, limit)
+    if dialect == 'sqlite':
+        return _search_sqlite(user_id, query, cursor, limit)
+    raise SearchNotSupported(f'Full-text search is not available on {dialect}')
+
+
+def _search_postgresql(user_id, query, cursor, limit):
+    ts_query = func.websearch_to_tsquery('english', query)
+    search_vector = literal_column('note.search_vector')
+
+    matches = (
+        select(
+            Note.id,
+            Note.last_modified_date,
+            # ts_rank is real (float4); the cursor keeps the rank as a double and the next page
+            # compares against it, which would widen the column per row and miss ties. Widen it
+            # once here so the value in the cursor is exactly the value compared.
+            cast(func.ts_rank(search_vector, ts_query), Double).label('rank'),
+        )
+        .where(Note.user_id == user_id, Note.is_active == True, search_vector.op('@@')(ts_query))
+        .subquery()
+    )
+    rows, next_cursor = _ranked_page(matches, cursor, limit)
+    if not rows:
+        return [], next_cursor
+
+    highlights = db.session.execute(
+        select(
+            Note.id,
+            func.ts_headline('english', Note.title, ts_query,
+                             f'{PG_HEADLINE_OPTIONS}, HighlightAll=true').label('title'),
+            func.ts_headline('english', Note.text_content, ts_query, PG_HEADLINE_OPTIONS).label('snippet'),
+        ).where(Note.id.in_([row.id for row in rows]))
+    )
+    return _results(rows, {row.id: row for row in highlights}), next_cursor
+
+
+def _search_sqlite(user_id, query, cursor, limit):
+    match = _fts5_query(query)
+    if not match:
+        return [], None
+
+    fts = literal_column('note_fts')
+    matches = (
+        select(
+            Note.id,
+            Note.last_modified_date,
+            (-func.bm25(fts, type_=Float)).label('rank'),
+        )
+        .join(NOTE_FTS, NOTE_FTS.c.rowid == Note.id)
+        .where(Note.user_id == user_id, Note.is_active == True, fts.match(match))
+        .subquery()
+    )
+    rows, next_cursor = _ranked_page(matches, cursor, limit)
+    if not rows:
+        return [], next_cursor
+
+    highlights = db.session.execute(
+        select(
+            NOTE_FTS.c.rowid.label('id'),
+            func.highlight(fts, 0, HIGHLIGHT_START, HIGHLIGHT_STOP).label('title'),
+            func.snippet(fts, 1, HIGHLIGHT_START, HIGHLIGHT_STOP, ' … ', 20).label('snippet'),
+        ).where(fts.match(match), NOTE_FTS.c.rowid.in_([row.id for row in rows]))
+    )
+    return _results(rows, {row.id: row for row in highlights}), next_cursor
+
+
+def _ranked_page(matches, cursor, limit):
+    keys = [SortKey(matches.c.rank, descending=True), SortKey(matches.c.id, descending=True)]
+    stmt = select(matches.c.id, matches.c.last_modified_date, matches.c.rank)
+    return paginate(db.session, stmt, keys, cursor, limit)
+
+
+def _fts5_query(query):
+    """Turn free text into an FTS5 query that ANDs quoted terms, so user input is never parsed as syntax."""
+    terms = re.findall(r'\w+', query or '')
+    return ' '.join(f'"{term}"' for term in terms)
+
+
+def _results(rows, highlights):
+    results = []
+    for row in rows:
+        highlight = highlights.get(row.id)
+        results.append({
+            'id': row.id,
+            'title': _highlight_html(highlight.title if highlight else ''),
+            'snippet': _highlight_html(highlight.snippet if highlight else ''),
+            'last_modified_date': row.last_modified_date.isoformat() if row.last_modified_date else None,
+            'rank': row.rank,
+        })
+    return results
+
+
+def _highlight_html(value):
+    """Escape database text and turn highlight markers into <mark> tags."""
+    escaped = str(escape(value or ''))
+    return Markup(escaped.replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_STOP, '</mark>'))
@@ -0,0 +1,126 @@
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+import click
+from flask import current_app
+from sqlalchemy.exc import SQLAlchemyError
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_CHECK_MODES = ('off', 'warn', 'strict', 'create')
+
+
+class SchemaOutOfDate(RuntimeError):
+    """Raised in strict mode when the database is not at the Alembic head revision."""
+
+
+class StartupTimer:
+    """Wall-clock time of each startup phase (imports, config, extensions, ...)."""
+
+    def __init__(self):
+        self.phases = {}
+
+    def record(self, name, seconds):
+        self.phases[name] = seconds
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    @property
+    def total(self):
+        return sum(self.phases.values())
+
+    def report(self):
+        parts = [f'{name} {seconds * 1000:.1f} ms' for name, seconds in self.phases.items()]
+        return f"Startup: {', '.join(parts)} (total {self.total * 1000:.1f} ms)"
+
+    def metric_lines(self):
+        lines = ['# HELP app_startup_phase_seconds Time spent in each startup phase of this worker.',
+                 '# TYPE app_startup_phase_seconds gauge']
+        lines.extend(f'app_startup_phase_seconds{{phase="{name}"}} {seconds}' for name, seconds in self.phases.items())
+        return lines
+
+
+def migrations_directory(app):
+    """Absolute path of the Alembic scripts used by Flask-Migrate."""
+    directory = app.extensions['migrate'].directory
+    if os.path.isabs(directory):
+        return directory
+    return os.path.join(os.path.dirname(app.root_path), directory)
+
+
+def check_schema(app, db, mode):
+    """
+    Compare the database's Alembic revision with the migration scripts' head.
+
+    Costs one small SELECT on alembic_version; no DDL and no reflection.
+    "create" keeps the old create_all() behaviour for throwaway databases.
+
+    Args:
+        app (Flask): The application
+        db (SQLAlchemy): The Flask-SQLAlchemy extension
+        mode (str): One of SCHEMA_CHECK_MODES
+
+    Raises:
+        SchemaOutOfDate: In strict mode, if the revisions differ or the check fails
+    """
+    if mode not in SCHEMA_CHECK_MODES:
+        raise ValueError(f"SCHEMA_CHECK must be one of {', '.join(SCHEMA_CHECK_MODES)}, not {mode!r}")
+    if mode == 'off':
+        return
+    if mode == 'create':
+        with app.app_context():
+            db.create_all()
+        return
+
+    from alembic.runtime.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+
+    expected = set(ScriptDirectory(migrations_directory(app)).get_heads())
+    try:
+        with app.app_context(), db.engine.connect() as connection:
+            current = set(MigrationContext.configure(connection).get_current_heads())
+    except SQLAlchemyError as e:
+        message = f'Could not read the schema revision: {e}'
+    else:
+        if current == expected:
+            return
+        message = (f"Database schema is at {', '.join(sorted(current)) or 'no revision'}, "
+                   f"expected {', '.join(sorted(expected))}; run `flask db upgrade`")
+
+    if mode == 'strict':
+        raise SchemaOutOfDate(message)
+    logger.warning(message)
+
+
+@click.command('init-db')
+def init_db():
+    """Create the tables on an empty database and stamp it at the Alembic head."""
+    # The migration history starts from tables that already exist, so a new
+    # database is built from the models and marked as fully migrated.
+    from flask_migrate import stamp
+
+    current_app.extensions['sqlalchemy'].create_all()
+    stamp(directory=migrations_directory(current_app))
+    click.echo('Database created at the latest migration.')
+
+
+@click.command('startup-report')
+@click.option('--json', 'as_json', is_flag=True, help='Print the phases as JSON (milliseconds).')
+def startup_report(as_json):
+    """Show how long each startup phase of this app instance took."""
+    timer = current_app.extensions['startup_timer']
+    if as_json:
+        phases = {name: round(seconds * 1000, 3) for name, seconds in timer.phases.items()}
+        click.echo(json.dumps({'phases_ms': phases, 'total_ms': round(timer.total * 1000, 3)}, indent=2))
+    else:
+        for name, seconds in timer.phases.items():
+            click.echo(f'{name:<12} {seconds * 1000:>9.1f} ms')
+        click.echo(f"{'total':<12} {timer.total * 1000:>9.1f} ms")
@@ -14,4 +14,41 @@ document.addEventListener("DOMContentLoaded", function() {
     });
 });
 
+// "Load more" buttons fetch the next keyset page of a list as rendered rows
+document.addEventListener("click", function(e) {
+    const button = e.target.closest(".load-more-btn");
+    if (!button) return;
+
+    const target = document.querySelector(button.dataset.target);
+    const params = new URLSearchParams(window.location.search);
+    params.set("cursor", button.dataset.cursor);
+    params.set("partial", "1");
+
+    button.disabled = true;
+    fetch(`${window.location.pathname}?${params}`)
+        .then(response => {
+            if (!response.ok) throw new Error(`HTTP ${response.status}`);
+            const nextCursor = response.headers.get("X-Next-Cursor");
+            return response.text().then(html => ({ html, nextCursor }));
+        })
+        .then(({ html, nextCursor }) => {
+            const template = document.createElement("template");
+            template.innerHTML = html;
+            const items = Array.from(template.content.children);
+            target.append(...items);
+
+            if (nextCursor) {
+                button.dataset.cursor = nextCursor;
+                button.disabled = false;
+            } else {
+                button.remove();
+            }
+            document.dispatchEvent(new CustomEvent("items:loaded", { detail: { container: target, items } }));
+        })
+        .catch(error => {
+            console.error("Error loading more items:", error);
+            button.disabled = false;
+        });
+});
+
 document.getElementById('currentYear').textContent = new Date().getFullYear();
\ No newline at end of file
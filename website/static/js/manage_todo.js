@@ -9,22 +9,35 @@ document.addEventListener('DOMContentLoaded', function() {
     const saveOrderBtn = document.getElementById('saveOrderBtn');
     
     // Initialize drag and drop for todos
-    initializeTodoDragDrop();
-    initializeTaskDragDrop();
+    const initialCards = Array.from(document.querySelectorAll('.todo-card'));
+    originalOrder = initialCards.map(card => card.dataset.todoId);
+    initializeTodoDragDrop(initialCards);
+    initializeTaskDragDrop(document.querySelectorAll('.task-item'));
+    animateProgressBars(document.querySelectorAll('.progress-bar'));
     
-    // Set initial progress bar widths
-    document.querySelectorAll('.progress-bar').forEach(bar => {
-        const width = bar.getAttribute('data-width') + '%';
-        bar.style.width = '0%';
-        setTimeout(() => {
-            bar.style.width = width;
-        }, 500);
+    // Cards appended by "Load more" need the same wiring
+    document.addEventListener('items:loaded', function(e) {
+        const cards = e.detail.items.filter(item => item.classList.contains('todo-card'));
+        originalOrder = originalOrder.concat(cards.map(card => card.dataset.todoId));
+        initializeTodoDragDrop(cards);
+        cards.forEach(card => {
+            initializeTaskDragDrop(card.querySelectorAll('.task-item'));
+            animateProgressBars(card.querySelectorAll('.progress-bar'));
+        });
     });
     
-    function initializeTodoDragDrop() {
-        const todoCards = document.querySelectorAll('.todo-card');
-        originalOrder = Array.from(todoCards).map(card => card.dataset.todoId);
-        
+    // Set initial progress bar widths
+    function animateProgressBars(bars) {
+        bars.forEach(bar => {
+            const width = bar.getAttribute('data-width') + '%';
+            bar.style.width = '0%';
+            setTimeout(() => {
+                bar.style.width = width;
+            }, 500);
+        });
+    }
+    
+    function initializeTodoDragDrop(todoCards) {
         todoCards.forEach(card => {
             const header = card.querySelector('.todo-header');
             
@@ -88,9 +101,7 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
     
-    function initializeTaskDragDrop() {
-        const taskItems = document.querySelectorAll('.task-item');
-        
+    function initializeTaskDragDrop(taskItems) {
         taskItems.forEach(task => {
             const dragHandle = task.querySelector('.task-drag-handle');
             
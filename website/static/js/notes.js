@@ -1,21 +1,77 @@
 document.addEventListener("DOMContentLoaded", function() {
-    const editButtons = document.querySelectorAll(".edit-note-btn");
     const noteForm = document.getElementById("noteForm");
 
-    editButtons.forEach(button => {
-        button.addEventListener("click", function() {
-            const row = button.closest("tr");
-            const noteId = row.dataset.id;
-            const title = row.dataset.title;
-            const text = row.dataset.text;
-
-            // Fill the form
-            document.getElementById("note_id").value = noteId;
-            document.getElementById("title").value = title;
-            document.getElementById("text_content").value = text;
-
-            // Change form action to edit route
-            noteForm.action = `/notes/edit/${noteId}`;
-        });
+    // Delegated so rows added by "Load more" work too
+    document.addEventListener("click", function(e) {
+        const button = e.target.closest(".edit-note-btn");
+        if (!button) return;
+
+        const row = button.closest("tr");
+        const noteId = row.dataset.id;
+        const title = row.dataset.title;
+        const text = row.dataset.text;
+
+        // Fill the form
+        document.getElementById("note_id").value = noteId;
+        document.getElementById("title").value = title;
+        document.getElementById("text_content").value = text;
+
+        // Change form action to edit route
+        noteForm.action = `/notes/edit/${noteId}`;
+    });
+});
+
+// --- Full-text search ---
+document.addEventListener("DOMContentLoaded", function() {
+    const searchForm = document.getElementById("noteSearchForm");
+    const searchInput = document.getElementById("noteSearch");
+    const results = document.getElementById("noteSearchResults");
+    const moreButton = document.getElementById("noteSearchMore");
+    let nextCursor = null;
+    let debounce = null;
+
+    function runSearch(append) {
+        const query = searchInput.value.trim();
+        if (!append) {
+            results.innerHTML = "";
+            nextCursor = null;
+        }
+        if (!query) {
+            moreButton.hidden = true;
+            return;
+        }
+
+        const params = new URLSearchParams({ q: query });
+        if (append && nextCursor) params.set("cursor", nextCursor);
+
+        fetch(`/api/notes/search?${params}`)
+            .then(response => response.json())
+            .then(data => {
+                if (!data.success) throw new Error(data.error);
+                if (!append && data.results.length === 0) {
+                    results.innerHTML = '<div class="list-group-item text-muted">No matching notes.</div>';
+                }
+                // Titles and snippets are escaped server-side; only <mark> tags are added
+                data.results.forEach(result => {
+                    const item = document.createElement("div");
+                    item.className = "list-group-item";
+                    item.innerHTML = `<h6 class="mb-1 fw-bold">${result.title}</h6>
+                        <div class="small">${result.snippet}</div>`;
+                    results.appendChild(item);
+                });
+                nextCursor = data.next_cursor;
+                moreButton.hidden = !nextCursor;
+            })
+            .catch(error => console.error("Error searching notes:", error));
+    }
+
+    searchForm.addEventListener("submit", function(e) {
+        e.preventDefault();
+        runSearch(false);
+    });
+    searchInput.addEventListener("input", function() {
+        clearTimeout(debounce);
+        debounce = setTimeout(() => runSearch(false), 300);
     });
+    moreButton.addEventListener("click", () => runSearch(true));
 });
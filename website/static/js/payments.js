@@ -15,6 +15,7 @@ document.addEventListener("DOMContentLoaded", () => {
             document.getElementById("modal_pmt_amount").value = paymentToEditRow.dataset.pmt_amount;
             document.getElementById("modal_notes").value = paymentToEditRow.dataset.notes;
             document.getElementById("modal_is_active").checked = paymentToEditRow.dataset.is_active === "true";
+            fillRecurrence(paymentToEditRow.dataset);
 
             new bootstrap.Modal(document.getElementById('paymentModal')).show();
         }
@@ -26,20 +27,22 @@ document.addEventListener("DOMContentLoaded", () => {
         resetForm();
     }
 
-    // --- Edit buttons inside table ---
-    document.querySelectorAll(".edit-payment-btn").forEach(button => {
-        button.addEventListener("click", () => {
-            const row = button.closest("tr");
-            document.getElementById("paymentModalLabel").innerText = "Edit Payment";
-            document.getElementById("modal_payment_id").value = row.dataset.id;
-            document.getElementById("modal_name").value = row.dataset.name;
-            document.getElementById("modal_pmt_date").value = row.dataset.pmt_date;
-            document.getElementById("modal_pmt_amount").value = row.dataset.pmt_amount;
-            document.getElementById("modal_notes").value = row.dataset.notes;
-            document.getElementById("modal_is_active").checked = row.dataset.is_active === "true";
+    // --- Edit buttons inside table (delegated so rows added by "Load more" work too) ---
+    document.addEventListener("click", (e) => {
+        const button = e.target.closest(".edit-payment-btn");
+        if (!button) return;
 
-            new bootstrap.Modal(document.getElementById('paymentModal')).show();
-        });
+        const row = button.closest("tr");
+        document.getElementById("paymentModalLabel").innerText = "Edit Payment";
+        document.getElementById("modal_payment_id").value = row.dataset.id;
+        document.getElementById("modal_name").value = row.dataset.name;
+        document.getElementById("modal_pmt_date").value = row.dataset.pmt_date;
+        document.getElementById("modal_pmt_amount").value = row.dataset.pmt_amount;
+        document.getElementById("modal_notes").value = row.dataset.notes;
+        document.getElementById("modal_is_active").checked = row.dataset.is_active === "true";
+        fillRecurrence(row.dataset);
+
+        new bootstrap.Modal(document.getElementById('paymentModal')).show();
     });
 });
 
@@ -52,6 +55,14 @@ function resetForm() {
     document.getElementById("modal_pmt_amount").value = "";
     document.getElementById("modal_notes").value = "";
     document.getElementById("modal_is_active").checked = true;
+    fillRecurrence({});
 
     new bootstrap.Modal(document.getElementById('paymentModal')).show();
 }
+
+// --- Recurrence fields (empty dataset = one-off payment) ---
+function fillRecurrence(data) {
+    document.getElementById("modal_recurrence_unit").value = data.recurrence_unit || "";
+    document.getElementById("modal_recurrence_interval").value = data.recurrence_interval || 1;
+    document.getElementById("modal_recurrence_end").value = data.recurrence_end || "";
+}
@@ -0,0 +1,103 @@
+import os
+import stat
+import time
+from flask import current_app, get_flashed_messages, stream_with_context
+from jinja2 import FileSystemBytecodeCache
+
+# Template events rendered per chunk of a streamed page (Jinja yields very small strings)
+STREAM_BUFFER_SIZE = 64
+TEMPLATE_EXTENSIONS = ('.html',)
+# TEMPLATE_CACHE_DIR value for Jinja's own per-user directory below the temp dir
+AUTO_CACHE_DIR = 'auto'
+
+
+class UnsafeCacheDir(RuntimeError):
+    """Raised when the bytecode cache directory could be written by another user."""
+
+
+def make_bytecode_cache(cache_dir):
+    """
+    Create the bytecode cache, refusing a directory other users could plant code in.
+
+    Cached bytecode is unmarshalled and executed, so the directory must be
+    owned by this process's user and not writable by anyone else.
+
+    Args:
+        cache_dir (str): "auto" for Jinja's per-user temp directory
+            (_jinja2-cache-<uid>, created 0700 and checked by Jinja), or a path
+
+    Returns:
+        FileSystemBytecodeCache
+    """
+    if cache_dir == AUTO_CACHE_DIR:
+        try:
+            return FileSystemBytecodeCache()
+        except RuntimeError as e:
+            raise UnsafeCacheDir(str(e)) from e
+
+    os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+    info = os.lstat(cache_dir)
+    if not stat.S_ISDIR(info.st_mode):
+        raise UnsafeCacheDir(f'{cache_dir} is not a directory')
+    if hasattr(os, 'getuid') and info.st_uid != os.getuid():
+        raise UnsafeCacheDir(f'{cache_dir} is owned by another user')
+    if info.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        raise UnsafeCacheDir(f'{cache_dir} is writable by other users')
+    return FileSystemBytecodeCache(cache_dir)
+
+
+def warm_templates(app):
+    """
+    Compile every template up front, so no request pays for compiling one.
+
+    With the bytecode cache, only the first worker after a template change
+    actually compiles; the others load the cached code.
+
+    Returns:
+        int: Number of templates loaded
+    """
+    names = [name for name in app.jinja_env.list_templates() if name.endswith(TEMPLATE_EXTENSIONS)]
+    for name in names:
+        app.jinja_env.get_template(name)
+    return len(names)
+
+
+def stream_page(template_name, **context):
+    """
+    Render a template as a stream of chunks instead of one string.
+
+    The first bytes leave while the rest of the list is still rendering,
+    and only one chunk is held in memory at a time. Flashed messages are
+    popped before the response starts, as the session cookie that drops
+    them is sent with the headers.
+
+    Args:
+        template_name (str): Template to render
+        **context: Template variables
+
+    Returns:
+        iterator: Chunks for a Response body
+    """
+    app = current_app._get_current_object()
+    get_flashed_messages()  # cached on the request for the template
+    app.update_template_context(context)
+    stream = app.jinja_env.get_or_select_template(template_name).stream(context)
+    stream.enable_buffering(STREAM_BUFFER_SIZE)
+    return stream_with_context(stream)
+
+
+def init_templates(app):
+    """Attach the persistent bytecode cache and, if TEMPLATE_WARMUP is set, precompile all templates."""
+    cache_dir = app.config['TEMPLATE_CACHE_DIR']
+    if cache_dir:
+        # Entries are keyed by template name and checked against the source checksum,
+        # so an edited template is recompiled instead of loaded from a stale entry
+        try:
+            app.jinja_env.bytecode_cache = make_bytecode_cache(cache_dir)
+        except UnsafeCacheDir as e:
+            app.logger.warning('Not caching compiled templates: %s', e)
+
+    if app.config['TEMPLATE_WARMUP']:
+        started = time.perf_counter()
+        count = warm_templates(app)
+        app.logger.debug('Loaded %d templates in %.1f ms', count, (time.perf_counter() - started) * 1000)
@@ -0,0 +1,127 @@
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import case, select
+from . import db
+from .models import ToDo, ToDoTask, todo_counter_update
+from .history import record_change
+from .pagination import DEFAULT_PAGE_SIZE, SortKey, paginate
+
+# Max ids per IN (...) when loading tasks, same batching selectinload uses
+TASK_BATCH_SIZE = 500
+
+
+# Keyset orderings for the todo board ("position") and the JSON API ("due_date")
+TODO_SORTS = {
+    'position': [SortKey(ToDo.position), SortKey(ToDo.id)],
+    'due_date': [SortKey(ToDo.due_date, nullable=True), SortKey(ToDo.id)],
+}
+
+
+def load_todo_cards(user_id, sort='position', cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Load a page of a user's active todos with their tasks as plain dicts.
+
+    Todos and tasks are fetched with one query each (tasks in IN batches),
+    and progress is computed in memory, so a page costs O(1) queries
+    however many todos the user has.
+
+    Args:
+        user_id (int): Id of the user whose board to load
+        sort (str): Key of TODO_SORTS to order by
+        cursor (str): Cursor of the previous page, or None for the first page
+        limit (int): Page size
+
+    Returns:
+        tuple: (todo dicts each with a "tasks" list, next page cursor or None)
+    """
+    stmt = (
+        select(ToDo.id, ToDo.name, ToDo.status, ToDo.priority, ToDo.due_date, ToDo.position)
+        .where(ToDo.user_id == user_id, ToDo.is_active == True)
+    )
+    rows, next_cursor = paginate(db.session, stmt, TODO_SORTS[sort], cursor, limit)
+    return build_todo_cards([row._asdict() for row in rows]), next_cursor
+
+
+def build_todo_cards(todos):
+    """
+    Attach tasks and progress to already loaded todo dicts.
+
+    Args:
+        todos (list): Dicts with at least an "id" key
+
+    Returns:
+        list: The same dicts with tasks, counters and completion_percentage
+    """
+    tasks_by_todo = defaultdict(list)
+    todo_ids = [todo['id'] for todo in todos]
+
+    for start in range(0, len(todo_ids), TASK_BATCH_SIZE):
+        rows = db.session.execute(
+            select(ToDoTask.id, ToDoTask.to_do_id, ToDoTask.text_content, ToDoTask.status, ToDoTask.position)
+            .where(ToDoTask.to_do_id.in_(todo_ids[start:start + TASK_BATCH_SIZE]))
+            .order_by(ToDoTask.to_do_id, ToDoTask.position, ToDoTask.id)
+        )
+        for row in rows:
+            tasks_by_todo[row.to_do_id].append({
+                'id': row.id,
+                'text_content': row.text_content,
+                'status': row.status,
+                'position': row.position,
+            })
+
+    for todo in todos:
+        tasks = tasks_by_todo[todo['id']]
+        completed = sum(1 for task in tasks if task['status'] == 1)
+        todo['tasks'] = tasks
+        todo['total_tasks'] = len(tasks)
+        todo['completed_tasks'] = completed
+        todo['completion_percentage'] = ToDo.percentage_for(len(tasks), completed)
+
+    return todos
+
+
+def toggle_task_status(user_id, task_id):
+    """
+    Flip a task between pending and completed and update its todo, in two statements.
+
+    The first UPDATE flips the task (only if the user owns its todo) and
+    returns the new status; the second shifts the todo's completed counter,
+    recomputes its status and returns the counters. Both run as Core
+    statements, so no rows are loaded and the task listeners don't fire;
+    the status change is added to the field history explicitly.
+    Objects already in the session are not refreshed.
+
+    Args:
+        user_id (int): Id of the user who must own the task's todo
+        task_id (int): Id of the task to toggle
+
+    Returns:
+        dict: new_status, todo_status and completion_percentage, or None if not found
+    """
+    task_table = ToDoTask.__table__
+    todo_table = ToDo.__table__
+    now = datetime.utcnow()
+
+    task = db.session.execute(
+        task_table.update()
+        .where(task_table.c.id == task_id,
+               task_table.c.to_do_id.in_(select(todo_table.c.id).where(todo_table.c.user_id == user_id)))
+        .values(status=case((task_table.c.status == 0, 1), else_=0), updated_date=now)
+        .returning(task_table.c.to_do_id, task_table.c.status)
+    ).first()
+    if task is None:
+        return None
+    # Core UPDATEs bypass the ORM change capture, so record the toggle explicitly
+    record_change(db.session, ToDoTask.__tablename__, task_id, 'status', 1 - task.status, task.status)
+
+    todo = db.session.execute(
+        todo_counter_update(task.to_do_id, 0, 1 if task.status == 1 else -1, now)
+        .values(updated_date=now)
+        .returning(todo_table.c.status, todo_table.c.total_tasks, todo_table.c.completed_tasks)
+    ).first()
+
+    return {
+        'new_status': task.status,
+        'todo_status': todo.status,
+        'completion_percentage': ToDo.percentage_for(todo.total_tasks, todo.completed_tasks),
+    }
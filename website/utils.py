@@ -2,6 +2,7 @@ import re
 import random
 import string
 from flask import flash
+from sqlalchemy import BigInteger, and_, case, cast, func, or_
 
 
 def validate_email(email):
@@ -88,27 +89,90 @@ def validate_username(username):
     return True, ""
 
 
-def generate_username_from_name(first_name, last_name, max_attempts=10):
+def _clean_name(name):
+    return re.sub(r'[^a-zA-Z]', '', name.strip()).lower()
+
+
+def _escape_like(value):
+    return value.replace('/', '//').replace('%', '/%').replace('_', '/_')
+
+
+def _valid_bases(patterns):
+    """Drop duplicate patterns and those that are not valid usernames, keeping the order."""
+    return [base for base in dict.fromkeys(patterns) if validate_username(base)[0]]
+
+
+def username_usage(bases):
+    """
+    Look up which base usernames are taken and their highest numeric suffix, in one query
+
+    The indexed prefix match narrows the rows and the database aggregates
+    them: per base, whether the base itself is taken and the MAX of the
+    digits that follow it ("johnsmith", "johnsmith7", ...). The result is a
+    single row however many usernames share the prefix.
+
+    Args:
+        bases (list): Base usernames
+
+    Returns:
+        dict: base -> (True if the base itself is taken, highest suffix in use or 0)
+    """
+    from .models import User
+    if not bases:
+        return {}
+
+    # Literal 'prefix%' patterns, so PostgreSQL can use idx_user_username_prefix
+    prefixes = [User.username.like(_escape_like(base) + '%', escape='/') for base in bases]
+    columns = []
+    for base, prefix in zip(bases, prefixes):
+        suffix = func.substr(User.username, len(base) + 1)
+        columns.append(func.max(case((User.username == base, 1), else_=0)))
+        # Only the base followed by digits alone; 18 of them still fit a BIGINT
+        columns.append(func.max(case(
+            (and_(prefix, suffix.regexp_match('^[0-9]{1,18}$')), cast(suffix, BigInteger)), else_=0)))
+
+    row = User.query.with_entities(*columns).filter(or_(*prefixes)).one()
+    return {base: (bool(row[2 * i]), row[2 * i + 1] or 0) for i, base in enumerate(bases)}
+
+
+def _numbered(base, start, count):
+    """Up to count valid candidates base<start>, base<start+1>, ... (they get longer, so stop at 20 chars)"""
+    candidates = []
+    number = start
+    while len(candidates) < count:
+        candidate = f"{base}{number}"
+        if len(candidate) > 20:
+            break
+        if validate_username(candidate)[0]:
+            candidates.append(candidate)
+        number += 1
+    return candidates
+
+
+def generate_username_from_name(first_name, last_name):
     """
     Generate a unique username based on first and last name
 
+    Availability of every variation is resolved with one query; when a
+    variation is taken, its next number after the highest one in use is
+    tried (johnsmith -> johnsmith1, or johnsmith8 if johnsmith7 exists).
+
     Args:
         first_name (str): User's first name
         last_name (str): User's last name
-        max_attempts (int): Maximum attempts to generate unique username
 
     Returns:
         str: Generated username
     """
     # Clean the names
-    first_name = re.sub(r'[^a-zA-Z]', '', first_name.strip()).lower()
-    last_name = re.sub(r'[^a-zA-Z]', '', last_name.strip()).lower()
+    first_name = _clean_name(first_name)
+    last_name = _clean_name(last_name)
 
     if not first_name or not last_name:
         return None
 
     # Generate base username variations
-    base_options = [
+    bases = _valid_bases([
         f"{first_name}{last_name}",  # johnsmith
         f"{first_name}.{last_name}",  # john.smith
         f"{first_name}_{last_name}",  # john_smith
@@ -116,25 +180,18 @@ def generate_username_from_name(first_name, last_name, max_attempts=10):
         f"{first_name[0]}{last_name}",  # jsmith
         f"{first_name[0]}.{last_name}",  # j.smith
         f"{first_name}_{last_name[0]}",  # john_s
-    ]
-
-    # Try each base option
-    for base in base_options:
-        if len(base) >= 3 and len(base) <= 20:
-            # Try the base username first
-            is_valid, _ = validate_username(base)
-            if is_valid and is_username_available(base):
-                return base
-
-            # If base is taken, try with numbers
-            for i in range(1, max_attempts + 1):
-                candidate = f"{base}{i}"
-                if len(candidate) <= 20:
-                    is_valid, _ = validate_username(candidate)
-                    if is_valid and is_username_available(candidate):
-                        return candidate
-
-    # If all attempts failed, generate a random username
+    ])
+    usage = username_usage(bases)
+
+    for base in bases:
+        base_taken, highest = usage[base]
+        if not base_taken:
+            return base
+        numbered = _numbered(base, highest + 1, 1)
+        if numbered:
+            return numbered[0]
+
+    # If every variation is too long to number, generate a random username
     return generate_random_username(first_name, last_name)
 
 
@@ -151,7 +208,7 @@ def generate_random_username(first_name="user", last_name="", length=8):
         str: Random username
     """
     # Clean first name
-    clean_first = re.sub(r'[^a-zA-Z]', '', first_name.strip()).lower()
+    clean_first = _clean_name(first_name)
 
     if clean_first:
         # Use first few letters of first name + random string
@@ -188,6 +245,9 @@ def suggest_usernames(first_name, last_name, count=5):
     """
     Generate multiple username suggestions
 
+    Uses one availability query for all patterns; numbered variations
+    continue after the highest number in use, so they need no probing.
+
     Args:
         first_name (str): User's first name
         last_name (str): User's last name
@@ -196,17 +256,15 @@ def suggest_usernames(first_name, last_name, count=5):
     Returns:
         list: List of suggested usernames
     """
-    suggestions = []
-
     # Clean names
-    first_name = re.sub(r'[^a-zA-Z]', '', first_name.strip()).lower()
-    last_name = re.sub(r'[^a-zA-Z]', '', last_name.strip()).lower()
+    first_name = _clean_name(first_name)
+    last_name = _clean_name(last_name)
 
     if not first_name or not last_name:
         return []
 
     # Generate different patterns
-    patterns = [
+    patterns = _valid_bases([
         f"{first_name}{last_name}",
         f"{first_name}.{last_name}",
         f"{first_name}_{last_name}",
@@ -215,30 +273,16 @@ def suggest_usernames(first_name, last_name, count=5):
         f"{first_name[0]}.{last_name}",
         f"{last_name}{first_name[0]}",
         f"{first_name}_{last_name[0]}",
-    ]
+    ])
+    usage = username_usage(patterns)
 
-    for pattern in patterns:
-        if len(pattern) >= 3 and len(pattern) <= 20:
-            is_valid, _ = validate_username(pattern)
-            if is_valid and is_username_available(pattern):
-                suggestions.append(pattern)
-                if len(suggestions) >= count:
-                    break
+    suggestions = [pattern for pattern in patterns if not usage[pattern][0]][:count]
 
     # If we don't have enough suggestions, add numbered variations
-    while len(suggestions) < count and patterns:
-        base = patterns[0]
-        for i in range(1, 100):
-            candidate = f"{base}{i}"
-            if len(candidate) <= 20:
-                is_valid, _ = validate_username(candidate)
-                if is_valid and is_username_available(candidate):
-                    suggestions.append(candidate)
-                    if len(suggestions) >= count:
-                        break
-            if len(suggestions) >= count:
-                break
-        patterns.pop(0)  # Remove the pattern we just tried
+    for pattern in patterns:
+        if len(suggestions) >= count:
+            break
+        suggestions.extend(_numbered(pattern, usage[pattern][1] + 1, count - len(suggestions)))
 
     return suggestions[:count]
 
@@ -256,4 +300,11 @@ suggestions = suggest_usernames("John", "Smith", 3)
 
 # Check if username is available
 available = is_username_available("johnsmith")
-"""
\ No newline at end of file
+"""
+
+def pluralize_filter(number, singular, plural=None):
+    """Jinja filter: pick the singular or plural form for a count"""
+    if number == 1:
+        return singular
+    else:
+        return plural if plural is not None else singular + 's'
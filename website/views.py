@@ -1,33 +1,76 @@
 from datetime import date, datetime
-from flask import Blueprint, render_template, request, flash, redirect, url_for, jsonify
+import io
+from decimal import Decimal
+from flask import Blueprint, Response, render_template, request, flash, redirect, url_for, jsonify, current_app, \
+    abort, stream_with_context
 from flask_login import current_user, login_required
-from sqlalchemy import and_
-from .models import PaymentReminder, ToDo, Note, ToDoTask
+from sqlalchemy import and_, case, delete, func, select, update
+from .models import PaymentReminder, PaymentOccurrence, ToDo, Note, ToDoTask
 from . import db
+from .dashboard import get_dashboard, invalidate_dashboard
+from .todos import TODO_SORTS, load_todo_cards, toggle_task_status
+from .pagination import DEFAULT_PAGE_SIZE, InvalidCursor, SortKey, page_args, paginate
+from .search import DEFAULT_SEARCH_PAGE_SIZE, SearchNotSupported, search_notes
+from .routing import read_replica
+from .conditional import conditional_list
+from .templating import stream_page
+from .recurrence import RECURRENCE_UNITS, materialize_occurrences, monthly_totals, refresh_occurrences, \
+    upcoming_occurrences
+from .backup import FORMATS, InvalidImport, export_stream, import_records, read_csv, read_ndjson
 
 views = Blueprint('views', __name__)
 
+# Keyset orderings backed by idx_user_modified and idx_user_payment_date
+NOTE_SORT = [SortKey(Note.last_modified_date, descending=True), SortKey(Note.id, descending=True)]
+PAYMENT_SORT = [SortKey(PaymentReminder.pmt_date), SortKey(PaymentReminder.id)]
+
+
+def notes_page(user_id, cursor=None, limit=None):
+    """Return one keyset page of the user's active notes and the next cursor."""
+    stmt = select(Note.id, Note.title, Note.text_content, Note.last_modified_date).where(
+        Note.user_id == user_id, Note.is_active == True)
+    return paginate(db.session, stmt, NOTE_SORT, cursor, limit or DEFAULT_PAGE_SIZE)
+
+
+def payments_page(user_id, cursor=None, limit=None):
+    """Return one keyset page of the user's payment reminders and the next cursor."""
+    stmt = select(PaymentReminder.id, PaymentReminder.name, PaymentReminder.pmt_date, PaymentReminder.pmt_amount,
+                  PaymentReminder.notes, PaymentReminder.is_active, PaymentReminder.recurrence_unit,
+                  PaymentReminder.recurrence_interval, PaymentReminder.recurrence_end,
+                  PaymentReminder.updated_date).where(
+        PaymentReminder.user_id == user_id)
+    return paginate(db.session, stmt, PAYMENT_SORT, cursor, limit or DEFAULT_PAGE_SIZE)
+
+
+def render_list_page(template, rows_template, next_cursor, **context):
+    """Stream a list page, or only its rows when "load more" asks for the next page."""
+    if request.args.get('partial'):
+        response = Response(stream_page(rows_template, **context), mimetype='text/html')
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response
+    return Response(stream_page(template, next_cursor=next_cursor, **context), mimetype='text/html')
+
+
+def isoformat(value):
+    return value.isoformat() if value else None
+
 
 @views.route('/')
 @login_required
+@read_replica
 def home():
-    user_id = current_user.id
-    payment_reminders = PaymentReminder.query.filter_by(user_id=user_id, is_active=True).order_by(
-        PaymentReminder.pmt_date).all()
-    todos = ToDo.query.filter_by(user_id=user_id, is_active=True).order_by(ToDo.due_date).all()
-    notes = Note.query.filter_by(user_id=user_id, is_active=True).order_by(Note.last_modified_date.desc()).all()
-    completed_todos = ToDo.query.filter_by(user_id=user_id, status=2, is_active=True).count()
+    dashboard = get_dashboard(current_user.id)
 
     return render_template('home.html',
                            user=current_user,
-                           payment_reminders=payment_reminders,
-                           todos=todos,
-                           notes=notes,
-                           completed_todos=completed_todos,
-                           today=date.today())
+                           today=date.today(),
+                           **dashboard)
 
 @views.route("/payments", methods=["GET", "POST"])
 @login_required
+@read_replica
+@conditional_list('payments')
 def payments():
     payment_to_edit = None
 
@@ -38,6 +81,13 @@ def payments():
         pmt_amount = request.form.get("pmt_amount")
         notes = request.form.get("notes")
         is_active = True if request.form.get("is_active") == "on" else False
+        # Recurrence: no unit = one-off; otherwise every N days/weeks/months/years, optionally until a date
+        recurrence_unit = request.form.get("recurrence_unit") or None
+        if recurrence_unit not in RECURRENCE_UNITS:
+            recurrence_unit = None
+        recurrence_interval = max(request.form.get("recurrence_interval", 1, type=int) or 1, 1)
+        recurrence_end = request.form.get("recurrence_end")
+        recurrence_end = datetime.strptime(recurrence_end, "%Y-%m-%d").date() if recurrence_end else None
 
         if payment_id:  # Edit
             payment = PaymentReminder.query.get_or_404(payment_id)
@@ -49,31 +99,43 @@ def payments():
             payment.pmt_amount = pmt_amount
             payment.notes = notes
             payment.is_active = is_active
+            payment.recurrence_unit = recurrence_unit
+            payment.recurrence_interval = recurrence_interval
+            payment.recurrence_end = recurrence_end
             flash("Payment updated successfully!", "success")
         else:  # Add new
-            new_payment = PaymentReminder(
+            payment = PaymentReminder(
                 user_id=current_user.id,
                 name=name,
                 pmt_date=datetime.strptime(pmt_date, "%Y-%m-%d"),
                 pmt_amount=pmt_amount,
                 notes=notes,
-                is_active=is_active
+                is_active=is_active,
+                recurrence_unit=recurrence_unit,
+                recurrence_interval=recurrence_interval,
+                recurrence_end=recurrence_end
             )
-            db.session.add(new_payment)
+            db.session.add(payment)
             flash("Payment added successfully!", "success")
 
         db.session.commit()
+        refresh_occurrences(payment)
+        invalidate_dashboard(current_user.id)
         return redirect(url_for("views.payments"))
 
     # GET request
-    payments = PaymentReminder.query.filter_by(user_id=current_user.id).order_by(PaymentReminder.pmt_date).all()
+    try:
+        payments, next_cursor = payments_page(current_user.id, request.args.get("cursor"))
+    except InvalidCursor:
+        abort(400)
 
     # Preselect if payment_id in query string
     payment_id = request.args.get("payment_id")
     if payment_id:
         payment_to_edit = PaymentReminder.query.filter_by(id=payment_id, user_id=current_user.id).first()
 
-    return render_template("payments.html", user=current_user, payments=payments, payment_to_edit=payment_to_edit)
+    return render_list_page("payments.html", "_payment_rows.html", next_cursor,
+                            user=current_user, payments=payments, payment_to_edit=payment_to_edit)
 
 
 
@@ -85,30 +147,130 @@ def delete_payment(id):
         flash("Unauthorized access", "error")
         return redirect(url_for("views.payments"))
 
+    # The FK cascade covers this on PostgreSQL; SQLite does not enforce it by default
+    db.session.execute(delete(PaymentOccurrence).where(PaymentOccurrence.payment_id == payment.id))
     db.session.delete(payment)
     db.session.commit()
+    invalidate_dashboard(current_user.id)
     flash("Payment deleted successfully!", "success")
     return redirect(url_for("views.payments"))
 
 
+@views.route('/api/payments')
+@login_required
+@read_replica
+@conditional_list('payments')
+def list_payments():
+    """Return the user's payment reminders by due date, one keyset page at a time."""
+    cursor, limit = page_args()
+    try:
+        rows, next_cursor = payments_page(current_user.id, cursor, limit)
+    except InvalidCursor as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    return jsonify({
+        'success': True,
+        'payments': [{
+            'id': row.id,
+            'name': row.name,
+            'pmt_date': isoformat(row.pmt_date),
+            'pmt_amount': str(row.pmt_amount),
+            'notes': row.notes,
+            'is_active': row.is_active,
+            'recurrence_unit': row.recurrence_unit,
+            'recurrence_interval': row.recurrence_interval,
+            'recurrence_end': isoformat(row.recurrence_end),
+            'updated_date': isoformat(row.updated_date)
+        } for row in rows],
+        'next_cursor': next_cursor
+    })
+
+
+@views.route('/api/payments/upcoming')
+@login_required
+@read_replica
+def upcoming_payments():
+    """Return the payments due in the next ?days= days (default UPCOMING_PAYMENTS_DAYS), soonest first."""
+    horizon = current_app.config['PAYMENT_OCCURRENCE_HORIZON_DAYS']
+    days = request.args.get('days', current_app.config['UPCOMING_PAYMENTS_DAYS'], type=int)
+    if days is None or not 0 <= days <= horizon:
+        return jsonify({'success': False, 'error': f'days must be between 0 and {horizon}'}), 400
+
+    rows = upcoming_occurrences(current_user.id, days)
+    return jsonify({
+        'success': True,
+        'payments': [{
+            'payment_id': row.payment_id,
+            'name': row.name,
+            'due_date': isoformat(row.occurrence_date),
+            'amount': str(row.amount)
+        } for row in rows],
+        'total': str(sum((row.amount for row in rows), Decimal('0.00')))
+    })
+
+
+@views.route('/api/payments/monthly-totals')
+@login_required
+@read_replica
+def payment_monthly_totals():
+    """Return the amount due per month for ?months= months (default 3) from the current one."""
+    max_months = current_app.config['PAYMENT_OCCURRENCE_HORIZON_DAYS'] // 31 + 1
+    months = request.args.get('months', 3, type=int)
+    if months is None or not 1 <= months <= max_months:
+        return jsonify({'success': False, 'error': f'months must be between 1 and {max_months}'}), 400
+
+    return jsonify({
+        'success': True,
+        'months': [{
+            'month': f'{int(row.year):04d}-{int(row.month):02d}',
+            'total': str(row.total),
+            'count': row.count
+        } for row in monthly_totals(current_user.id, months)]
+    })
+
+
+@views.route('/api/todos')
+@login_required
+@read_replica
+@conditional_list('todos')
+def list_todos():
+    """Return the user's active todos with tasks, one keyset page at a time.
+
+    Ordered by due date by default; ?sort=position follows the board order.
+    """
+    cursor, limit = page_args()
+    sort = request.args.get('sort', 'due_date')
+    if sort not in TODO_SORTS:
+        return jsonify({'success': False, 'error': 'Invalid sort'}), 400
+
+    try:
+        todos, next_cursor = load_todo_cards(current_user.id, sort, cursor, limit)
+    except InvalidCursor as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    for todo in todos:
+        todo['due_date'] = isoformat(todo['due_date'])
+
+    return jsonify({'success': True, 'todos': todos, 'next_cursor': next_cursor})
+
+
 @views.route('/todos')
 @login_required
+@read_replica
+@conditional_list('todos')
 def manage_todos():
     """Display all todos for the current user with drag-and-drop management."""
     try:
-        # Get all active todos for the current user, ordered by position or creation date
-        todos = ToDo.query.filter(
-            and_(
-                ToDo.user_id == current_user.id,
-                ToDo.is_active == True
-            )
-        ).order_by(ToDo.due_date.asc()).all()
+        # Active todos in their saved board order, with tasks and progress precomputed
+        todos, next_cursor = load_todo_cards(current_user.id, cursor=request.args.get('cursor'))
 
         # Get today's date for due date calculations
         today = date.today()
 
-        return render_template(
+        return render_list_page(
             'manage_todo.html',
+            '_todo_cards.html',
+            next_cursor,
             user=current_user,
             todos=todos,
             today=today,
@@ -155,18 +317,21 @@ def add_todo():
             if due_date_str:
                 due_date = datetime.strptime(due_date_str, '%Y-%m-%d').date()
 
-            # Create todo (status will be set properly later)
+            # Create todo at the end of the user's board (status will be set properly later)
             new_todo = ToDo(
                 name=name,
                 user_id=current_user.id,
                 due_date=due_date,
-                is_active=True
+                is_active=True,
+                position=select(func.coalesce(func.max(ToDo.position) + 1, 0))
+                .where(ToDo.user_id == current_user.id)
+                .scalar_subquery()
             )
 
             db.session.add(new_todo)
             db.session.flush()
 
-            # Create tasks
+            # Create tasks (the task listener keeps the todo's counters and status in sync)
             for i, task_content in enumerate(valid_tasks):
                 task = ToDoTask(
                     to_do_id=new_todo.id,
@@ -176,10 +341,8 @@ def add_todo():
                 )
                 db.session.add(task)
 
-            # Now update the todo status based on its tasks
-            new_todo.update_status()
-
             db.session.commit()
+            invalidate_dashboard(current_user.id)
             flash(f'Todo "{name}" created with {len(valid_tasks)} tasks!', 'success')
             return redirect(url_for('views.manage_todos'))
 
@@ -219,6 +382,7 @@ def edit_todo(todo_id):
             todo.updated_date = datetime.utcnow()
 
             db.session.commit()
+            invalidate_dashboard(current_user.id)
 
             flash('Todo updated successfully!', 'success')
             return redirect(url_for('views.manage_todos'))
@@ -236,33 +400,17 @@ def edit_todo(todo_id):
 def toggle_task(task_id):
     """Toggle the completion status of a task."""
     try:
-        task = ToDoTask.query.join(ToDo).filter(
-            and_(
-                ToDoTask.id == task_id,
-                ToDo.user_id == current_user.id
-            )
-        ).first()
+        # One UPDATE flips the task, one adjusts the todo's counters and status
+        result = toggle_task_status(current_user.id, task_id)
 
-        if not task:
+        if result is None:
+            db.session.rollback()
             return jsonify({'success': False, 'error': 'Task not found'}), 404
 
-        # Toggle task
-        task.status = 1 if task.status == 0 else 0
-        task.updated_date = datetime.utcnow()
-
-        # Update parent todo
-        todo = task.todo
-        todo.update_status()
-        todo.updated_date = datetime.utcnow()
-
         db.session.commit()
+        invalidate_dashboard(current_user.id)
 
-        return jsonify({
-            'success': True,
-            'new_status': task.status,
-            'todo_status': todo.status,
-            'completion_percentage': todo.completion_percentage
-        })
+        return jsonify({'success': True, **result})
 
     except Exception as e:
         db.session.rollback()
@@ -290,6 +438,7 @@ def delete_todo(todo_id):
         todo.updated_date = datetime.utcnow()
 
         db.session.commit()
+        invalidate_dashboard(current_user.id)
 
         return jsonify({'success': True, 'message': 'Todo deleted successfully'})
 
@@ -298,64 +447,121 @@ def delete_todo(todo_id):
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+def _as_int(value):
+    """An integer id or position from client JSON (the page sends ids as strings)."""
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError(f'not an integer: {value!r}')
+    return int(value)
+
+
+def reorder_positions(data):
+    """
+    Read the todo and task positions of a reorder request.
+
+    Returns:
+        tuple: ({todo_id: position}, {task_id: (todo_id, position)})
+
+    Raises:
+        ValueError: If the payload is not shaped as the board sends it or an id is not an integer
+    """
+    todos = data.get('todos')
+    tasks = data.get('tasks', {})
+    if not isinstance(todos, list) or not isinstance(tasks, dict):
+        raise ValueError('todos must be a list and tasks an object')
+
+    # New todo positions follow the order they were sent in
+    todo_positions = {}
+    for i, todo_data in enumerate(todos):
+        if not isinstance(todo_data, dict):
+            raise ValueError('each todo must be an object')
+        todo_id = todo_data.get('id')
+        if todo_id:
+            todo_positions[_as_int(todo_id)] = i
+
+    # Task positions within their todos
+    task_positions = {}
+    for todo_id, task_list in tasks.items():
+        if not isinstance(task_list, list):
+            raise ValueError('each todo\'s tasks must be a list')
+        for task_data in task_list:
+            if not isinstance(task_data, dict):
+                raise ValueError('each task must be an object')
+            task_id = task_data.get('id')
+            position = task_data.get('position')
+
+            if task_id and position is not None:
+                task_positions[_as_int(task_id)] = (_as_int(todo_id), _as_int(position))
+
+    return todo_positions, task_positions
+
+
 @views.route('/api/reorder', methods=['POST'])
 @login_required
 def reorder_items():
     """Reorder todos and tasks based on drag-and-drop positions."""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or 'todos' not in data:
+        return jsonify({'success': False, 'error': 'Invalid data'}), 400
     try:
-        data = request.get_json()
+        todo_positions, task_positions = reorder_positions(data)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Invalid data'}), 400
 
-        if not data or 'todos' not in data:
-            return jsonify({'success': False, 'error': 'Invalid data'}), 400
-
-        # Update todo positions (using updated_date since there's no position field)
-        todo_orders = data.get('todos', [])
-        base_time = datetime.utcnow()
+    try:
+        now = datetime.utcnow()
 
-        for i, todo_data in enumerate(todo_orders):
-            todo_id = todo_data.get('id')
+        # Verify ownership with one query and only write the todos that moved
+        if todo_positions:
+            current = db.session.execute(
+                select(ToDo.id, ToDo.position).where(
+                    and_(
+                        ToDo.user_id == current_user.id,
+                        ToDo.id.in_(todo_positions)
+                    )
+                )
+            )
+            moved = {row.id: todo_positions[row.id] for row in current if row.position != todo_positions[row.id]}
+
+            if moved:
+                db.session.execute(
+                    update(ToDo)
+                    .where(ToDo.id.in_(moved))
+                    .values(position=case(moved, value=ToDo.id), updated_date=now)
+                    .execution_options(synchronize_session=False)
+                )
 
-            if todo_id:
-                todo = ToDo.query.filter(
+        if task_positions:
+            current = db.session.execute(
+                select(ToDoTask.id, ToDoTask.to_do_id, ToDoTask.position).join(ToDo).filter(
                     and_(
-                        ToDo.id == todo_id,
+                        ToDoTask.id.in_(task_positions),
                         ToDo.user_id == current_user.id
                     )
-                ).first()
-
-                if todo:
-                    # Use updated_date with microsecond differences to maintain order
-                    todo.updated_date = base_time.replace(microsecond=i * 1000)
-
-        # Update task positions within their todos
-        task_orders = data.get('tasks', {})
-        for todo_id, task_list in task_orders.items():
-            for task_data in task_list:
-                task_id = task_data.get('id')
-                position = task_data.get('position')
-
-                if task_id and position is not None:
-                    task = ToDoTask.query.join(ToDo).filter(
-                        and_(
-                            ToDoTask.id == task_id,
-                            ToDo.user_id == current_user.id,
-                            ToDo.id == todo_id
-                        )
-                    ).first()
-
-                    if task:
-                        task.position = position
-                        task.updated_date = datetime.utcnow()
+                )
+            )
+            moved = {
+                row.id: task_positions[row.id][1] for row in current
+                if row.to_do_id == task_positions[row.id][0] and row.position != task_positions[row.id][1]
+            }
+
+            if moved:
+                db.session.execute(
+                    update(ToDoTask)
+                    .where(ToDoTask.id.in_(moved))
+                    .values(position=case(moved, value=ToDoTask.id), updated_date=now)
+                    .execution_options(synchronize_session=False)
+                )
 
         db.session.commit()
+        invalidate_dashboard(current_user.id)
 
         return jsonify({'success': True, 'message': 'Order saved successfully'})
 
-    except Exception as e:
+    except Exception:
         db.session.rollback()
-        return jsonify({'success': False, 'error': str(e)}), 500
+        current_app.logger.exception('Saving the board order failed')
+        return jsonify({'success': False, 'error': 'Could not save the order'}), 500
 
-# ... keep everything above unchanged ...
 
 @views.route('/api/task/<int:task_id>/delete', methods=['POST'])
 @login_required
@@ -375,14 +581,11 @@ def delete_task(task_id):
 
         todo = task.todo
 
-        # Soft delete by marking inactive OR hard delete
+        # Hard delete; the task listener updates the parent's counters and status
         db.session.delete(task)
-        db.session.commit()
-
-        # Update parent todo status
-        todo.update_status()
         todo.updated_date = datetime.utcnow()
         db.session.commit()
+        invalidate_dashboard(current_user.id)
 
         return jsonify({'success': True, 'message': 'Task deleted successfully'})
 
@@ -424,13 +627,11 @@ def add_task(todo_id):
             position=new_position
         )
 
+        # The task listener updates the parent's counters and status
         db.session.add(new_task)
-        db.session.commit()
-
-        # Update parent todo
-        todo.update_status()
         todo.updated_date = datetime.utcnow()
         db.session.commit()
+        invalidate_dashboard(current_user.id)
 
         return jsonify({
             'success': True,
@@ -449,6 +650,8 @@ def add_task(todo_id):
 
 @views.route('/notes', methods=['GET', 'POST'])
 @login_required
+@read_replica
+@conditional_list('notes')
 def notes():
     if request.method == "POST":
         title = request.form.get("title")
@@ -466,11 +669,61 @@ def notes():
             )
             db.session.add(new_note)
             db.session.commit()
+            invalidate_dashboard(current_user.id)
             flash("Note added successfully!", "success")
             return redirect(url_for("views.notes"))
 
-    user_notes = Note.query.filter_by(user_id=current_user.id, is_active=True).order_by(Note.last_modified_date.desc()).all()
-    return render_template("notes.html", user=current_user, notes=user_notes)
+    try:
+        user_notes, next_cursor = notes_page(current_user.id, request.args.get("cursor"))
+    except InvalidCursor:
+        abort(400)
+
+    return render_list_page("notes.html", "_note_rows.html", next_cursor, user=current_user, notes=user_notes)
+
+
+@views.route('/api/notes')
+@login_required
+@read_replica
+@conditional_list('notes')
+def list_notes():
+    """Return the user's notes, newest first, one keyset page at a time."""
+    cursor, limit = page_args()
+    try:
+        rows, next_cursor = notes_page(current_user.id, cursor, limit)
+    except InvalidCursor as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    return jsonify({
+        'success': True,
+        'notes': [{
+            'id': row.id,
+            'title': row.title,
+            'text_content': row.text_content,
+            'last_modified_date': isoformat(row.last_modified_date)
+        } for row in rows],
+        'next_cursor': next_cursor
+    })
+
+
+@views.route('/api/notes/search')
+@login_required
+@read_replica
+def search_notes_api():
+    """Full-text search over the user's notes, ranked and highlighted."""
+    query = request.args.get('q', '').strip()
+    cursor, limit = page_args(DEFAULT_SEARCH_PAGE_SIZE)
+
+    if not query:
+        return jsonify({'success': True, 'results': [], 'next_cursor': None})
+
+    try:
+        results, next_cursor = search_notes(current_user.id, query, cursor, limit)
+    except InvalidCursor as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except SearchNotSupported as e:
+        return jsonify({'success': False, 'error': str(e)}), 501
+
+    return jsonify({'success': True, 'results': results, 'next_cursor': next_cursor})
 
 
 @views.route('/notes/edit/<int:note_id>', methods=['POST'])
@@ -492,6 +745,7 @@ def edit_note(note_id):
         note.title = title
         note.text_content = text_content
         db.session.commit()
+        invalidate_dashboard(current_user.id)
         flash("Note updated successfully!", "success")
 
     return redirect(url_for("views.notes"))
@@ -507,10 +761,69 @@ def delete_note(note_id):
 
     db.session.delete(note)
     db.session.commit()
+    invalidate_dashboard(current_user.id)
     flash("Note deleted successfully!", "success")
     return redirect(url_for("views.notes"))
 
 
+@views.route('/api/cache/stats')
+@login_required
+def cache_stats():
+    """Report dashboard and identity cache hit/miss counters (admins only)."""
+    if current_user.user_role != 'admin':
+        return jsonify({'success': False, 'error': 'Forbidden'}), 403
+
+    return jsonify({
+        'success': True,
+        'dashboard_cache': current_app.extensions['dashboard_cache'].stats(),
+        'identity_cache': current_app.extensions['identity_cache'].stats()
+    })
+
+
+@views.route('/export')
+@login_required
+@read_replica
+def export_data():
+    """Stream all of the user's notes, payments and todos as NDJSON (default) or CSV."""
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in FORMATS:
+        return jsonify({'success': False, 'error': 'Invalid format'}), 400
+
+    response = current_app.response_class(
+        stream_with_context(export_stream(current_user.id, fmt)), mimetype=FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename=export-{date.today().isoformat()}.{fmt}'
+    return response
+
+
+@views.route('/api/import', methods=['POST'])
+@login_required
+def import_data():
+    """Import an export file (uploaded as "file" or sent as the body) into the user's account.
+
+    The format comes from ?format=, else from the uploaded file's extension.
+    """
+    upload = request.files.get('file')
+    fmt = request.args.get('format') or ('csv' if upload and upload.filename.endswith('.csv') else 'ndjson')
+    if fmt not in FORMATS:
+        return jsonify({'success': False, 'error': 'Invalid format'}), 400
+
+    lines = io.TextIOWrapper(upload.stream if upload else request.stream, encoding='utf-8', newline='')
+    records = read_csv(lines) if fmt == 'csv' else read_ndjson(lines)
+    try:
+        counts = import_records(current_user.id, records)
+        db.session.commit()
+    except (InvalidImport, UnicodeDecodeError) as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+    materialize_occurrences(current_app.config['PAYMENT_OCCURRENCE_HORIZON_DAYS'], user_id=current_user.id)
+    invalidate_dashboard(current_user.id)
+    return jsonify({'success': True, 'imported': counts})
+
+
 @views.route('/profile')
 @login_required
 def profile():